@@ -0,0 +1,54 @@
+from typing import Dict, FrozenSet, Optional, Union
+from types import MappingProxyType
+
+from aiogram.types import CallbackQuery, Message
+
+from config.logger_config import setup_logger, log_debug, log_info
+from data.models import Admin
+
+logger = setup_logger('admin_registry')
+
+# Неизменяемые снимки: при изменении заменяются целиком, поэтому чтение не требует блокировок
+_admin_ids: FrozenSet[int] = frozenset()
+_roles: "MappingProxyType[int, str]" = MappingProxyType({})
+
+def _replace(roles: Dict[int, str]) -> None:
+    global _admin_ids, _roles
+    _roles = MappingProxyType(roles)
+    _admin_ids = frozenset(roles)
+
+def load_admins() -> int:
+    """Загружает администраторов из базы. Выполняется в потоке базы данных"""
+    roles = {admin.user_id: admin.role for admin in Admin.select(Admin.user_id, Admin.role)}
+    _replace(roles)
+    log_info(logger, "Реестр администраторов загружен", {"count": len(roles)})
+    return len(roles)
+
+def is_admin(user_id: int) -> bool:
+    return user_id in _admin_ids
+
+def get_role(user_id: int) -> Optional[str]:
+    return _roles.get(user_id)
+
+def admin_ids() -> FrozenSet[int]:
+    return _admin_ids
+
+def register_admin(user_id: int, role: str = 'admin') -> None:
+    """Добавляет администратора в реестр или обновляет его роль"""
+    roles = dict(_roles)
+    roles[user_id] = role
+    _replace(roles)
+    log_debug(logger, "Администратор добавлен в реестр", {"user_id": user_id, "role": role})
+
+def unregister_admin(user_id: int) -> None:
+    """Удаляет администратора из реестра"""
+    roles = dict(_roles)
+    roles.pop(user_id, None)
+    _replace(roles)
+    log_debug(logger, "Администратор удален из реестра", {"user_id": user_id})
+
+async def is_admin_filter(event: Union[Message, CallbackQuery]) -> bool:
+    """Общий фильтр админских роутеров (сообщения и нажатия кнопок): проверка по реестру без запросов к базе"""
+    if not event.from_user:
+        return False
+    return event.from_user.id in _admin_ids
@@ -0,0 +1,262 @@
+import asyncio
+import codecs
+import csv
+import json
+import math
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+from config.catalog_search import notify_catalog_changed
+from config.logger_config import setup_logger, log_info
+from data.db_executor import run_db
+from data.models import db, Books
+
+logger = setup_logger('catalog_import')
+
+# Строк в одной транзакции записи: поток-писатель не занят надолго, заказы идут между пачками
+IMPORT_BATCH = 500
+# Как часто обновлять сообщение с прогрессом, секунд
+PROGRESS_INTERVAL = 1.0
+# Больше облачный Bot API не отдает боту через getFile
+MAX_FILE_SIZE = 20 * 1024 * 1024
+# Сколько ошибок показать администратору; остальные только считаются
+MAX_REPORTED_ERRORS = 10
+# Файл читается кусками, в памяти не больше одного куска и одной пачки строк
+READ_CHUNK = 64 * 1024
+JSON_SEPARATORS = ' \t\r\n,[]'
+
+# Заголовок столбца (без учета регистра) -> поле Books
+COLUMNS = {
+    'id': 'id',
+    'name': 'name', 'название': 'name',
+    'author': 'author', 'автор': 'author',
+    'price': 'price', 'цена': 'price',
+    'description': 'description', 'описание': 'description',
+    'photo': 'photo', 'фото': 'photo',
+    'quantity': 'quantity', 'количество': 'quantity',
+}
+REQUIRED_FIELDS = ('name', 'author', 'price', 'description', 'photo', 'quantity')
+# При совпадении id книга обновляется, без id - добавляется
+UPSERT_FIELDS = [Books.name, Books.author, Books.price, Books.description, Books.photo, Books.quantity]
+
+Row = Tuple[int, Dict[str, Any]]
+
+class CatalogImportError(Exception):
+    """Файл нельзя импортировать целиком: неизвестный формат, нет обязательных столбцов"""
+    pass
+
+class ImportStats:
+    """Прогресс импорта: прочитано строк, сохранено книг и ошибки по строкам"""
+    __slots__ = ('rows', 'saved', 'failed', 'errors')
+
+    def __init__(self) -> None:
+        self.rows = 0
+        self.saved = 0
+        self.failed = 0
+        self.errors: List[str] = []
+
+    def fail(self, number: int, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"№{number}: {message}")
+
+    def render(self, title: str = "⏳ Импорт каталога...") -> str:
+        lines = [
+            title,
+            f"Прочитано строк: {self.rows}",
+            f"Добавлено и обновлено книг: {self.saved}",
+            f"Пропущено с ошибками: {self.failed}",
+        ]
+        if self.errors:
+            lines.append("")
+            lines.append("Ошибки (номер строки файла, для JSON - номер записи):")
+            lines.extend(self.errors)
+            if self.failed > len(self.errors):
+                lines.append(f"... и еще {self.failed - len(self.errors)}")
+        return "\n".join(lines)
+
+def _csv_encoding(path: str) -> str:
+    """UTF-8 или, если начало файла им не является, cp1251 - кодировка CSV из русского Excel"""
+    with open(path, 'rb') as file:
+        head = file.read(READ_CHUNK)
+    try:
+        # final=False: последний символ может быть разрезан границей куска
+        codecs.getincrementaldecoder('utf-8')().decode(head, final=False)
+    except UnicodeDecodeError:
+        return 'cp1251'
+    return 'utf-8-sig'
+
+def read_csv(path: str) -> Iterator[Row]:
+    with open(path, newline='', encoding=_csv_encoding(path)) as file:
+        # Excel с русской локалью сохраняет CSV через точку с запятой
+        try:
+            dialect: Any = csv.Sniffer().sniff(file.readline(), delimiters=',;\t')
+        except csv.Error:
+            dialect = csv.excel
+        file.seek(0)
+        reader = csv.DictReader(file, dialect=dialect)
+        try:
+            for row in reader:
+                yield reader.line_num, row
+        except (csv.Error, UnicodeDecodeError) as e:
+            raise CatalogImportError(f"Ошибка чтения CSV в строке {reader.line_num}: {e}") from e
+
+def read_json(path: str) -> Iterator[Row]:
+    """Массив объектов или JSON Lines: объекты декодируются по одному, файл не загружается целиком"""
+    decoder = json.JSONDecoder()
+    number = 0
+    with open(path, encoding='utf-8-sig', errors='replace') as file:
+        buffer, position, eof = '', 0, False
+        while True:
+            while position < len(buffer) and buffer[position] in JSON_SEPARATORS:
+                position += 1
+            if position < len(buffer):
+                try:
+                    item, position = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    # Объект разрезан границей куска - дочитываем; в конце файла это ошибка разметки
+                    if eof:
+                        raise CatalogImportError(f"Ошибка разметки JSON после записи {number}")
+                else:
+                    number += 1
+                    yield number, item if isinstance(item, dict) else {}
+                    continue
+            elif eof:
+                return
+            chunk = file.read(READ_CHUNK)
+            eof = not chunk
+            buffer, position = buffer[position:] + chunk, 0
+
+def read_xlsx(path: str) -> Iterator[Row]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise CatalogImportError("Для импорта XLSX нужен пакет openpyxl (pip install openpyxl)")
+    # read_only: строки листа читаются потоком, а не загружаются в память всей книгой
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(cell) if cell is not None else '' for cell in next(rows, ())]
+        for number, values in enumerate(rows, start=2):
+            if any(value is not None for value in values):
+                yield number, dict(zip(header, values))
+    finally:
+        workbook.close()
+
+READERS: Dict[str, Callable[[str], Iterator[Row]]] = {
+    'csv': read_csv,
+    'json': read_json,
+    'jsonl': read_json,
+    'xlsx': read_xlsx,
+}
+
+def file_format(file_name: Optional[str]) -> Optional[str]:
+    extension = (file_name or '').rsplit('.', 1)[-1].lower()
+    return extension if extension in READERS else None
+
+def _fields(raw: Dict[str, Any]) -> Dict[str, Any]:
+    fields = {}
+    for key, value in raw.items():
+        field = COLUMNS.get(str(key or '').strip().lower())
+        if field:
+            fields[field] = value.strip() if isinstance(value, str) else value
+    return fields
+
+def _number(value: Any) -> Optional[float]:
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        number = float(value)
+    else:
+        number = float(str(value).replace('\xa0', '').replace(' ', '').replace(',', '.'))
+    return number if math.isfinite(number) else None
+
+def parse_row(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """Строка файла -> поля Books. Правила те же, что при сохранении книги и в форме добавления"""
+    fields = _fields(raw)
+    if not fields:
+        raise ValueError("Нет ни одного известного столбца")
+    try:
+        price = _number(fields.get('price'))
+    except ValueError:
+        price = None
+    if price is None or price <= 0:
+        raise ValueError("Цена должна быть положительным числом")
+    try:
+        quantity = _number(fields.get('quantity'))
+    except ValueError:
+        quantity = None
+    if quantity is None or quantity < 0 or not quantity.is_integer():
+        raise ValueError("Количество должно быть целым неотрицательным числом")
+    book_id = None
+    if fields.get('id') not in (None, ''):
+        try:
+            book_id = _number(fields['id'])
+        except ValueError:
+            book_id = None
+        if book_id is None or book_id <= 0 or not book_id.is_integer():
+            raise ValueError("id должен быть целым положительным числом")
+    row = {
+        'id': int(book_id) if book_id else None,
+        'name': str(fields.get('name') or ''),
+        'author': str(fields.get('author') or ''),
+        'price': price,
+        'description': str(fields.get('description') or ''),
+        'photo': str(fields.get('photo') or ''),
+        'quantity': int(quantity),
+    }
+    error = Books(**row).validation_error()
+    if error:
+        raise ValueError(error)
+    return row
+
+def next_batch(rows: Iterator[Row], stats: ImportStats) -> List[Dict[str, Any]]:
+    """Читает и проверяет следующую пачку строк. Выполняется вне event loop"""
+    batch: List[Dict[str, Any]] = []
+    for number, raw in rows:
+        if stats.rows == 0:
+            missing = [field for field in REQUIRED_FIELDS if field not in _fields(raw)]
+            if missing:
+                raise CatalogImportError(f"В файле нет столбцов: {', '.join(missing)}")
+        stats.rows += 1
+        try:
+            batch.append(parse_row(raw))
+        except ValueError as e:
+            stats.fail(number, str(e))
+            continue
+        if len(batch) == IMPORT_BATCH:
+            break
+    return batch
+
+def upsert_books(rows: List[Dict[str, Any]]) -> int:
+    """Добавляет и обновляет пачку книг одной транзакцией. Выполняется в потоке-писателе"""
+    with db.atomic():
+        Books.insert_many(rows).on_conflict(conflict_target=[Books.id], preserve=UPSERT_FIELDS).execute()
+    return len(rows)
+
+async def import_catalog(path: str, file_format: str,
+                         progress: Optional[Callable[[ImportStats], Awaitable[Any]]] = None,
+                         stats: Optional[ImportStats] = None) -> ImportStats:
+    """Импортирует файл пачками: разбор в отдельном потоке, запись в потоке-писателе.
+
+    Ошибки отдельных строк копятся в статистике, CatalogImportError прерывает импорт;
+    сохраненные до этого пачки остаются. progress вызывается не чаще PROGRESS_INTERVAL.
+    """
+    rows = READERS[file_format](path)
+    stats = stats if stats is not None else ImportStats()
+    reported = time.monotonic()
+    try:
+        while True:
+            batch = await asyncio.to_thread(next_batch, rows, stats)
+            if not batch:
+                break
+            stats.saved += await run_db(upsert_books, batch)
+            if progress is not None and time.monotonic() - reported >= PROGRESS_INTERVAL:
+                reported = time.monotonic()
+                await progress(stats)
+    finally:
+        await asyncio.to_thread(rows.close)
+        if stats.saved:
+            notify_catalog_changed()
+    log_info(logger, "Импорт каталога", {"rows": stats.rows, "saved": stats.saved, "failed": stats.failed})
+    return stats
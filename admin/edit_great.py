@@ -1,26 +1,19 @@
 from aiogram import Router, F
 from aiogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery
-from data.models import db, Greeting, Admin
+from data.models import db, Greeting
 from aiogram.fsm.context import FSMContext
 from admin.state_book import GreetingTextState
 from config.keyboards import texts_menu_kb
 from typing import cast
 from config.logger_config import setup_logger, log_debug, log_error, log_warning
+from data.db_executor import db_get_or_none, db_create, db_save
+from admin.admin_registry import is_admin_filter
 
-admin_great_router = Router()
+admin_great_router = Router(name="admin_great_router")
 logger = setup_logger('admin_edit_great')
 
-async def is_admin_filter(message: Message) -> bool:
-    if not message.from_user:
-        log_debug(logger, "is_admin_filter: Отсутствует информация о пользователе.", {})
-        return False
-    
-    user_id = message.from_user.id
-    is_admin = Admin.get_or_none(Admin.user_id == user_id) is not None
-    log_debug(logger, f"is_admin_filter: Проверка пользователя {user_id}. Результат: {is_admin}", {"user_id": user_id, "is_admin": is_admin})
-    return is_admin
-
 admin_great_router.message.filter(is_admin_filter)
+admin_great_router.callback_query.filter(is_admin_filter)
 
 # Старый обработчик будет удален, вместо него будут FSM-обработчики
 # @admin_router.message(F.text.startswith("Изменить приветствие"))
@@ -53,7 +46,7 @@ admin_great_router.message.filter(is_admin_filter)
 async def show_greeting_text_for_edit(message: Message):
     log_debug(logger, "Вход в show_greeting_text_for_edit", {"user_id": message.from_user.id if message.from_user else None})
     try:
-        greeting_obj = Greeting.get_or_none()
+        greeting_obj = await db_get_or_none(Greeting)
         current_text = greeting_obj.text if greeting_obj else "*Текущий текст приветствия отсутствует.*"
         keyboard = InlineKeyboardMarkup(inline_keyboard=[
             [InlineKeyboardButton(text="✏️ Изменить приветствие", callback_data="edit_greeting_text_inline")]
@@ -69,7 +62,7 @@ async def show_greeting_text_for_edit(message: Message):
 
 @admin_great_router.callback_query(F.data == "edit_greeting_text_inline")
 async def edit_greeting_text_inline(callback_query: CallbackQuery, state: FSMContext):
-    log_debug(logger, f"Коллбэк получен: {callback_query.data}")
+    log_debug(logger, "Коллбэк получен", {"data": callback_query.data})
     await state.set_state(GreetingTextState.text)
     if callback_query.message:
         message_obj = cast(Message, callback_query.message)
@@ -87,13 +80,13 @@ async def process_greeting_text(message: Message, state: FSMContext):
         return
     
     try:
-        greeting_obj = Greeting.get_or_none()
+        greeting_obj = await db_get_or_none(Greeting)
         if greeting_obj:
             greeting_obj.text = message.text.strip()
-            greeting_obj.save()
+            await db_save(greeting_obj)
             status = "обновлен"
         else:
-            Greeting.create(text=message.text.strip())
+            await db_create(Greeting, text=message.text.strip())
             status = "создан"
         await message.answer(f"Приветствие успешно {status}!", reply_markup=texts_menu_kb)
     except Exception as e:
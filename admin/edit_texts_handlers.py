@@ -3,28 +3,25 @@ from aiogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton, C
 from data.models import GalleryText, OrderPretext
 from admin.state_book import GalleryTextState, OrderPretextState
 from aiogram.fsm.context import FSMContext
-from data.models import Admin # Для проверки админ-прав
 from config.keyboards import texts_menu_kb # Добавил импорт texts_menu_kb
 from typing import cast # Добавляем импорт cast
 from config.logger_config import setup_logger, log_debug, log_error, log_warning, log_info
+from data.db_executor import db_get_or_none, db_create, db_save
+from admin.admin_registry import is_admin_filter
 
-admin_texts_router = Router()
+admin_texts_router = Router(name="admin_texts_router")
 logger = setup_logger('admin_edit_texts_handlers')
 
-async def is_admin_filter(message: Message) -> bool:
-    if not message.from_user:
-        return False
-    return Admin.get_or_none(Admin.user_id == message.from_user.id) is not None
-
 admin_texts_router.message.filter(is_admin_filter)
+admin_texts_router.callback_query.filter(is_admin_filter)
 
 # --- Обработчики для редактирования текста галереи ---
 @admin_texts_router.message(F.text == "🖼 Изменить текст галереи")
 async def show_gallery_text_for_edit(message: Message):
     log_debug(logger, "Вход в show_gallery_text_for_edit", {"user_id": message.from_user.id if message.from_user else None})
-    log_debug(logger, f"Получен текстовый запрос: {message.text}")
+    log_debug(logger, "Получен текстовый запрос", {"text": message.text})
     try:
-        gallery_text_obj = GalleryText.get_or_none()
+        gallery_text_obj = await db_get_or_none(GalleryText)
         current_text = gallery_text_obj.text if gallery_text_obj else "*Текущий текст галереи отсутствует.*"
 
         keyboard = InlineKeyboardMarkup(inline_keyboard=[
@@ -42,7 +39,7 @@ async def show_gallery_text_for_edit(message: Message):
 
 @admin_texts_router.callback_query(F.data == "edit_gallery_text_inline")
 async def edit_gallery_text_inline(callback_query: CallbackQuery, state: FSMContext):
-    log_debug(logger, f"Коллбэк получен: {callback_query.data}")
+    log_debug(logger, "Коллбэк получен", {"data": callback_query.data})
     await state.set_state(GalleryTextState.text)
     if callback_query.message:
         message_obj = cast(Message, callback_query.message) # Явное приведение к типу Message
@@ -61,14 +58,14 @@ async def process_gallery_text(message: Message, state: FSMContext):
         return
     
     try:
-        gallery_text_obj = GalleryText.get_or_none()
+        gallery_text_obj = await db_get_or_none(GalleryText)
         if gallery_text_obj:
             gallery_text_obj.text = message.text.strip()
-            gallery_text_obj.save()
+            await db_save(gallery_text_obj)
             status = "обновлен"
             log_info(logger, "Текст галереи обновлен", {"user_id": message.from_user.id if message.from_user else None})
         else:
-            GalleryText.create(text=message.text.strip())
+            await db_create(GalleryText, text=message.text.strip())
             status = "создан"
             log_info(logger, "Текст галереи создан", {"user_id": message.from_user.id if message.from_user else None})
         await message.answer(f"Текст для галереи успешно {status}!", reply_markup=texts_menu_kb)
@@ -82,9 +79,9 @@ async def process_gallery_text(message: Message, state: FSMContext):
 @admin_texts_router.message(F.text == "📝 Изменить текст заказа")
 async def show_order_pretext_for_edit(message: Message):
     log_debug(logger, "Вход в show_order_pretext_for_edit", {"user_id": message.from_user.id if message.from_user else None})
-    log_debug(logger, f"Получен текстовый запрос: {message.text}")
+    log_debug(logger, "Получен текстовый запрос", {"text": message.text})
     try:
-        order_pretext_obj = OrderPretext.get_or_none()
+        order_pretext_obj = await db_get_or_none(OrderPretext)
         current_text = order_pretext_obj.text if order_pretext_obj else "*Текущий текст перед заказом отсутствует.*"
 
         keyboard = InlineKeyboardMarkup(inline_keyboard=[
@@ -102,7 +99,7 @@ async def show_order_pretext_for_edit(message: Message):
 
 @admin_texts_router.callback_query(F.data == "edit_order_pretext_inline")
 async def edit_order_pretext_inline(callback_query: CallbackQuery, state: FSMContext):
-    log_debug(logger, f"Коллбэк получен: {callback_query.data}")
+    log_debug(logger, "Коллбэк получен", {"data": callback_query.data})
     await state.set_state(OrderPretextState.text)
     if callback_query.message:
         message_obj = cast(Message, callback_query.message) # Явное приведение к типу Message
@@ -121,14 +118,14 @@ async def process_order_pretext(message: Message, state: FSMContext):
         return
     
     try:
-        order_pretext_obj = OrderPretext.get_or_none()
+        order_pretext_obj = await db_get_or_none(OrderPretext)
         if order_pretext_obj:
             order_pretext_obj.text = message.text.strip()
-            order_pretext_obj.save()
+            await db_save(order_pretext_obj)
             status = "обновлен"
             log_info(logger, "Текст перед заказом обновлен", {"user_id": message.from_user.id if message.from_user else None})
         else:
-            OrderPretext.create(text=message.text.strip())
+            await db_create(OrderPretext, text=message.text.strip())
             status = "создан"
             log_info(logger, "Текст перед заказом создан", {"user_id": message.from_user.id if message.from_user else None})
         await message.answer(f"Текст перед заказом успешно {status}!", reply_markup=texts_menu_kb)
@@ -0,0 +1,180 @@
+import csv
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from peewee import JOIN, Tuple as RowValue, fn
+
+from config import settings
+from config.logger_config import setup_logger, log_info
+from data.models import Books, Order, OrderStatus
+
+logger = setup_logger('order_export')
+
+# Заказов в одном запросе: снимок WAL держится только на время пачки, а не всей выгрузки
+EXPORT_BATCH = 1000
+# Облачный Bot API принимает от бота файлы до 50 МБ, локальный telegram-bot-api - до 2000 МБ
+MAX_UPLOAD_SIZE = (2000 if settings.TELEGRAM_API_URL else 50) * 1024 * 1024
+# Строк на листе Excel, включая заголовок
+XLSX_MAX_ROWS = 1048576
+DATE_FORMAT = '%d.%m.%Y'
+DATETIME_FORMAT = '%d.%m.%Y %H:%M'
+
+# Заказ со статусом, которого нет в orderstatus, тоже попадает в выгрузку
+MISSING_STATUS = 'Статус не задан'
+
+HEADER = ['Заказ', 'Создан', 'Обновлен', 'Статус', 'ФИО', 'Адрес', 'Телефон', 'Telegram ID',
+          'id книги', 'Название', 'Автор', 'Цена', 'Книга в заказе']
+FIELDS = [Order.id, Order.created_at, Order.updated_at, fn.COALESCE(OrderStatus.description, MISSING_STATUS), Order.fio, Order.addres,
+          Order.phone, Order.telegram_id, Order.book_id, Books.name, Books.author, Books.price, Order.book_info]
+DATETIME_COLUMNS = (1, 2)
+PRICE_COLUMN = 11
+# С этих символов Excel и LibreOffice начинают формулу: "=HYPERLINK(...)" в ФИО не должно стать ссылкой
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+class OrderExportError(Exception):
+    """Выгрузку нельзя отправить: неверные параметры, слишком много строк или большой файл"""
+    pass
+
+class ExportFilter(NamedTuple):
+    """Статус (0 - все) и период по дате создания: date_from включительно, date_to - не включая"""
+    status_id: int = 0
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+
+def period_filter(status_id: int, period: int) -> ExportFilter:
+    """Фильтр из кнопок списка заказов: период в днях, 0 - за все время"""
+    return ExportFilter(status_id, datetime.now() - timedelta(days=period) if period else None)
+
+def parse_export_args(args: Optional[str], statuses: Sequence[OrderStatus]) -> Tuple[str, ExportFilter]:
+    """Разбирает "/export [csv|xlsx] [ДД.ММ.ГГГГ [ДД.ММ.ГГГГ]] [статус]" в формат и фильтр"""
+    export_format = 'csv'
+    dates: List[datetime] = []
+    status_id = 0
+    by_name = {status.name.lower(): status.id for status in statuses}
+    for word in (args or '').split():
+        token = word.lower()
+        if token in WRITERS:
+            export_format = token
+        elif token in by_name:
+            status_id = by_name[token]
+        else:
+            try:
+                dates.append(datetime.strptime(token, DATE_FORMAT))
+            except ValueError:
+                raise OrderExportError(f"Непонятный параметр: {word}")
+    if len(dates) > 2:
+        raise OrderExportError("Укажите не больше двух дат: начало и конец периода")
+    date_from = dates[0] if dates else None
+    # Конечная дата включается в период целиком
+    date_to = dates[1] + timedelta(days=1) if len(dates) == 2 else None
+    if date_from and date_to and date_from >= date_to:
+        raise OrderExportError("Дата начала периода позже даты конца")
+    return export_format, ExportFilter(status_id, date_from, date_to)
+
+def _filtered(export_filter: ExportFilter):
+    query = (Order.select(*FIELDS)
+             .join(OrderStatus, JOIN.LEFT_OUTER, on=(Order.status == OrderStatus.id))
+             .switch(Order)
+             .join(Books, JOIN.LEFT_OUTER, on=(Order.book_id == Books.id)))
+    if export_filter.status_id:
+        query = query.where(Order.status == export_filter.status_id)
+    if export_filter.date_from:
+        query = query.where(Order.created_at >= export_filter.date_from)
+    if export_filter.date_to:
+        query = query.where(Order.created_at < export_filter.date_to)
+    return query
+
+def iter_orders(export_filter: ExportFilter, batch: int = EXPORT_BATCH) -> Iterator[Tuple[Any, ...]]:
+    """Заказы от старых к новым пачками по ключу (created_at, id), по индексу заказов.
+
+    В памяти не больше одной пачки. Выполняется в потоке базы данных.
+    """
+    cursor: Optional[Tuple[datetime, int]] = None
+    while True:
+        query = _filtered(export_filter)
+        if cursor is not None:
+            query = query.where(RowValue(Order.created_at, Order.id) > RowValue(*cursor))
+        rows = list(query.order_by(Order.created_at.asc(), Order.id.asc()).limit(batch).tuples())
+        yield from rows
+        if len(rows) < batch:
+            return
+        cursor = (rows[-1][1], rows[-1][0])
+
+def _is_formula(value: Any) -> bool:
+    return isinstance(value, str) and value.startswith(FORMULA_PREFIXES)
+
+def _csv_row(values: Tuple[Any, ...]) -> List[Any]:
+    # Апостроф перед формулой: табличный редактор покажет ячейку как текст
+    row = [f"'{value}" if _is_formula(value) else value for value in values]
+    for column in DATETIME_COLUMNS:
+        row[column] = row[column].strftime(DATETIME_FORMAT)
+    if row[PRICE_COLUMN] is not None:
+        # Десятичная запятая: файл открывается в русском Excel без настройки импорта
+        row[PRICE_COLUMN] = str(row[PRICE_COLUMN]).replace('.', ',')
+    return row
+
+def write_csv(path: str, rows: Iterator[Tuple[Any, ...]]) -> int:
+    count = 0
+    # utf-8-sig и точка с запятой - как ожидает Excel с русской локалью
+    with open(path, 'w', newline='', encoding='utf-8-sig') as file:
+        writer = csv.writer(file, delimiter=';')
+        writer.writerow(HEADER)
+        for values in rows:
+            writer.writerow(_csv_row(values))
+            count += 1
+    return count
+
+def _text_cell(sheet: Any, value: str) -> Any:
+    from openpyxl.cell import WriteOnlyCell
+    # openpyxl сохраняет строку с "=" как формулу; тип "s" записывает ее текстом без изменений
+    cell = WriteOnlyCell(sheet, value)
+    cell.data_type = 's'
+    return cell
+
+def write_xlsx(path: str, rows: Iterator[Tuple[Any, ...]]) -> int:
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise OrderExportError("Для выгрузки в XLSX нужен пакет openpyxl (pip install openpyxl)")
+    # write_only: строки сразу пишутся во временный файл, а не копятся в памяти
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Заказы')
+    sheet.append(HEADER)
+    count = 0
+    for values in rows:
+        count += 1
+        if count >= XLSX_MAX_ROWS:
+            workbook.close()
+            raise OrderExportError(f"Больше {XLSX_MAX_ROWS - 1} заказов не помещается на лист Excel. Выгрузите в CSV или за меньший период")
+        sheet.append([_text_cell(sheet, value) if _is_formula(value) else value for value in values])
+    workbook.save(path)
+    return count
+
+WRITERS: Dict[str, Callable[[str, Iterator[Tuple[Any, ...]]], int]] = {
+    'csv': write_csv,
+    'xlsx': write_xlsx,
+}
+
+def export_orders(path: str, export_format: str, export_filter: ExportFilter) -> int:
+    """Записывает заказы в файл и возвращает их число. Выполняется в пуле соединений для чтения"""
+    count = WRITERS[export_format](path, iter_orders(export_filter))
+    log_info(logger, "Выгрузка заказов", {"format": export_format, "orders": count, "status_id": export_filter.status_id})
+    return count
+
+def export_file_name(export_format: str, export_filter: ExportFilter) -> str:
+    date_from = export_filter.date_from.strftime('%Y%m%d') if export_filter.date_from else 'start'
+    date_to = (export_filter.date_to - timedelta(days=1) if export_filter.date_to else datetime.now()).strftime('%Y%m%d')
+    return f"orders_{date_from}-{date_to}.{export_format}"
+
+def describe_export(export_filter: ExportFilter, statuses: Sequence[OrderStatus], count: int) -> str:
+    """Подпись к файлу: фильтр и число заказов"""
+    status_title = "все статусы"
+    for status in statuses:
+        if status.id == export_filter.status_id:
+            status_title = f"{status.emoji} {status.description}"
+    period = "за все время"
+    if export_filter.date_from or export_filter.date_to:
+        start = export_filter.date_from.strftime(DATE_FORMAT) if export_filter.date_from else "начала"
+        end = (export_filter.date_to - timedelta(days=1)).strftime(DATE_FORMAT) if export_filter.date_to else "сегодня"
+        period = f"с {start} по {end}"
+    return f"📤 Заказы {period}, {status_title}: {count}"
@@ -0,0 +1,157 @@
+from datetime import datetime, timedelta
+from html import escape
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+from peewee import JOIN, Tuple as RowValue
+
+from data.models import Order, OrderStatus
+
+# Заказов на одной странице: все они выводятся одним сообщением (лимит 4096 символов)
+PAGE_SIZE = 5
+# Длина полей, которые вводит покупатель: карточка не длиннее ~650 символов, страница из
+# PAGE_SIZE карточек с заголовком укладывается в лимит при любых введенных данных
+FIELD_LIMITS = {'fio': 100, 'addres': 200, 'phone': 40, 'book_info': 200}
+# Заказы из старых баз могут ссылаться на пустой или удаленный статус: они не скрываются из списка
+MISSING_STATUS = "❔ Статус не задан"
+
+# Фильтр по периоду: код в callback_data -> количество дней (0 - за все время)
+PERIODS: Dict[int, str] = {
+    0: "Все время",
+    1: "Сутки",
+    7: "7 дней",
+    30: "30 дней",
+}
+
+class OrderPage(NamedTuple):
+    orders: List[Order]
+    has_prev: bool
+    has_next: bool
+
+def _filtered(status_id: int, period: int):
+    query = Order.select(Order, OrderStatus).join(OrderStatus, JOIN.LEFT_OUTER)
+    if status_id:
+        query = query.where(Order.status == status_id)
+    if period:
+        query = query.where(Order.created_at >= datetime.now() - timedelta(days=period))
+    return query
+
+# Сравнение пар (created_at, id): в отличие от условия через OR, SQLite ищет по индексу диапазоном, а не сканирует его
+def _older_than(order: Order):
+    return RowValue(Order.created_at, Order.id) < RowValue(order.created_at, order.id)
+
+def _newer_than(order: Order):
+    return RowValue(Order.created_at, Order.id) > RowValue(order.created_at, order.id)
+
+def fetch_orders_page(status_id: int = 0, period: int = 0, after_id: Optional[int] = None,
+                      before_id: Optional[int] = None, limit: int = PAGE_SIZE) -> OrderPage:
+    """Страница заказов от новых к старым по ключу (created_at, id).
+
+    after_id - последний заказ предыдущей страницы (листаем к более старым),
+    before_id - первый заказ текущей страницы (листаем к более новым).
+    Выполняется в потоке базы данных.
+    """
+    cursor_id = after_id if after_id is not None else before_id
+    cursor = Order.select(Order.id, Order.created_at).where(Order.id == cursor_id).first() if cursor_id is not None else None
+
+    if cursor is not None and before_id is not None:
+        rows = list(_filtered(status_id, period).where(_newer_than(cursor))
+                    .order_by(Order.created_at.asc(), Order.id.asc()).limit(limit + 1))
+        has_prev = len(rows) > limit
+        orders = list(reversed(rows[:limit]))
+        return OrderPage(orders, has_prev, True)
+
+    query = _filtered(status_id, period)
+    if cursor is not None:
+        query = query.where(_older_than(cursor))
+    rows = list(query.order_by(Order.created_at.desc(), Order.id.desc()).limit(limit + 1))
+    orders = rows[:limit]
+    has_prev = bool(orders) and _filtered(status_id, period).where(_newer_than(orders[0])).exists()
+    return OrderPage(orders, has_prev, len(rows) > limit)
+
+def fetch_orders_view(status_id: int = 0, period: int = 0, after_id: Optional[int] = None,
+                      before_id: Optional[int] = None) -> Tuple[OrderPage, List[OrderStatus]]:
+    """Страница заказов вместе со списком статусов для кнопок фильтра"""
+    page = fetch_orders_page(status_id, period, after_id, before_id)
+    return page, list(OrderStatus.select().order_by(OrderStatus.id))
+
+def parse_orders_callback(data: str) -> Optional[Tuple[str, int, int, Optional[int]]]:
+    """Разбирает ord_f_{статус}_{период} и ord_next/ord_prev_{статус}_{период}_{id}"""
+    parts = data.split("_")
+    try:
+        if len(parts) == 4 and parts[1] == "f":
+            return "f", int(parts[2]), int(parts[3]), None
+        if len(parts) == 5 and parts[1] in ("next", "prev"):
+            return parts[1], int(parts[2]), int(parts[3]), int(parts[4])
+    except ValueError:
+        return None
+    return None
+
+def _short(text: str, field: str) -> str:
+    limit = FIELD_LIMITS[field]
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+def status_label(status: Optional[OrderStatus]) -> str:
+    return f"{status.emoji} {status.description}" if status else MISSING_STATUS
+
+def render_order(order: Order) -> str:
+    """Карточка заказа в HTML. Статус должен быть выбран тем же запросом (join OrderStatus)"""
+    book_info_str = order.book_info if order.book_info else "Информация о книге недоступна"
+    return (
+        f"📦 <b>Заказ №{order.id}</b>\n"
+        f"👤 ФИО: {escape(_short(order.fio, 'fio'))}\n"
+        f"🏠 Адрес: {escape(_short(order.addres, 'addres'))}\n"
+        f"📞 Телефон: {escape(_short(order.phone, 'phone'))}\n"
+        f"📚 Книга: {escape(_short(book_info_str, 'book_info'))}\n"
+        f"📊 Статус: {escape(status_label(order.status))}\n"
+        f"📅 Создан: {order.created_at.strftime('%d.%m.%Y %H:%M')}\n"
+        f"🔄 Обновлен: {order.updated_at.strftime('%d.%m.%Y %H:%M')}"
+    )
+
+def render_orders_page(page: OrderPage, statuses: List[OrderStatus], status_id: int, period: int) -> str:
+    """Текст страницы в HTML: данные покупателя экранируются, чтобы не ломать разметку"""
+    status_title = "Все статусы"
+    for status in statuses:
+        if status.id == status_id:
+            status_title = f"{status.emoji} {status.description}"
+    header = f"📦 <b>Заказы</b> · {escape(status_title)} · {PERIODS.get(period, PERIODS[0])}"
+    if not page.orders:
+        return f"{header}\n\nЗаказов не найдено."
+
+    blocks = [header]
+    blocks.extend(render_order(order) for order in page.orders)
+    return "\n\n".join(blocks)
+
+def orders_page_keyboard(page: OrderPage, statuses: List[OrderStatus], status_id: int, period: int) -> InlineKeyboardMarkup:
+    """Кнопки действий с заказами, навигация ord_prev/ord_next, фильтры ord_f и выгрузка выборки exp"""
+    rows: List[List[InlineKeyboardButton]] = []
+    for order in page.orders:
+        rows.append([
+            InlineKeyboardButton(text=f"🔄 Статус №{order.id}", callback_data=f"change_status_{order.id}"),
+            InlineKeyboardButton(text=f"🗑️ Удалить №{order.id}", callback_data=f"delete_order_{order.id}")
+        ])
+
+    navigation = []
+    if page.has_prev:
+        navigation.append(InlineKeyboardButton(text="◀️ Новее", callback_data=f"ord_prev_{status_id}_{period}_{page.orders[0].id}"))
+    if page.has_next:
+        navigation.append(InlineKeyboardButton(text="Старее ▶️", callback_data=f"ord_next_{status_id}_{period}_{page.orders[-1].id}"))
+    if navigation:
+        rows.append(navigation)
+
+    status_buttons = [InlineKeyboardButton(text=("• " if status_id == 0 else "") + "Все", callback_data=f"ord_f_0_{period}")]
+    for status in statuses:
+        mark = "• " if status.id == status_id else ""
+        status_buttons.append(InlineKeyboardButton(text=f"{mark}{status.emoji}", callback_data=f"ord_f_{status.id}_{period}"))
+    rows.append(status_buttons[:4])
+    rows.append(status_buttons[4:])
+
+    rows.append([
+        InlineKeyboardButton(text=("• " if code == period else "") + title, callback_data=f"ord_f_{status_id}_{code}")
+        for code, title in PERIODS.items()
+    ])
+    rows.append([
+        InlineKeyboardButton(text="📤 CSV", callback_data=f"exp_{status_id}_{period}_csv"),
+        InlineKeyboardButton(text="📤 XLSX", callback_data=f"exp_{status_id}_{period}_xlsx")
+    ])
+    return InlineKeyboardMarkup(inline_keyboard=[row for row in rows if row])
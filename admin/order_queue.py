@@ -0,0 +1,115 @@
+import threading
+from datetime import datetime
+from types import MappingProxyType
+from typing import List, Mapping, Optional
+
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+from peewee import fn
+
+from config.logger_config import setup_logger, log_debug, log_info
+from data.db_executor import run_db_read
+from data.models import db, Order, OrderStatus
+
+logger = setup_logger('order_queue')
+
+# Заказы в статусе NEW_STATUS образуют очередь, взятый заказ переходит в CLAIMED_STATUS
+NEW_STATUS = 'new'
+CLAIMED_STATUS = 'processing'
+# Сколько раз брать следующий заказ, если выбранный успел взять другой администратор
+CLAIM_ATTEMPTS = 3
+
+# Счетчики заказов по статусам: неизменяемый снимок, None - нужно пересчитать
+_counts: Optional["MappingProxyType[int, int]"] = None
+# Поколение счетчиков: пересчет, начатый до сброса, не должен перезаписать кэш устаревшими данными
+_generation = 0
+_counts_lock = threading.Lock()
+
+def load_status_counts() -> Mapping[int, int]:
+    """Считает заказы по статусам одним GROUP BY по индексу (status_id, ...). Выполняется в потоке базы данных"""
+    global _counts
+    with _counts_lock:
+        generation = _generation
+    rows = Order.select(Order.status, fn.COUNT(Order.id)).group_by(Order.status).tuples()
+    counts = MappingProxyType({status_id: count for status_id, count in rows})
+    with _counts_lock:
+        if generation == _generation:
+            _counts = counts
+    log_debug(logger, "Счетчики заказов пересчитаны", dict(counts))
+    return counts
+
+def invalidate_status_counts() -> None:
+    """Сбрасывает счетчики после создания, удаления или смены статуса заказа"""
+    global _counts, _generation
+    with _counts_lock:
+        _generation += 1
+        _counts = None
+
+async def get_status_counts() -> Mapping[int, int]:
+    """Счетчики из кэша, при необходимости пересчитываются в пуле чтения"""
+    counts = _counts
+    if counts is None:
+        counts = await run_db_read(load_status_counts)
+    return counts
+
+def claim_next_order() -> Optional[Order]:
+    """Берет самый старый новый заказ в работу. Выполняется в потоке-писателе.
+
+    Поиск идет по индексу (status_id, created_at, id) и не зависит от числа заказов.
+    """
+    new_status = OrderStatus.get_or_none(OrderStatus.name == NEW_STATUS)
+    claimed_status = OrderStatus.get_or_none(OrderStatus.name == CLAIMED_STATUS)
+    if not new_status or not claimed_status:
+        return None
+
+    # BEGIN IMMEDIATE: блокировка записи берется до чтения головы очереди, поэтому два
+    # процесса-обработчика не возьмут один заказ и не получат SQLITE_BUSY при повышении блокировки
+    for _ in range(CLAIM_ATTEMPTS):
+        with db.atomic('IMMEDIATE'):
+            head = (Order.select(Order.id)
+                    .where(Order.status == new_status)
+                    .order_by(Order.created_at, Order.id)
+                    .first())
+            if head is None:
+                return None
+            claimed = (Order.update(status=claimed_status, updated_at=datetime.now())
+                       .where((Order.id == head.id) & (Order.status == new_status))
+                       .execute())
+        if claimed == 1:
+            break
+        log_debug(logger, "Заказ уже взят другим администратором", {"order_id": head.id})
+    else:
+        return None
+
+    invalidate_status_counts()
+    log_info(logger, "Заказ взят в работу", {"order_id": head.id})
+    return Order.select(Order, OrderStatus).join(OrderStatus).where(Order.id == head.id).first()
+
+def render_queue(counts: Mapping[int, int], statuses: List[OrderStatus]) -> str:
+    lines = ["🆕 <b>Очередь заказов</b>", ""]
+    for status in statuses:
+        lines.append(f"{status.emoji} {status.description}: {counts.get(status.id, 0)}")
+    lines.append("")
+    lines.append(f"Всего заказов: {sum(counts.values())}")
+    return "\n".join(lines)
+
+def new_orders_count(counts: Mapping[int, int], statuses: List[OrderStatus]) -> int:
+    for status in statuses:
+        if status.name == NEW_STATUS:
+            return counts.get(status.id, 0)
+    return 0
+
+def queue_keyboard(has_new: bool) -> InlineKeyboardMarkup:
+    rows = []
+    if has_new:
+        rows.append([InlineKeyboardButton(text="▶️ Взять следующий заказ", callback_data="queue_claim")])
+    rows.append([InlineKeyboardButton(text="🔄 Обновить", callback_data="queue_refresh")])
+    return InlineKeyboardMarkup(inline_keyboard=rows)
+
+def claimed_order_keyboard(order: Order) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [
+            InlineKeyboardButton(text="🔄 Статус", callback_data=f"change_status_{order.id}"),
+            InlineKeyboardButton(text="🗑️ Удалить", callback_data=f"delete_order_{order.id}")
+        ],
+        [InlineKeyboardButton(text="▶️ Следующий заказ", callback_data="queue_claim")]
+    ])
@@ -12,21 +12,14 @@ from config.keyboards import admins_menu_kb
 from aiogram.fsm.context import FSMContext
 from admin.state_book import AdminEditState
 from typing import cast
+from data.db_executor import db_get_or_none, db_get_or_create, db_fetch_all, db_save, db_delete
+from admin.admin_registry import is_admin_filter, register_admin, unregister_admin
 
-register_admin_router = Router()
+register_admin_router = Router(name="register_admin_router")
 logger = setup_logger('admin_rigister_admin')
 
-async def is_admin_filter(message: Message) -> bool:
-    if not message.from_user:
-        log_debug(logger, "is_admin_filter: Отсутствует информация о пользователе.", {})
-        return False
-    
-    user_id = message.from_user.id
-    is_admin = Admin.get_or_none(Admin.user_id == user_id) is not None
-    log_debug(logger, f"is_admin_filter: Проверка пользователя {user_id}. Результат: {is_admin}", {"user_id": user_id, "is_admin": is_admin})
-    return is_admin
-
 register_admin_router.message.filter(is_admin_filter) # Раскомментировано
+register_admin_router.callback_query.filter(is_admin_filter)
 
 @register_admin_router.message(F.text == "➕ Добавить администратора")
 async def add_admin_start(message: Message):
@@ -48,17 +41,15 @@ async def add_admin_contact(message: Message):
             await message.answer("Не удалось получить контактные данные.", reply_markup=admins_menu_kb)
             return
         
-        # Добавляем отладочный вывод
-        print(f"DEBUG: Received contact.user_id: {contact.user_id}")
-        print(f"DEBUG: Received contact.first_name: {contact.first_name}")
-        print(f"DEBUG: Received contact.phone_number: {contact.phone_number}")
+        log_debug(logger, "Получен контакт администратора", {"user_id": contact.user_id})
 
         # Создаем или обновляем администратора
-        admin, created = Admin.get_or_create(user_id=contact.user_id)
+        admin, created = await db_get_or_create(Admin, user_id=contact.user_id)
         admin.user_name = contact.first_name + (f" {contact.last_name}" if contact.last_name else "")
         # Изменено: сохраняем phone_number как строку без преобразования в int
         admin.phone = contact.phone_number if contact.phone_number else "" 
-        admin.save()
+        await db_save(admin)
+        register_admin(admin.user_id, admin.role)
         status = "обновлен" if not created else "добавлен"
         await message.answer(f"Администратор успешно {status}!", reply_markup=admins_menu_kb)
     except Exception as e:
@@ -66,16 +57,16 @@ async def add_admin_contact(message: Message):
 
 async def list_admins(message: Message):
     log_debug(logger, "Начало функции list_admins")
-    admins = Admin.select()  # Получаем всех администраторов из базы
+    admins = await db_fetch_all(Admin.select())  # Получаем всех администраторов из базы
     if not admins:
         log_info(logger, "Список администраторов пуст")
         await message.answer("Список администраторов пуст", reply_markup=admins_menu_kb)
         return
     
-    log_info(logger, f"Найдено {len(admins)} администраторов. Отправка списка.")
+    log_info(logger, "Отправка списка администраторов", {"count": len(admins)})
     await message.answer("Список администраторов:") # Отправляем заголовок один раз
     for admin in admins:
-        log_debug(logger, f"Отправка информации об администраторе: {admin.user_id}", {"admin_id": admin.user_id, "user_name": admin.user_name})
+        log_debug(logger, "Отправка информации об администраторе", {"admin_id": admin.user_id, "user_name": admin.user_name})
         keyboard = InlineKeyboardMarkup(inline_keyboard=[
             [InlineKeyboardButton(text="✏️ Изменить администратора", callback_data=f"edit_admin_{admin.user_id}"),
              InlineKeyboardButton(text="🗑️ Удалить администратора", callback_data=f"delete_admin_{admin.user_id}")]
@@ -108,13 +99,13 @@ async def edit_admin_callback_handler(callback_query: CallbackQuery, state: FSMC
 
     try:
         admin_user_id = int(callback_query.data.split("_")[2])
-        log_debug(logger, f"Извлечен admin_user_id: {admin_user_id}")
+        log_debug(logger, "Извлечен admin_user_id", {"admin_user_id": admin_user_id})
     except (ValueError, IndexError) as e:
         log_error(logger, e, f"Неверный формат callback_data для edit_admin: {callback_query.data}")
         await callback_query.answer("❌ Неверный формат данных администратора.", show_alert=True)
         return
 
-    admin = Admin.get_or_none(Admin.user_id == admin_user_id)
+    admin = await db_get_or_none(Admin, Admin.user_id == admin_user_id)
 
     if not admin:
         log_warning(logger, "Администратор не найден для редактирования", {"admin_user_id": admin_user_id})
@@ -170,13 +161,13 @@ async def delete_admin_callback_handler(callback_query: CallbackQuery):
 
     try:
         admin_user_id = int(callback_query.data.split("_")[2])
-        log_debug(logger, f"Извлечен admin_user_id для удаления: {admin_user_id}")
+        log_debug(logger, "Извлечен admin_user_id для удаления", {"admin_user_id": admin_user_id})
     except (ValueError, IndexError) as e:
         log_error(logger, e, f"Неверный формат callback_data для delete_admin: {callback_query.data}")
         await callback_query.answer("❌ Неверный формат данных администратора.", show_alert=True)
         return
 
-    admin = Admin.get_or_none(Admin.user_id == admin_user_id)
+    admin = await db_get_or_none(Admin, Admin.user_id == admin_user_id)
 
     if not admin:
         log_warning(logger, "Администратор не найден для удаления", {"admin_user_id": admin_user_id})
@@ -213,21 +204,22 @@ async def confirm_delete_admin_callback_handler(callback_query: CallbackQuery):
 
     try:
         admin_user_id = int(callback_query.data.split("_")[3])
-        log_debug(logger, f"Извлечен admin_user_id для подтверждения удаления: {admin_user_id}")
+        log_debug(logger, "Извлечен admin_user_id для подтверждения удаления", {"admin_user_id": admin_user_id})
     except (ValueError, IndexError) as e:
         log_error(logger, e, f"Неверный формат callback_data для confirm_delete_admin: {callback_query.data}")
         await callback_query.answer("❌ Неверный формат данных администратора.", show_alert=True)
         return
 
     try:
-        admin = Admin.get_or_none(Admin.user_id == admin_user_id)
+        admin = await db_get_or_none(Admin, Admin.user_id == admin_user_id)
         if not admin:
             log_warning(logger, "Администратор не найден для подтверждения удаления", {"admin_user_id": admin_user_id})
             await callback_query.answer("❌ Администратор не найден.", show_alert=True)
             return
         
         admin_name = admin.user_name
-        admin.delete_instance()
+        await db_delete(admin)
+        unregister_admin(admin_user_id)
         log_info(logger, "Администратор успешно удален", {"admin_user_id": admin_user_id, "admin_name": admin_name})
         
         if callback_query.message:
@@ -260,18 +252,18 @@ async def choose_admin_edit_field_callback_handler(callback_query: CallbackQuery
         return
 
     field_to_edit = callback_query.data.split("_")[3]
-    log_debug(logger, f"Поле для редактирования: {field_to_edit}")
+    log_debug(logger, "Поле для редактирования", {"field": field_to_edit})
 
     current_data = await state.get_data()
     admin_user_id = current_data.get("user_id")
-    log_debug(logger, f"admin_user_id из состояния: {admin_user_id}")
+    log_debug(logger, "admin_user_id из состояния", {"admin_user_id": admin_user_id})
 
     if not admin_user_id:
         log_error(logger, ValueError("ID администратора для редактирования не найден в состоянии."), "admin_user_id is None in state")
         await callback_query.answer("❌ ID администратора для редактирования не найден.", show_alert=True)
         return
 
-    admin = Admin.get_or_none(Admin.user_id == admin_user_id)
+    admin = await db_get_or_none(Admin, Admin.user_id == admin_user_id)
     if not admin:
         log_warning(logger, "Администратор не найден в базе данных для редактирования", {"admin_user_id": admin_user_id})
         await callback_query.answer("❌ Администратор не найден.", show_alert=True)
@@ -303,7 +295,7 @@ async def choose_admin_edit_field_callback_handler(callback_query: CallbackQuery
         log_info(logger, "Установка состояния new_display_name", {"admin_user_id": admin_user_id})
         await message_obj.answer(f"Введите новое отображаемое имя для администратора *{admin.user_name}* (например, 'Иван (Менеджер)'):", parse_mode="Markdown")
     else:
-        log_warning(logger, f"Неизвестное поле для редактирования: {field_to_edit}", {"field": field_to_edit, "user_id": callback_query.from_user.id if callback_query.from_user else None})
+        log_warning(logger, "Неизвестное поле для редактирования", {"field": field_to_edit, "user_id": callback_query.from_user.id if callback_query.from_user else None})
         await callback_query.answer("❌ Неизвестное поле для редактирования.", show_alert=True)
         return
 
@@ -312,7 +304,7 @@ async def choose_admin_edit_field_callback_handler(callback_query: CallbackQuery
 
 @register_admin_router.message(AdminEditState.new_user_name)
 async def process_new_admin_user_name(message: Message, state: FSMContext):
-    log_debug(logger, "Вход в process_new_admin_user_name", {"user_id": message.from_user.id if message.from_user else None, "message_text": message.text[:50] if message.text else ""})
+    log_debug(logger, "Вход в process_new_admin_user_name", {"user_id": message.from_user.id if message.from_user else None})
     if not message.text or len(message.text.strip()) < 2:
         log_warning(logger, "Новое имя пользователя слишком короткое", {"user_id": message.from_user.id if message.from_user else None, "text_len": len(message.text.strip()) if message.text else 0})
         await message.answer("❌ Имя пользователя должно содержать минимум 2 символа. Попробуйте еще раз:", parse_mode="Markdown")
@@ -328,11 +320,11 @@ async def process_new_admin_user_name(message: Message, state: FSMContext):
         return
     
     try:
-        admin = Admin.get_or_none(Admin.user_id == admin_user_id)
+        admin = await db_get_or_none(Admin, Admin.user_id == admin_user_id)
         if admin:
             old_name = admin.user_name
             admin.user_name = message.text.strip()
-            admin.save()
+            await db_save(admin)
             log_info(logger, "Имя администратора обновлено", {"admin_user_id": admin_user_id, "old_name": old_name, "new_name": admin.user_name})
             await message.answer(f"✅ Имя пользователя для *{old_name}* успешно обновлено на *{admin.user_name}*!", parse_mode="Markdown", reply_markup=admins_menu_kb)
         else:
@@ -347,9 +339,9 @@ async def process_new_admin_user_name(message: Message, state: FSMContext):
 
 @register_admin_router.message(AdminEditState.new_phone)
 async def process_new_admin_phone(message: Message, state: FSMContext):
-    log_debug(logger, "Вход в process_new_admin_phone", {"user_id": message.from_user.id if message.from_user else None, "message_text": message.text[:50] if message.text else ""})
+    log_debug(logger, "Вход в process_new_admin_phone", {"user_id": message.from_user.id if message.from_user else None})
     if not message.text or not message.text.strip().isdigit() or len(message.text.strip()) < 5:
-        log_warning(logger, "Новый номер телефона некорректен", {"user_id": message.from_user.id if message.from_user else None, "phone_text": message.text[:50] if message.text else ""})
+        log_warning(logger, "Новый номер телефона некорректен", {"user_id": message.from_user.id if message.from_user else None})
         await message.answer("❌ Номер телефона должен содержать только цифры и быть не менее 5 символов. Попробуйте еще раз:", parse_mode="Markdown")
         return
     
@@ -363,12 +355,11 @@ async def process_new_admin_phone(message: Message, state: FSMContext):
         return
     
     try:
-        admin = Admin.get_or_none(Admin.user_id == admin_user_id)
+        admin = await db_get_or_none(Admin, Admin.user_id == admin_user_id)
         if admin:
-            old_phone = admin.phone
             admin.phone = message.text.strip()
-            admin.save()
-            log_info(logger, "Телефон администратора обновлен", {"admin_user_id": admin_user_id, "old_phone": old_phone, "new_phone": admin.phone})
+            await db_save(admin)
+            log_info(logger, "Телефон администратора обновлен", {"admin_user_id": admin_user_id})
             await message.answer(f"✅ Телефон для *{admin.user_name}* успешно обновлен на *{admin.phone}*!", parse_mode="Markdown", reply_markup=admins_menu_kb)
         else:
             log_warning(logger, "Администратор не найден для обновления телефона", {"admin_user_id": admin_user_id})
@@ -382,7 +373,7 @@ async def process_new_admin_phone(message: Message, state: FSMContext):
 
 @register_admin_router.message(AdminEditState.new_role)
 async def process_new_admin_role(message: Message, state: FSMContext):
-    log_debug(logger, "Вход в process_new_admin_role", {"user_id": message.from_user.id if message.from_user else None, "message_text": message.text[:50] if message.text else ""})
+    log_debug(logger, "Вход в process_new_admin_role", {"user_id": message.from_user.id if message.from_user else None})
     if not message.text or len(message.text.strip()) < 2:
         log_warning(logger, "Новая роль слишком короткая", {"user_id": message.from_user.id if message.from_user else None, "text_len": len(message.text.strip()) if message.text else 0})
         await message.answer("❌ Роль должна содержать минимум 2 символа. Попробуйте еще раз:", parse_mode="Markdown")
@@ -398,11 +389,12 @@ async def process_new_admin_role(message: Message, state: FSMContext):
         return
 
     try:
-        admin = Admin.get_or_none(Admin.user_id == admin_user_id)
+        admin = await db_get_or_none(Admin, Admin.user_id == admin_user_id)
         if admin:
             old_role = admin.role
             admin.role = message.text.strip()
-            admin.save()
+            await db_save(admin)
+            register_admin(admin.user_id, admin.role)
             log_info(logger, "Роль администратора обновлена", {"admin_user_id": admin_user_id, "old_role": old_role, "new_role": admin.role})
             await message.answer(f"✅ Роль для *{admin.user_name}* успешно обновлена на *{admin.role}*!", parse_mode="Markdown", reply_markup=admins_menu_kb)
         else:
@@ -417,7 +409,7 @@ async def process_new_admin_role(message: Message, state: FSMContext):
 
 @register_admin_router.message(AdminEditState.new_display_name)
 async def process_new_admin_display_name(message: Message, state: FSMContext):
-    log_debug(logger, "Вход в process_new_admin_display_name", {"user_id": message.from_user.id if message.from_user else None, "message_text": message.text[:50] if message.text else ""})
+    log_debug(logger, "Вход в process_new_admin_display_name", {"user_id": message.from_user.id if message.from_user else None})
     if not message.text or len(message.text.strip()) < 2:
         log_warning(logger, "Новое отображаемое имя слишком короткое", {"user_id": message.from_user.id if message.from_user else None, "text_len": len(message.text.strip()) if message.text else 0})
         await message.answer("❌ Отображаемое имя должно содержать минимум 2 символа. Попробуйте еще раз:", parse_mode="Markdown")
@@ -433,11 +425,11 @@ async def process_new_admin_display_name(message: Message, state: FSMContext):
         return
 
     try:
-        admin = Admin.get_or_none(Admin.user_id == admin_user_id)
+        admin = await db_get_or_none(Admin, Admin.user_id == admin_user_id)
         if admin:
             old_display_name = admin.display_name
             admin.display_name = message.text.strip()
-            admin.save()
+            await db_save(admin)
             log_info(logger, "Отображаемое имя администратора обновлено", {"admin_user_id": admin_user_id, "old_display_name": old_display_name, "new_display_name": admin.display_name})
             await message.answer(f"✅ Отображаемое имя для *{admin.user_name}* успешно обновлено на *{admin.display_name}*!", parse_mode="Markdown", reply_markup=admins_menu_kb)
         else:
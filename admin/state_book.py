@@ -8,6 +8,9 @@ class BookState(StatesGroup):
     quantity = State()
     photo = State()
 
+class CatalogImportState(StatesGroup):
+    file = State()
+
 class OrderState(StatesGroup):
     telegram_id = State()
     fio = State()
@@ -1,30 +1,38 @@
-from aiogram import Router, F
-from aiogram.types import Message, ReplyKeyboardRemove, InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery
-from aiogram.filters import Command
-from data.models import Books, Order, Greeting, Admin, OrderStatus
+import asyncio
+import os
+import tempfile
+from aiogram import Bot, Router, F
+from aiogram.types import Message, ReplyKeyboardRemove, InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery, Document, FSInputFile
+from aiogram.filters import Command, CommandObject
+from aiogram.exceptions import TelegramBadRequest
+from data.models import Books, Order, Greeting, OrderStatus
+from peewee import JOIN
 from config.keyboards import commands, books_menu_kb, orders_menu_kb, texts_menu_kb, admins_menu_kb, greetings_kb # Обновил импорты клавиатур
 from config.static import HELP_TEXT
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from admin.state_book import BookState, OrderAdminState, BookEditState # Добавляем импорт BookEditState
+from admin.state_book import BookState, OrderAdminState, BookEditState, CatalogImportState # Добавляем импорт BookEditState
 from typing import cast # Добавляем импорт cast
 from config.logger_config import setup_logger, log_debug, log_info, log_error
-
-admin_router = Router()
+from data.db_executor import run_db, run_db_read, db_get_or_none, db_fetch_all, db_first, db_create, db_save, db_delete
+from admin.admin_registry import is_admin_filter
+from admin.order_list import fetch_orders_view, parse_orders_callback, render_order, render_orders_page, orders_page_keyboard, status_label
+from admin.order_queue import (get_status_counts, invalidate_status_counts, claim_next_order, render_queue,
+                               new_orders_count, queue_keyboard, claimed_order_keyboard)
+from config.catalog_search import notify_catalog_changed
+from admin.catalog_import import CatalogImportError, ImportStats, MAX_FILE_SIZE, file_format, import_catalog
+from admin.order_export import (OrderExportError, ExportFilter, MAX_UPLOAD_SIZE, WRITERS, period_filter, parse_export_args,
+                                export_orders, export_file_name, describe_export)
+from config.metrics import render_summary
+from config.gallery import GalleryPage, fetch_books_page, card_keyboard, parse_page_callback, send_book_card, edit_book_card
+
+admin_router = Router(name="admin_router")
 
 logger = setup_logger('admin_state_book_handlers')
 
-async def is_admin_filter(message: Message) -> bool:
-    if not message.from_user:
-        log_debug(logger, "is_admin_filter: Отсутствует информация о пользователе.", {})
-        return False
-    
-    user_id = message.from_user.id
-    is_admin = Admin.get_or_none(Admin.user_id == user_id) is not None
-    log_debug(logger, f"is_admin_filter: Проверка пользователя {user_id}. Результат: {is_admin}", {"user_id": user_id, "is_admin": is_admin})
-    return is_admin
-
 admin_router.message.filter(is_admin_filter)
+# callback_data приходит от клиента и может быть подделана: кнопки админки проверяются так же, как сообщения
+admin_router.callback_query.filter(is_admin_filter)
 
 @admin_router.message(Command("start"))
 async def start(message: Message):
@@ -46,6 +54,10 @@ async def help_command(message: Message):
     except Exception as e:
         log_error(logger, e, "Ошибка в help_command")
 
+@admin_router.message(Command("stats"))
+async def stats_command(message: Message):
+    await message.answer(render_summary())
+
 # Новые обработчики для навигации по меню
 @admin_router.message(F.text == "📚 Управление книгами")
 async def manage_books(message: Message):
@@ -86,32 +98,44 @@ async def cmd_cancel(message: Message, state: FSMContext):
         reply_markup=commands
     )
 
+def admin_book_keyboard(page: GalleryPage) -> InlineKeyboardMarkup:
+    book = page.books[0]
+    return card_keyboard(page, "admin_books", [
+        [InlineKeyboardButton(text="✏️ Изменить книгу", callback_data=f"edit_book_{book.id}"),
+         InlineKeyboardButton(text="🗑 Удалить книгу", callback_data=f"delete_book_{book.id}")]
+    ])
+
 @admin_router.message(F.text == "📚 Показать книги")
 async def show_books_with_inline_buttons(message: Message):
-    books = Books.select()
-    if not books:
+    page = await run_db_read(fetch_books_page)
+    if not page.books:
         await message.answer("📚 В базе данных пока нет книг.", reply_markup=books_menu_kb)
         return
-        
-    for book in books:
-        if book.photo:
-            await message.answer_photo(book.photo)
-        keyboard = InlineKeyboardMarkup(inline_keyboard=[
-            [InlineKeyboardButton(text="✏️ Изменить книгу", callback_data=f"edit_book_{book.id}"),
-             InlineKeyboardButton(text="🗑 Удалить книгу", callback_data=f"delete_book_{book.id}")]
-        ])
-        
-        await message.answer(
-            f"📚 *{book.name}*\n"
-            f"✍️ Автор: {book.author}\n"
-            f"💰 Цена: {book.price} руб.\n"
-            f"📦 В наличии: {book.quantity} шт.\n"
-            f"📝 Описание: {book.description}",
-            parse_mode="Markdown",
-            reply_markup=keyboard
-        )
+
+    await send_book_card(message, page.books[0], admin_book_keyboard(page))
     await message.answer("📚 Выберите действие:", reply_markup=books_menu_kb)
 
+@admin_router.callback_query(F.data.startswith("admin_books_next_") | F.data.startswith("admin_books_prev_"))
+async def admin_books_page(callback_query: CallbackQuery):
+    await callback_query.answer()
+    if not callback_query.data or not callback_query.message:
+        return
+
+    parsed = parse_page_callback(callback_query.data)
+    if not parsed:
+        return
+    direction, book_id = parsed
+
+    try:
+        if direction == "next":
+            page = await run_db_read(fetch_books_page, after_id=book_id)
+        else:
+            page = await run_db_read(fetch_books_page, before_id=book_id)
+        if page.books:
+            await edit_book_card(cast(Message, callback_query.message), page.books[0], admin_book_keyboard(page))
+    except Exception as e:
+        log_error(logger, e, "Ошибка при листании списка книг")
+
 @admin_router.message(F.text == "➕ Добавить книгу")
 async def add_book(message: Message, state: FSMContext):
     await state.set_state(BookState.name)
@@ -191,7 +215,8 @@ async def process_book_quantity(message: Message, state: FSMContext):
     data = await state.get_data()
     
     try:
-        book = Books.create(
+        book = await db_create(
+            Books,
             name=data["name"],
             author=data["author"],
             price=data["price"],
@@ -199,6 +224,7 @@ async def process_book_quantity(message: Message, state: FSMContext):
             photo=data["photo"],
             quantity=data["quantity"]
         )
+        notify_catalog_changed()
         await message.answer(
             "✅ Книга успешно добавлена в базу данных!\n\n"
             "📚 Чтобы добавить еще одну книгу, нажмите '➕ Добавить книгу'\n"
@@ -212,38 +238,167 @@ async def process_book_quantity(message: Message, state: FSMContext):
 
 @admin_router.message(F.text == "📋 Все заказы")
 async def view_orders(message: Message):
-    orders = Order.select().order_by(Order.id.desc())
-    if not orders:
-        await message.answer("📦 В базе данных пока нет заказов.", reply_markup=orders_menu_kb)
-        return
-    
-    for order in orders:
-        book_info_str = order.book_info if order.book_info else "Информация о книге недоступна"
-        status = order.status
-        
-        # Создаем инлайн-клавиатуру для каждого заказа
-        keyboard = InlineKeyboardMarkup(inline_keyboard=[
-            [InlineKeyboardButton(text="🔄 Изменить статус", callback_data=f"change_status_{order.id}"),
-             InlineKeyboardButton(text="🗑️ Удалить заказ", callback_data=f"delete_order_{order.id}")]
-        ])
-        
+    try:
+        page, statuses = await run_db_read(fetch_orders_view)
+        if not page.orders:
+            await message.answer("📦 В базе данных пока нет заказов.", reply_markup=orders_menu_kb)
+            return
+
         await message.answer(
-            f"📦 *Заказ №{order.id}*\n"
-            f"👤 ФИО: {order.fio}\n"
-            f"🏠 Адрес: {order.addres}\n"
-            f"📞 Телефон: {order.phone}\n"
-            f"📚 Книга: {book_info_str}\n"
-            f"📊 Статус: {status.emoji} {status.description}\n"
-            f"📅 Создан: {order.created_at.strftime('%d.%m.%Y %H:%M')}\n"
-            f"🔄 Обновлен: {order.updated_at.strftime('%d.%m.%Y %H:%M')}",
-            parse_mode="Markdown",
-            reply_markup=keyboard
+            render_orders_page(page, statuses, 0, 0),
+            parse_mode="HTML",
+            reply_markup=orders_page_keyboard(page, statuses, 0, 0)
         )
-    await message.answer("📦 Выберите действие с заказами:", reply_markup=orders_menu_kb)
+    except Exception as e:
+        log_error(logger, e, "Ошибка при показе списка заказов")
+        await message.answer("❌ Не удалось загрузить список заказов.", reply_markup=orders_menu_kb)
+
+@admin_router.callback_query(F.data.startswith("ord_"))
+async def orders_page_callback(callback_query: CallbackQuery):
+    await callback_query.answer()
+    if not callback_query.data or not callback_query.message:
+        return
+
+    parsed = parse_orders_callback(callback_query.data)
+    if not parsed:
+        log_debug(logger, "Неверный формат callback_data списка заказов", {"callback_data": callback_query.data})
+        return
+    action, status_id, period, cursor_id = parsed
+
+    try:
+        page, statuses = await run_db_read(
+            fetch_orders_view,
+            status_id,
+            period,
+            after_id=cursor_id if action == "next" else None,
+            before_id=cursor_id if action == "prev" else None
+        )
+        message_obj = cast(Message, callback_query.message)
+        await message_obj.edit_text(
+            render_orders_page(page, statuses, status_id, period),
+            parse_mode="HTML",
+            reply_markup=orders_page_keyboard(page, statuses, status_id, period)
+        )
+    except TelegramBadRequest as e:
+        if "message is not modified" not in str(e):
+            log_error(logger, e, "Ошибка при обновлении списка заказов")
+    except Exception as e:
+        log_error(logger, e, "Ошибка при листании списка заказов")
+
+EXPORT_HELP = (
+    "📤 Выгрузка заказов в файл: /export [csv|xlsx] [ДД.ММ.ГГГГ [ДД.ММ.ГГГГ]] [статус]\n\n"
+    "Например: /export xlsx 01.09.2026 30.09.2026 delivered - доставленные за сентябрь в Excel.\n"
+    "Без дат - за все время, без статуса - все статусы, без формата - CSV.\n"
+    "Статусы: {statuses}\n\n"
+    "Выгрузить текущую выборку можно и кнопками 📤 под списком \"📋 Все заказы\"."
+)
+
+# Выгрузка держит соединение из пула чтения, пока пишется файл: одновременно идет только одна
+export_lock = asyncio.Lock()
+
+async def send_orders_export(message: Message, export_format: str, export_filter: ExportFilter) -> None:
+    """Пишет заказы в файл вне event loop и отправляет его одним документом"""
+    status = await message.answer("⏳ Готовлю выгрузку заказов...")
+    handle, path = tempfile.mkstemp(suffix=f".{export_format}")
+    os.close(handle)
+    try:
+        async with export_lock:
+            count = await run_db_read(export_orders, path, export_format, export_filter)
+        if os.path.getsize(path) > MAX_UPLOAD_SIZE:
+            raise OrderExportError(f"Файл больше {MAX_UPLOAD_SIZE // 1024 // 1024} МБ - выберите меньший период или один статус")
+        statuses = await db_fetch_all(OrderStatus.select().order_by(OrderStatus.id))
+        await message.answer_document(
+            FSInputFile(path, filename=export_file_name(export_format, export_filter)),
+            caption=describe_export(export_filter, statuses, count),
+            reply_markup=orders_menu_kb
+        )
+        await status.delete()
+    except OrderExportError as e:
+        await status.edit_text(f"❌ {e}")
+    except Exception as e:
+        log_error(logger, e, "Ошибка при выгрузке заказов")
+        await status.edit_text("❌ Не удалось выгрузить заказы.")
+    finally:
+        os.remove(path)
+
+@admin_router.message(F.text == "📤 Выгрузить заказы")
+async def export_orders_help(message: Message):
+    statuses = await db_fetch_all(OrderStatus.select().order_by(OrderStatus.id))
+    names = ", ".join(f"{status.name} ({status.description})" for status in statuses)
+    await message.answer(EXPORT_HELP.format(statuses=names), reply_markup=orders_menu_kb)
+
+@admin_router.message(Command("export"))
+async def export_orders_command(message: Message, command: CommandObject):
+    statuses = await db_fetch_all(OrderStatus.select().order_by(OrderStatus.id))
+    try:
+        export_format, export_filter = parse_export_args(command.args, statuses)
+    except OrderExportError as e:
+        await message.answer(f"❌ {e}\n\nНапример: /export xlsx 01.09.2026 30.09.2026 delivered", reply_markup=orders_menu_kb)
+        return
+    await send_orders_export(message, export_format, export_filter)
+
+@admin_router.callback_query(F.data.startswith("exp_"))
+async def export_orders_callback(callback_query: CallbackQuery):
+    await callback_query.answer()
+    if not callback_query.data or not callback_query.message:
+        return
+    # exp_{статус}_{период}_{формат} - та же выборка, что в списке заказов
+    parts = callback_query.data.split("_")
+    if len(parts) != 4 or parts[3] not in WRITERS or not parts[1].isdigit() or not parts[2].isdigit():
+        log_debug(logger, "Неверный формат callback_data выгрузки заказов", {"callback_data": callback_query.data})
+        return
+    message_obj = cast(Message, callback_query.message)
+    await send_orders_export(message_obj, parts[3], period_filter(int(parts[1]), int(parts[2])))
+
+async def _queue_view():
+    counts = await get_status_counts()
+    statuses = await db_fetch_all(OrderStatus.select().order_by(OrderStatus.id))
+    return render_queue(counts, statuses), queue_keyboard(new_orders_count(counts, statuses) > 0)
 
 @admin_router.message(F.text == "🆕 Новые заказы")
 async def view_new_orders(message: Message):
-    await message.answer("Эта функция находится в разработке.", reply_markup=orders_menu_kb)
+    try:
+        text, keyboard = await _queue_view()
+        await message.answer(text, parse_mode="HTML", reply_markup=keyboard)
+    except Exception as e:
+        log_error(logger, e, "Ошибка при показе очереди заказов")
+        await message.answer("❌ Не удалось загрузить очередь заказов.", reply_markup=orders_menu_kb)
+
+@admin_router.callback_query(F.data == "queue_refresh")
+async def refresh_new_orders(callback_query: CallbackQuery):
+    await callback_query.answer()
+    if not callback_query.message:
+        return
+    try:
+        text, keyboard = await _queue_view()
+        message_obj = cast(Message, callback_query.message)
+        await message_obj.edit_text(text, parse_mode="HTML", reply_markup=keyboard)
+    except TelegramBadRequest as e:
+        if "message is not modified" not in str(e):
+            log_error(logger, e, "Ошибка при обновлении очереди заказов")
+
+@admin_router.callback_query(F.data == "queue_claim")
+async def claim_new_order(callback_query: CallbackQuery):
+    order = await run_db(claim_next_order)
+    if not order:
+        await callback_query.answer("✅ Новых заказов нет.", show_alert=True)
+        return
+    await callback_query.answer(f"Заказ №{order.id} взят в работу")
+    log_info(logger, "Администратор взял заказ", {"admin_id": callback_query.from_user.id, "order_id": order.id})
+
+    if callback_query.message:
+        message_obj = cast(Message, callback_query.message)
+        await message_obj.answer(render_order(order), parse_mode="HTML", reply_markup=claimed_order_keyboard(order))
+
+    if callback_query.bot:
+        try:
+            await callback_query.bot.send_message(
+                order.telegram_id,
+                f"🔔 *Обновление статуса заказа №{order.id}*\n\n{order.status.emoji} {order.status.client_message}",
+                parse_mode="Markdown"
+            )
+        except Exception as e:
+            log_error(logger, e, f"Не удалось уведомить пользователя {order.telegram_id} о заказе №{order.id}")
 
 # Новый обработчик для выбора заказа через инлайн-кнопку
 @admin_router.callback_query(F.data.startswith("change_status_"))
@@ -255,13 +410,13 @@ async def select_order_for_status_change(callback_query: CallbackQuery):
     # Явно приводим data к строке после проверки на None
     data_string: str = callback_query.data
     order_id = int(data_string.split("_")[2])
-    order = Order.get_or_none(Order.id == order_id)
+    order = await db_first(Order.select(Order, OrderStatus).join(OrderStatus, JOIN.LEFT_OUTER).where(Order.id == order_id))
     
     if not order:
         await callback_query.answer("❌ Заказ не найден.", show_alert=True)
         return
     
-    statuses = OrderStatus.select()
+    statuses = await db_fetch_all(OrderStatus.select())
     status_buttons = []
     for status in statuses:
         status_buttons.append(InlineKeyboardButton(text=f"{status.emoji} {status.description}", callback_data=f"set_status_{status.id}_{order_id}"))
@@ -271,7 +426,7 @@ async def select_order_for_status_change(callback_query: CallbackQuery):
     if callback_query.message:
         message_obj = cast(Message, callback_query.message) # Явное приведение к типу Message
         await message_obj.answer(
-            f"📊 Текущий статус заказа №{order_id}: {order.status.emoji} {order.status.description}\n\n"
+            f"📊 Текущий статус заказа №{order_id}: {status_label(order.status)}\n\n"
             "Выберите новый статус:",
             reply_markup=keyboard
         )
@@ -288,16 +443,17 @@ async def set_order_status(callback_query: CallbackQuery):
         return
 
     data_string: str = callback_query.data
+    # set_status_<id статуса>_<id заказа>
     parts = data_string.split("_")
-    if len(parts) < 3:
+    if len(parts) < 4:
         await callback_query.answer("❌ Некорректный формат данных коллбэка.", show_alert=True)
         return
 
-    new_status_id = int(parts[1])
-    order_id = int(parts[2])
+    new_status_id = int(parts[2])
+    order_id = int(parts[3])
     
-    order = Order.get_or_none(Order.id == order_id)
-    new_status = OrderStatus.get_or_none(id=new_status_id)
+    order = await db_first(Order.select(Order, OrderStatus).join(OrderStatus, JOIN.LEFT_OUTER).where(Order.id == order_id))
+    new_status = await db_get_or_none(OrderStatus, id=new_status_id)
     
     if not order or not new_status:
         await callback_query.answer("❌ Ошибка: заказ или статус не найден.", show_alert=True)
@@ -306,11 +462,12 @@ async def set_order_status(callback_query: CallbackQuery):
     try:
         old_status = order.status
         order.status = new_status
-        order.save()
+        await db_save(order)
+        invalidate_status_counts()
         
         status_message = (
             f"✅ Статус заказа №{order_id} изменен:\n"
-            f"С {old_status.emoji} {old_status.description}\n"
+            f"С {status_label(old_status)}\n"
             f"На {new_status.emoji} {new_status.description}"
         )
         
@@ -369,7 +526,7 @@ async def edit_book_callback_handler(callback_query: CallbackQuery, state: FSMCo
         return
 
     book_id = int(callback_query.data.split("_")[2])
-    book = Books.get_or_none(Books.id == book_id)
+    book = await db_get_or_none(Books, Books.id == book_id)
 
     if not book:
         await callback_query.answer("❌ Книга не найдена.", show_alert=True)
@@ -407,7 +564,7 @@ async def delete_book_callback_handler(callback_query: CallbackQuery, state: FSM
         return
 
     book_id = int(callback_query.data.split("_")[2])
-    book = Books.get_or_none(Books.id == book_id)
+    book = await db_get_or_none(Books, Books.id == book_id)
 
     if not book:
         await callback_query.answer("❌ Книга не найдена.", show_alert=True)
@@ -438,13 +595,14 @@ async def confirm_delete_book_callback_handler(callback_query: CallbackQuery):
     book_id = int(callback_query.data.split("_")[3])
 
     try:
-        book = Books.get_or_none(Books.id == book_id)
+        book = await db_get_or_none(Books, Books.id == book_id)
         if not book:
             await callback_query.answer("❌ Книга не найдена.", show_alert=True)
             return
         
         book_name = book.name
-        book.delete_instance()
+        await db_delete(book)
+        notify_catalog_changed()
         
         if callback_query.message:
             message_obj = cast(Message, callback_query.message)
@@ -452,7 +610,7 @@ async def confirm_delete_book_callback_handler(callback_query: CallbackQuery):
         await callback_query.answer(f"✅ Книга {book_name} успешно удалена.")
 
     except Exception as e:
-        print(f"DEBUG: Error in confirm_delete_book_callback_handler: {e}")
+        log_error(logger, e, "Ошибка при удалении книги")
         await callback_query.answer(f"❌ Произошла ошибка при удалении книги: {str(e)}", show_alert=True)
 
 @admin_router.callback_query(F.data == "cancel_delete_book")
@@ -485,7 +643,7 @@ async def choose_edit_field_callback_handler(callback_query: CallbackQuery, stat
         await callback_query.answer("❌ ID книги для редактирования не найден.", show_alert=True)
         return
 
-    book = Books.get_or_none(Books.id == book_id)
+    book = await db_get_or_none(Books, Books.id == book_id)
     if not book:
         await callback_query.answer("❌ Книга не найдена.", show_alert=True)
         await state.clear()
@@ -535,6 +693,62 @@ async def cancel_action(message: Message, state: FSMContext):
         reply_markup=books_menu_kb # Возвращаемся в меню книг
     )
 
+IMPORT_HELP = (
+    "📥 Отправьте файл каталога документом: CSV, JSON (массив или JSON Lines) или XLSX, до 20 МБ.\n\n"
+    "Столбцы: name, author, price, description, photo, quantity "
+    "(или Название, Автор, Цена, Описание, Фото, Количество). "
+    "В photo - file_id фото в Telegram или имя файла в папке с фото.\n"
+    "Необязательный столбец id: книга с этим id обновляется, строка без id добавляет новую книгу.\n\n"
+    "/cancel - отмена."
+)
+
+@admin_router.message(F.text == "📥 Импорт книг")
+@admin_router.message(Command("import"))
+async def import_books_start(message: Message, state: FSMContext):
+    await state.set_state(CatalogImportState.file)
+    await message.answer(IMPORT_HELP, reply_markup=books_menu_kb)
+
+async def edit_import_status(status: Message, text: str) -> None:
+    try:
+        await status.edit_text(text)
+    except TelegramBadRequest as e:
+        # Прогресс не изменился с прошлой правки
+        if "message is not modified" not in str(e):
+            raise
+
+@admin_router.message(CatalogImportState.file, F.document)
+async def import_books_file(message: Message, state: FSMContext, bot: Bot):
+    document = cast(Document, message.document)
+    import_format = file_format(document.file_name)
+    if import_format is None:
+        await message.answer("❌ Поддерживаются файлы .csv, .json, .jsonl и .xlsx. Отправьте другой файл или /cancel", reply_markup=books_menu_kb)
+        return
+    if document.file_size and document.file_size > MAX_FILE_SIZE:
+        await message.answer("❌ Файл больше 20 МБ: Telegram не отдает боту такие файлы. Разделите его на части.", reply_markup=books_menu_kb)
+        return
+    await state.clear()
+
+    # Один статус на весь импорт: прогресс правит это сообщение, а не шлет новые
+    status = await message.answer("⏳ Загружаю файл...")
+    stats = ImportStats()
+    handle, path = tempfile.mkstemp(suffix=f".{import_format}")
+    os.close(handle)
+    try:
+        await bot.download(document, destination=path)
+        await import_catalog(path, import_format, lambda progress: edit_import_status(status, progress.render()), stats)
+        await edit_import_status(status, stats.render("✅ Импорт завершен"))
+    except CatalogImportError as e:
+        await edit_import_status(status, stats.render(f"❌ Импорт остановлен: {e}"))
+    except Exception as e:
+        log_error(logger, e, "Ошибка при импорте каталога")
+        await edit_import_status(status, stats.render(f"❌ Ошибка при импорте каталога: {e}"))
+    finally:
+        os.remove(path)
+
+@admin_router.message(CatalogImportState.file)
+async def import_books_expect_file(message: Message):
+    await message.answer("📎 Отправьте файл каталога документом (CSV, JSON или XLSX) или /cancel.", reply_markup=books_menu_kb)
+
 # Обработчики для обновления данных книги
 @admin_router.message(BookEditState.new_name)
 async def process_new_book_name(message: Message, state: FSMContext):
@@ -544,7 +758,7 @@ async def process_new_book_name(message: Message, state: FSMContext):
     
     data = await state.get_data()
     book_id = data.get("book_id")
-    book = Books.get_or_none(Books.id == book_id)
+    book = await db_get_or_none(Books, Books.id == book_id)
 
     if not book:
         await message.answer("❌ Книга не найдена. Пожалуйста, начните редактирование заново.")
@@ -553,7 +767,8 @@ async def process_new_book_name(message: Message, state: FSMContext):
 
     try:
         book.name = message.text.strip()
-        book.save()
+        await db_save(book)
+        notify_catalog_changed()
         await message.answer(f"✅ Название книги *{book.name}* успешно обновлено!")
     except Exception as e:
         await message.answer(f"❌ Произошла ошибка при обновлении названия: {str(e)}")
@@ -568,7 +783,7 @@ async def process_new_book_author(message: Message, state: FSMContext):
     
     data = await state.get_data()
     book_id = data.get("book_id")
-    book = Books.get_or_none(Books.id == book_id)
+    book = await db_get_or_none(Books, Books.id == book_id)
 
     if not book:
         await message.answer("❌ Книга не найдена. Пожалуйста, начните редактирование заново.")
@@ -577,7 +792,8 @@ async def process_new_book_author(message: Message, state: FSMContext):
 
     try:
         book.author = message.text.strip()
-        book.save()
+        await db_save(book)
+        notify_catalog_changed()
         await message.answer(f"✅ Автор книги *{book.name}* успешно обновлен!")
     except Exception as e:
         await message.answer(f"❌ Произошла ошибка при обновлении автора: {str(e)}")
@@ -592,7 +808,7 @@ async def process_new_book_description(message: Message, state: FSMContext):
     
     data = await state.get_data()
     book_id = data.get("book_id")
-    book = Books.get_or_none(Books.id == book_id)
+    book = await db_get_or_none(Books, Books.id == book_id)
 
     if not book:
         await message.answer("❌ Книга не найдена. Пожалуйста, начните редактирование заново.")
@@ -601,7 +817,8 @@ async def process_new_book_description(message: Message, state: FSMContext):
 
     try:
         book.description = message.text.strip()
-        book.save()
+        await db_save(book)
+        notify_catalog_changed()
         await message.answer(f"✅ Описание книги *{book.name}* успешно обновлено!")
     except Exception as e:
         await message.answer(f"❌ Произошла ошибка при обновлении описания: {str(e)}")
@@ -623,7 +840,7 @@ async def process_new_book_price(message: Message, state: FSMContext):
     
     data = await state.get_data()
     book_id = data.get("book_id")
-    book = Books.get_or_none(Books.id == book_id)
+    book = await db_get_or_none(Books, Books.id == book_id)
 
     if not book:
         await message.answer("❌ Книга не найдена. Пожалуйста, начните редактирование заново.")
@@ -632,7 +849,8 @@ async def process_new_book_price(message: Message, state: FSMContext):
 
     try:
         book.price = price
-        book.save()
+        await db_save(book)
+        notify_catalog_changed()
         await message.answer(f"✅ Цена книги *{book.name}* успешно обновлена!")
     except Exception as e:
         await message.answer(f"❌ Произошла ошибка при обновлении цены: {str(e)}")
@@ -654,7 +872,7 @@ async def process_new_book_quantity(message: Message, state: FSMContext):
     
     data = await state.get_data()
     book_id = data.get("book_id")
-    book = Books.get_or_none(Books.id == book_id)
+    book = await db_get_or_none(Books, Books.id == book_id)
 
     if not book:
         await message.answer("❌ Книга не найдена. Пожалуйста, начните редактирование заново.")
@@ -663,7 +881,8 @@ async def process_new_book_quantity(message: Message, state: FSMContext):
 
     try:
         book.quantity = quantity
-        book.save()
+        await db_save(book)
+        notify_catalog_changed()
         await message.answer(f"✅ Количество книг *{book.name}* успешно обновлено!")
     except Exception as e:
         await message.answer(f"❌ Произошла ошибка при обновлении количества: {str(e)}")
@@ -678,7 +897,7 @@ async def process_new_book_photo(message: Message, state: FSMContext):
     
     data = await state.get_data()
     book_id = data.get("book_id")
-    book = Books.get_or_none(Books.id == book_id)
+    book = await db_get_or_none(Books, Books.id == book_id)
 
     if not book:
         await message.answer("❌ Книга не найдена. Пожалуйста, начните редактирование заново.")
@@ -687,7 +906,8 @@ async def process_new_book_photo(message: Message, state: FSMContext):
 
     try:
         book.photo = message.photo[-1].file_id
-        book.save()
+        await db_save(book)
+        notify_catalog_changed()
         await message.answer(f"✅ Фото книги *{book.name}* успешно обновлено!")
     except Exception as e:
         await message.answer(f"❌ Произошла ошибка при обновлении фото: {str(e)}")
@@ -702,7 +922,7 @@ async def delete_order_callback_handler(callback_query: CallbackQuery):
         return
 
     order_id = int(callback_query.data.split("_")[2])
-    order = Order.get_or_none(Order.id == order_id)
+    order = await db_get_or_none(Order, Order.id == order_id)
 
     if not order:
         await callback_query.answer("❌ Заказ не найден.", show_alert=True)
@@ -733,12 +953,13 @@ async def confirm_delete_order_callback_handler(callback_query: CallbackQuery):
     order_id = int(callback_query.data.split("_")[3])
 
     try:
-        order = Order.get_or_none(Order.id == order_id)
+        order = await db_get_or_none(Order, Order.id == order_id)
         if not order:
             await callback_query.answer("❌ Заказ не найден.", show_alert=True)
             return
         
-        order.delete_instance()
+        await db_delete(order)
+        invalidate_status_counts()
         
         if callback_query.message:
             message_obj = cast(Message, callback_query.message)
@@ -746,7 +967,7 @@ async def confirm_delete_order_callback_handler(callback_query: CallbackQuery):
         await callback_query.answer(f"✅ Заказ №{order_id} успешно удален.")
 
     except Exception as e:
-        print(f"DEBUG: Error in confirm_delete_order_callback_handler: {e}")
+        log_error(logger, e, "Ошибка при удалении заказа")
         await callback_query.answer(f"❌ Произошла ошибка при удалении заказа: {str(e)}", show_alert=True)
 
 @admin_router.callback_query(F.data == "cancel_delete_order")
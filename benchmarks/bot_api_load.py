@@ -0,0 +1,143 @@
+"""Нагрузочный тест бота против локального Bot API: polling или webhook и исходящие с лимитами
+
+Запускает в этом процессе FakeBotApi и бота из main.py, направленного на него через
+TELEGRAM_API_URL. В Bot API кладутся --updates команд /start от разных пользователей,
+каждая дает ровно один sendMessage. Бот забирает их через getUpdates (polling) или
+получает на свой сервер webhook. Время считается от первого обновления до последнего
+успешного sendMessage, задержка - от появления обновления до ответа пользователю.
+
+Очередь исходящих работает как в боте: при лимите SEND_GLOBAL_RATE 30/с скорость упирается
+в него, --send-rate поднимает лимит. Задержка Bot API, ответы 429 и 500 задаются как у
+benchmarks.fake_bot_api; отказы повторяет очередь исходящих.
+
+Запуск: python -m benchmarks.bot_api_load --mode polling --updates 2000 --send-rate 1000 --latency 0.05 --retry-after-rate 0.01 --error-rate 0.01
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# main.py требует токен при импорте; лог бенчмарка пишется в файл, но не в лог бота и не в консоль
+os.environ.setdefault('TOKEN', '123456:benchmark')
+os.environ.setdefault('LOG_FILE', os.path.join(tempfile.gettempdir(), 'bot_api_load.log'))
+os.environ.setdefault('LOG_CONSOLE', 'false')
+
+from aiohttp import web
+
+from benchmarks.fake_bot_api import FakeBotApi
+from benchmarks.inline_lookup import percentile
+from config import settings
+from data.models import db
+
+async def measure(args: argparse.Namespace) -> None:
+    # Бот и очередь исходящих создаются при импорте main по текущим настройкам
+    settings.TELEGRAM_API_URL = f'http://127.0.0.1:{args.api_port}'
+    settings.SEND_GLOBAL_RATE = args.send_rate
+    import main as bot_main
+    from admin.admin_registry import load_admins
+    from config.send_limiter import outbound_limiter
+    from config.webhook import build_webhook_app
+    from data.db_executor import install_loop_guard, run_db, run_db_read, shutdown_db_executor, start_db_executor
+
+    fake = FakeBotApi(args.latency, args.jitter, args.retry_after_rate, args.retry_after, args.error_rate, seed=1)
+    api_runner = await fake.start(port=args.api_port)
+    start_db_executor()
+    await run_db(bot_main.initialize_database_and_data)
+    await run_db_read(load_admins)
+    install_loop_guard()
+
+    # Пользователь -> момент появления его /start; ответ приходит в чат пользователя
+    pending: Dict[int, float] = {}
+    latencies: List[float] = []
+    answered = asyncio.Event()
+
+    def on_call(name: str, params: Dict[str, str]) -> None:
+        if name != 'sendmessage':
+            return
+        started = pending.pop(int(params['chat_id']), None)
+        if started is not None:
+            latencies.append(time.perf_counter() - started)
+            if len(latencies) == args.updates:
+                answered.set()
+
+    fake.listeners.append(on_call)
+    webhook_runner = None
+    polling = None
+    if args.mode == 'webhook':
+        settings.WEBHOOK_URL = f'http://127.0.0.1:{args.webhook_port}'
+        settings.WEBHOOK_SECRET = 'benchmark-secret'
+        webhook_runner = web.AppRunner(build_webhook_app(bot_main.dp, bot_main.bot, register=True))
+        await webhook_runner.setup()
+        await web.TCPSite(webhook_runner, '127.0.0.1', args.webhook_port).start()
+    else:
+        polling = asyncio.create_task(bot_main.dp.start_polling(bot_main.bot, handle_signals=False, close_bot_session=False))
+        while not fake.calls['getupdates']:
+            await asyncio.sleep(0.01)
+
+    started = time.perf_counter()
+    try:
+        for update_id in range(1, args.updates + 1):
+            user_id = 1000000 + update_id
+            pending[user_id] = time.perf_counter()
+            fake.push_update({
+                'update_id': update_id,
+                'message': {
+                    'message_id': update_id,
+                    'date': int(time.time()),
+                    'chat': {'id': user_id, 'type': 'private'},
+                    'from': {'id': user_id, 'is_bot': False, 'first_name': 'Тест'},
+                    'text': '/start',
+                },
+            })
+        try:
+            await asyncio.wait_for(answered.wait(), args.timeout)
+        except asyncio.TimeoutError:
+            print(f"Не дождались ответов за {args.timeout} с")
+        elapsed = time.perf_counter() - started
+    finally:
+        if polling is not None:
+            await bot_main.dp.stop_polling()
+            await polling
+        if webhook_runner is not None:
+            await webhook_runner.cleanup()
+        await bot_main.dp.storage.close()
+        await bot_main.bot.session.close()
+        await api_runner.cleanup()
+        shutdown_db_executor()
+
+    stats = fake.stats()
+    print(f"Режим: {args.mode}, обновлений: {args.updates}, лимит отправки: {args.send_rate:.0f}/с, "
+          f"задержка Bot API: {args.latency * 1000:.0f}+{args.jitter * 1000:.0f} мс")
+    print(f"Ответы получены: {len(latencies)} из {args.updates} за {elapsed:.2f} с ({len(latencies) / elapsed:.0f}/с)")
+    if latencies:
+        print(f"До ответа: p50 {percentile(latencies, 0.5) * 1000:.0f} мс, p99 {percentile(latencies, 0.99) * 1000:.0f} мс")
+    print(f"Bot API: вызовов {sum(stats['calls'].values())}, getUpdates {stats['calls'].get('getupdates', 0)}, "
+          f"webhook {stats['succeeded'].get('webhook', 0)}, отказов 429 {stats['retry_after']}, ошибок 500 {stats['errors']}")
+    print(f"Очередь исходящих: {outbound_limiter.stats()}")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mode', choices=('polling', 'webhook'), default='polling')
+    parser.add_argument('--updates', type=int, default=2000)
+    parser.add_argument('--send-rate', type=float, default=settings.SEND_GLOBAL_RATE, help='лимит исходящих сообщений в секунду')
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--retry-after-rate', type=float, default=0.0)
+    parser.add_argument('--retry-after', type=int, default=1)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--api-port', type=int, default=8081)
+    parser.add_argument('--webhook-port', type=int, default=8089)
+    parser.add_argument('--timeout', type=float, default=300)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.configure(os.path.join(tmp, 'bot_api_load.db'))
+        asyncio.run(measure(args))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""Бенчмарк импорта каталога из файла: прайс-лист поставщика в CSV, JSON и XLSX
+
+Создает файл с --books книгами в каждом формате и импортирует его в пустую временную
+базу тем же кодом, что и команда администратора /import: разбор в отдельном потоке,
+пачки insert_many ... ON CONFLICT в потоке-писателе. Затем тот же файл импортируется
+повторно с id - это обновление существующих книг. С --trace-memory печатается пик
+памяти Python во время импорта (замеры времени при этом медленнее).
+
+Запуск: python -m benchmarks.catalog_import --books 20000 --formats csv json xlsx
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Dict, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Таблица результатов не перемешивается с логом
+os.environ.setdefault('LOG_CONSOLE', 'false')
+
+from admin.catalog_import import import_catalog
+from benchmarks.catalog_search import AUTHORS, WORDS
+from data.db_executor import run_db, shutdown_db_executor, start_db_executor
+from data.migrations import apply_migrations
+from data.models import db, Books
+
+COLUMNS = ['id', 'Название', 'Автор', 'Цена', 'Описание', 'Фото', 'Количество']
+
+def price_list(books: int, with_ids: bool, seed: int = 1) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    return [{
+        'id': book_id if with_ids else '',
+        'Название': ' '.join(rng.sample(WORDS, 3)).capitalize(),
+        'Автор': rng.choice(AUTHORS),
+        'Цена': round(rng.uniform(100, 3000), 2),
+        'Описание': 'Издание в твердом переплете, ' + ' '.join(rng.sample(WORDS, 8)),
+        'Фото': f'book_{book_id}.jpg',
+        'Количество': rng.randint(0, 50),
+    } for book_id in range(1, books + 1)]
+
+def write_file(path: str, file_format: str, rows: List[Dict[str, Any]]) -> None:
+    if file_format == 'csv':
+        # Как сохраняет Excel с русской локалью
+        with open(path, 'w', newline='', encoding='cp1251') as file:
+            writer = csv.DictWriter(file, fieldnames=COLUMNS, delimiter=';')
+            writer.writeheader()
+            writer.writerows({**row, 'Цена': str(row['Цена']).replace('.', ',')} for row in rows)
+    elif file_format == 'json':
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(rows, file, ensure_ascii=False)
+    else:
+        from openpyxl import Workbook
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(COLUMNS)
+        for row in rows:
+            sheet.append([None if row[column] == '' else row[column] for column in COLUMNS])
+        workbook.save(path)
+
+async def measure(path: str, file_format: str, trace_memory: bool) -> Dict[str, float]:
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    stats = await import_catalog(path, file_format)
+    elapsed = time.perf_counter() - started
+    peak = 0
+    if trace_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return {'seconds': elapsed, 'saved': stats.saved, 'failed': stats.failed, 'peak_mb': peak / 1024 / 1024}
+
+async def run(args: argparse.Namespace, tmp: str) -> None:
+    start_db_executor()
+    await run_db(apply_migrations)
+    print(f"Книг в файле: {args.books}, ядер: {os.cpu_count()}")
+    print(f"{'Формат':<8}{'импорт':<12}{'размер, МБ':>11}{'секунд':>9}{'строк/с':>10}{'ошибок':>8}"
+          + (f"{'пик, МБ':>10}" if args.trace_memory else ''))
+    try:
+        for file_format in args.formats:
+            await run_db(lambda: Books.delete().execute())
+            for title, with_ids in (('новые', False), ('обновление', True)):
+                path = os.path.join(tmp, f'{title}.{file_format}')
+                write_file(path, file_format, price_list(args.books, with_ids))
+                result = await measure(path, file_format, args.trace_memory)
+                size = os.path.getsize(path) / 1024 / 1024
+                line = (f"{file_format:<8}{title:<12}{size:>11.1f}{result['seconds']:>9.2f}"
+                        f"{args.books / result['seconds']:>10.0f}{result['failed']:>8}")
+                print(line + (f"{result['peak_mb']:>10.1f}" if args.trace_memory else ''))
+    finally:
+        shutdown_db_executor()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--books', type=int, default=20000)
+    parser.add_argument('--formats', nargs='+', choices=('csv', 'json', 'xlsx'), default=['csv', 'json', 'xlsx'])
+    parser.add_argument('--trace-memory', action='store_true', help='замерить пик памяти Python во время импорта')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.configure(os.path.join(tmp, 'catalog_import.db'))
+        asyncio.run(run(args, tmp))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""Бенчмарк поиска по каталогу: FTS5 против LIKE на синтетическом каталоге
+
+Создает временную базу через миграции бота, заполняет ее книгами
+(индекс books_fts наполняют триггеры) и измеряет задержку search_books
+для набора запросов с индексом и без него.
+
+Запуск: python -m benchmarks.catalog_search --books 100000 --repeat 20
+"""
+import argparse
+import itertools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import catalog_search
+from config.catalog_search import search_books
+from data.migrations import apply_migrations
+from data.models import db, Books
+
+AUTHORS = ['Пушкин', 'Толстой', 'Достоевский', 'Чехов', 'Гоголь', 'Тургенев', 'Булгаков', 'Лермонтов', 'Бунин', 'Куприн']
+WORDS = ['война', 'мир', 'сказка', 'дочка', 'души', 'повесть', 'роман', 'история', 'путешествие', 'море',
+         'город', 'ночь', 'зима', 'лето', 'дорога', 'сад', 'дом', 'письма', 'записки', 'рассказы']
+SYLLABLES = ['ба', 'ве', 'го', 'ду', 'жи', 'зо', 'ки', 'ла', 'ме', 'но', 'пу', 'ра', 'сти', 'то', 'фе', 'ха', 'це', 'ша']
+QUERIES = ['пушкина', 'войне и мире', 'мёртвых душ', 'записки чехова', 'путешествия', 'сад', 'зимняя дорога']
+
+def vocabulary(rng: random.Random, size: int = 20000) -> List[str]:
+    """Словарь: реальные слова в начале (частые) и синтетические слова из слогов"""
+    words = list(WORDS)
+    while len(words) < size:
+        words.append("".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+    return words
+
+def fill_catalog(books: int, seed: int = 1) -> None:
+    """Заполняет каталог случайными книгами пачками по 500.
+
+    Частоты слов убывают по закону Ципфа со сдвигом: самые частые слова встречаются
+    примерно в каждой десятой книге, а не в каждой.
+    """
+    rng = random.Random(seed)
+    words = vocabulary(rng)
+    cum_weights = list(itertools.accumulate(1 / (rank + 50) for rank in range(len(words))))
+    with db.atomic():
+        for start in range(0, books, 500):
+            rows = []
+            for i in range(start, min(start + 500, books)):
+                title = " ".join(rng.choices(words, cum_weights=cum_weights, k=3)).capitalize()
+                rows.append({
+                    'name': f'{title} {i}',
+                    'author': rng.choice(AUTHORS),
+                    'price': 100.0 + i % 900,
+                    'description': " ".join(rng.choices(words, cum_weights=cum_weights, k=30)),
+                    'photo': f'photo_{i}',
+                    'quantity': 10,
+                })
+            Books.insert_many(rows).execute()
+
+def measure(repeat: int) -> Dict[str, List[float]]:
+    timings: Dict[str, List[float]] = {}
+    for query in QUERIES:
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            search_books(query)
+            samples.append((time.perf_counter() - started) * 1000)
+        timings[query] = samples
+    return timings
+
+def print_timings(title: str, timings: Dict[str, List[float]]) -> None:
+    print(title)
+    print(f"{'Запрос':<22}{'p50, мс':>10}{'p95, мс':>10}")
+    for query, samples in timings.items():
+        samples = sorted(samples)
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        print(f"{query:<22}{statistics.median(samples):>10.2f}{p95:>10.2f}")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--books', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.configure(os.path.join(tmp, 'search.db'))
+        apply_migrations()
+        started = time.perf_counter()
+        fill_catalog(args.books)
+        print(f"Книг: {args.books}, заполнение с индексацией: {time.perf_counter() - started:.1f} с")
+
+        print_timings("FTS5 (books_fts, bm25)", measure(args.repeat))
+        catalog_search._fts_available = False
+        print_timings("LIKE (полный просмотр)", measure(max(args.repeat // 4, 1)))
+        db.close()
+
+if __name__ == '__main__':
+    main()
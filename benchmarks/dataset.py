@@ -0,0 +1,153 @@
+"""Генератор большой синтетической базы: каталог, заказы, диалоги и администраторы
+
+Создает базу через миграции бота и заполняет ее пачками в транзакциях.
+Заказы идут по времени за последние два года: старые почти все доставлены или
+отменены, а новые, новые в работе и в пути составляют хвост последних дней, как в
+живой очереди. Диалоги в основном закрыты, открытые - среди недавних. Пользователи
+заказов и диалогов выбираются из общего пула, часть из них возвращается чаще.
+
+Запуск: python -m benchmarks.dataset --db scale.db --books 100000 --orders 5000000 --dialogs 1000000 --admins 50
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Iterator, List, Sequence, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Таблица результатов не перемешивается с логом
+os.environ.setdefault('LOG_CONSOLE', 'false')
+
+from benchmarks.catalog_search import fill_catalog
+from data.migrations import apply_migrations
+from data.models import db, Admin, Books, Dialog, Order, OrderStatus
+
+# Строк на транзакцию: меньше транзакций - меньше fsync, но дольше удерживается блокировка
+TRANSACTION_ROWS = 100000
+ADMIN_BASE = 7000000
+USER_BASE = 1000000
+HISTORY = timedelta(days=730)
+# Доля самых свежих заказов, которые еще не завершены
+OPEN_SHARE = 0.01
+OPEN_STATUSES = (('new', 30), ('processing', 25), ('supplier_notified', 15), ('book_taken', 15), ('in_transit', 15))
+CLOSED_STATUSES = (('delivered', 90), ('cancelled', 10))
+
+def chunks(rows: Iterator[Tuple], size: int) -> Iterator[List[Tuple]]:
+    batch: List[Tuple] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def insert_batches(model: type, fields: Sequence, rows: Iterator[Tuple]) -> int:
+    """Вставляет строки по TRANSACTION_ROWS в транзакции.
+
+    Запрос строит insert_many один раз, а строки идут через executemany: сборка
+    многострочного INSERT в peewee на миллионах строк занимает больше времени, чем сама вставка.
+    """
+    sql, _ = model.insert_many([tuple(None for _ in fields)], fields=fields).sql()
+    inserted = 0
+    for transaction_rows in chunks(rows, TRANSACTION_ROWS):
+        with db.atomic():
+            db.cursor().executemany(sql, transaction_rows)
+        inserted += len(transaction_rows)
+    return inserted
+
+def user_picker(rng: random.Random, users: int) -> Callable[[], int]:
+    """Пользователь из пула: пятая часть пользователей делает половину заказов и вопросов"""
+    regulars = max(1, users // 5)
+
+    def pick() -> int:
+        if rng.random() < 0.5:
+            return USER_BASE + rng.randrange(regulars)
+        return USER_BASE + rng.randrange(users)
+    return pick
+
+def weighted(rng: random.Random, choices: Sequence[Tuple[int, int]]) -> Callable[[], int]:
+    values = [value for value, _ in choices]
+    weights = [weight for _, weight in choices]
+    return lambda: rng.choices(values, weights)[0]
+
+def fill_admins(admins: int) -> None:
+    Admin.insert_many([
+        (ADMIN_BASE + i, f'admin{i}', '0', 'admin', f'Администратор {i}') for i in range(admins)
+    ], fields=[Admin.user_id, Admin.user_name, Admin.phone, Admin.role, Admin.display_name]).on_conflict_ignore().execute()
+
+def order_rows(orders: int, books: int, pick_user: Callable[[], int], rng: random.Random) -> Iterator[Tuple]:
+    status_ids = {status.name: status.id for status in OrderStatus.select()}
+    open_status = weighted(rng, [(status_ids[name], weight) for name, weight in OPEN_STATUSES])
+    closed_status = weighted(rng, [(status_ids[name], weight) for name, weight in CLOSED_STATUSES])
+    start = datetime.now() - HISTORY
+    step = HISTORY / max(orders, 1)
+    open_from = int(orders * (1 - OPEN_SHARE))
+    for i in range(orders):
+        created = start + step * i
+        status = open_status() if i >= open_from else closed_status()
+        book_id = rng.randint(1, books)
+        yield (pick_user(), 'Иванов Иван Иванович', 'Москва, ул. Ленина, д. 1', '+79000000000',
+               book_id, f'Книга {book_id}', status, created, created)
+
+def dialog_rows(dialogs: int, admins: int, pick_user: Callable[[], int], rng: random.Random) -> Iterator[Tuple]:
+    start = datetime.now() - HISTORY
+    step = HISTORY / max(dialogs, 1)
+    open_from = int(dialogs * (1 - OPEN_SHARE))
+    for i in range(dialogs):
+        created = start + step * i
+        is_closed = i < open_from or rng.random() < 0.5
+        yield (pick_user(), ADMIN_BASE + rng.randrange(admins), 'Когда будет в наличии?',
+               'Ожидается на следующей неделе' if is_closed else None, created, created, is_closed)
+
+def generate(books: int, orders: int, dialogs: int, admins: int, users: int, seed: int = 1) -> None:
+    """Заполняет текущую базу; схема создается миграциями, статусы - по умолчанию"""
+    rng = random.Random(seed)
+    pick_user = user_picker(rng, users)
+    apply_migrations()
+    for status in OrderStatus.get_default_statuses():
+        OrderStatus.get_or_create(name=status['name'], defaults=status)
+
+    steps = (
+        ('администраторы', lambda: fill_admins(admins)),
+        ('книги', lambda: fill_catalog(books, seed)),
+        ('заказы', lambda: insert_batches(Order, [
+            Order.telegram_id, Order.fio, Order.addres, Order.phone, Order.book_id, Order.book_info,
+            Order.status, Order.created_at, Order.updated_at,
+        ], order_rows(orders, Books.select().count(), pick_user, rng))),
+        ('диалоги', lambda: insert_batches(Dialog, [
+            Dialog.user_id, Dialog.admin_id, Dialog.question, Dialog.answer,
+            Dialog.created_at, Dialog.updated_at, Dialog.is_closed,
+        ], dialog_rows(dialogs, admins, pick_user, rng))),
+    )
+    for title, step in steps:
+        started = time.perf_counter()
+        step()
+        print(f"{title}: {time.perf_counter() - started:.1f} с")
+    started = time.perf_counter()
+    db.execute_sql('ANALYZE;')
+    print(f"ANALYZE: {time.perf_counter() - started:.1f} с")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', required=True, help='путь к новой базе')
+    parser.add_argument('--books', type=int, default=100000)
+    parser.add_argument('--orders', type=int, default=5000000)
+    parser.add_argument('--dialogs', type=int, default=1000000)
+    parser.add_argument('--admins', type=int, default=50)
+    parser.add_argument('--users', type=int, default=500000, help='размер пула пользователей')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    if os.path.exists(args.db):
+        parser.error(f"{args.db} уже существует")
+    db.configure(args.db)
+    generate(args.books, args.orders, args.dialogs, args.admins, args.users, args.seed)
+    db.close()
+    print(f"База: {args.db}, {os.path.getsize(args.db) / 1024 / 1024:.0f} МБ")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,352 @@
+"""Сквозной бенчмарк диспетчера: сценарии пользователей и администратора без сети
+
+Берет диспетчер из main.py со всеми роутерами, метриками, антифлудом и FSM и
+подменяет сессию бота записывающей: она запоминает вызовы Bot API и сразу
+отвечает без сетевой задержки. Сценарии идут через dp.feed_update на временной
+базе: /start, просмотр каталога, оформление заказа книги, вопрос администратору
+с ответом и смена статуса заказа. Для каждого сценария печатаются обновления в секунду,
+p50/p99 обработки обновления, вызовы Bot API и SQL-запросы на обновление.
+
+С --save результат сохраняется как базовый, иначе сравнивается с сохраненным:
+скорость не должна упасть больше чем на --tolerance, а вызовов Bot API и
+SQL-запросов на обновление не должно стать больше. При регрессии код возврата 1.
+
+Запуск: python -m benchmarks.dispatcher_e2e --iterations 300 --concurrency 10 [--save]
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# main.py требует токен при импорте; лог бенчмарка пишется в файл, но не в лог бота и не в консоль
+os.environ.setdefault('TOKEN', '123456:benchmark')
+os.environ.setdefault('LOG_FILE', os.path.join(tempfile.gettempdir(), 'dispatcher_e2e.log'))
+os.environ.setdefault('LOG_CONSOLE', 'false')
+
+from aiogram import Bot, Dispatcher
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import EditMessageMedia, SendMediaGroup, SendPhoto, TelegramMethod
+from aiogram.types import CallbackQuery, Chat, Message, PhotoSize, Update, User
+
+import main as bot_main
+from admin.admin_registry import load_admins
+from benchmarks.inline_lookup import percentile
+from config import settings
+from data.db_executor import install_loop_guard, run_db, run_db_read, shutdown_db_executor, start_db_executor
+from data.models import db, Admin, Books, Order, OrderStatus
+from data.query_stats import QueryStats, query_stats
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines', 'dispatcher_e2e.json')
+
+# Администратор по умолчанию из initialize_database_and_data
+ADMIN_ID = 5069224643
+# Администраторы для вопросов: у каждой параллельной цепочки свой, чтобы не делить состояние FSM
+QUESTION_ADMIN_BASE = 7000000
+ORDER_USER_ID = 8000000
+
+# Вызовы Bot API текущего обновления
+_recorded: ContextVar[Optional[List[TelegramMethod]]] = ContextVar('recorded_calls', default=None)
+
+class RecordingSession(BaseSession):
+    """Сессия без сети: запоминает вызовы Bot API и сразу отвечает правдоподобным результатом"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls = 0
+        self._message_ids = itertools.count(1)
+
+    def _message(self, method: TelegramMethod, photo: bool = False) -> Message:
+        message_id = next(self._message_ids)
+        chat_id = getattr(method, 'chat_id', None)
+        return Message(
+            message_id=message_id,
+            date=datetime.now(),
+            chat=Chat(id=chat_id if isinstance(chat_id, int) else 0, type='private'),
+            text=getattr(method, 'text', None),
+            # file_id в ответе попадает в кэш фото, как при настоящей загрузке
+            photo=[PhotoSize(file_id=f'photo-{message_id}', file_unique_id=f'u{message_id}', width=1, height=1)] if photo else None,
+        )
+
+    async def make_request(self, bot: Bot, method: TelegramMethod, timeout: Optional[int] = None) -> Any:
+        self.calls += 1
+        recorded = _recorded.get()
+        if recorded is not None:
+            recorded.append(method)
+        if isinstance(method, SendMediaGroup):
+            return [self._message(method, photo=True) for _ in method.media]
+        if isinstance(method, (SendPhoto, EditMessageMedia)):
+            return self._message(method, photo=True)
+        if type(method).__name__.startswith(('Send', 'Edit')):
+            return self._message(method)
+        return True
+
+    async def stream_content(self, *args: Any, **kwargs: Any) -> Any:
+        yield b''
+
+    async def close(self) -> None:
+        pass
+
+class Runner:
+    """Подает обновления в диспетчер и собирает задержку, вызовы Bot API и SQL-запросы"""
+
+    def __init__(self, dp: Dispatcher, bot: Bot, orders: int, statuses: List[int]):
+        self.dp = dp
+        self.bot = bot
+        # Заказы и статусы во временной базе для сценария администратора
+        self.orders = orders
+        self.statuses = statuses
+        self.update_ids = itertools.count(1)
+        self.latencies: List[float] = []
+        self.api_calls = 0
+        self.queries = 0
+
+    async def feed(self, update: Update) -> List[TelegramMethod]:
+        calls: List[TelegramMethod] = []
+        stats = QueryStats()
+        calls_token = _recorded.set(calls)
+        stats_token = query_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            await self.dp.feed_update(self.bot, update)
+        finally:
+            self.latencies.append(time.perf_counter() - started)
+            query_stats.reset(stats_token)
+            _recorded.reset(calls_token)
+        self.api_calls += len(calls)
+        self.queries += stats.queries
+        return calls
+
+    async def message(self, user_id: int, text: str) -> List[TelegramMethod]:
+        update_id = next(self.update_ids)
+        return await self.feed(Update(update_id=update_id, message=Message(
+            message_id=update_id,
+            date=datetime.now(),
+            chat=Chat(id=user_id, type='private'),
+            from_user=User(id=user_id, is_bot=False, first_name='Тест'),
+            text=text,
+        )))
+
+    async def callback(self, user_id: int, data: str, photo: bool = False) -> List[TelegramMethod]:
+        update_id = next(self.update_ids)
+        # Сообщение бота, к которому привязана кнопка: карточки каталога отправлены с фото
+        message = Message(
+            message_id=update_id,
+            date=datetime.now(),
+            chat=Chat(id=user_id, type='private'),
+            text=None if photo else 'Сообщение бота',
+            photo=[PhotoSize(file_id='photo', file_unique_id='u', width=1, height=1)] if photo else None,
+        )
+        return await self.feed(Update(update_id=update_id, callback_query=CallbackQuery(
+            id=str(update_id),
+            from_user=User(id=user_id, is_bot=False, first_name='Тест'),
+            chat_instance='benchmark',
+            data=data,
+            message=message,
+        )))
+
+def callback_data_with(calls: List[TelegramMethod], prefix: str) -> Optional[str]:
+    """Первая кнопка с callback_data на prefix среди отправленных сообщений"""
+    for call in calls:
+        markup = getattr(call, 'reply_markup', None)
+        for row in getattr(markup, 'inline_keyboard', None) or []:
+            for button in row:
+                if button.callback_data and button.callback_data.startswith(prefix):
+                    return button.callback_data
+    return None
+
+Scenario = Callable[[Runner, int, int, random.Random], Awaitable[None]]
+
+async def start_scenario(runner: Runner, user_id: int, worker: int, rng: random.Random) -> None:
+    await runner.message(user_id, '/start')
+
+async def gallery_scenario(runner: Runner, user_id: int, worker: int, rng: random.Random) -> None:
+    await runner.callback(user_id, 'books_gallery')
+    await runner.callback(user_id, 'gallery_next_1', photo=True)
+    await runner.callback(user_id, 'gallery_next_2', photo=True)
+    await runner.callback(user_id, 'gallery_prev_3', photo=True)
+    await runner.callback(user_id, 'gallery_album')
+
+async def order_scenario(runner: Runner, user_id: int, worker: int, rng: random.Random) -> None:
+    book_id = rng.randint(1, 5)
+    await runner.callback(user_id, 'books_gallery')
+    await runner.callback(user_id, f'gallery_card_{book_id}', photo=True)
+    await runner.callback(user_id, f'order_book_{book_id}')
+    for text in ('Иванов Иван Иванович', 'Москва, ул. Ленина 1', '+79000000000', 'да'):
+        await runner.message(user_id, text)
+
+async def question_scenario(runner: Runner, user_id: int, worker: int, rng: random.Random) -> None:
+    admin_id = QUESTION_ADMIN_BASE + worker
+    await runner.callback(user_id, 'ask_question_start')
+    await runner.callback(user_id, f'select_admin_for_question_{admin_id}')
+    calls = await runner.message(user_id, 'Когда будет в наличии Псалтирь?')
+    reply = callback_data_with(calls, 'reply_to_question_')
+    if reply is None:
+        raise RuntimeError("Администратор не получил вопрос")
+    dialog_id = reply.rsplit('_', 1)[-1]
+    await runner.callback(admin_id, reply)
+    await runner.message(admin_id, 'Ожидается на следующей неделе')
+    await runner.message(user_id, 'Спасибо!')
+    await runner.callback(admin_id, f'close_dialog_{dialog_id}')
+
+async def status_scenario(runner: Runner, user_id: int, worker: int, rng: random.Random) -> None:
+    order_id = rng.randint(1, runner.orders)
+    await runner.message(ADMIN_ID, '📋 Все заказы')
+    await runner.callback(ADMIN_ID, f'change_status_{order_id}')
+    await runner.callback(ADMIN_ID, f'set_status_{rng.choice(runner.statuses)}_{order_id}')
+
+SCENARIOS: Dict[str, Scenario] = {
+    'start': start_scenario,
+    'gallery': gallery_scenario,
+    'order': order_scenario,
+    'question': question_scenario,
+    'status': status_scenario,
+}
+
+def seed(photo_dir: str, orders: int, question_admins: int) -> List[int]:
+    """Фото книг, администраторы для вопросов и заказы. Выполняется в потоке-писателе"""
+    for book in Books.select():
+        with open(os.path.join(photo_dir, book.photo), 'wb') as photo:
+            photo.write(os.urandom(1024))
+    Admin.insert_many([
+        {'user_id': QUESTION_ADMIN_BASE + index, 'user_name': f'admin{index}', 'phone': '0',
+         'role': 'admin', 'display_name': f'Администратор {index}'}
+        for index in range(question_admins)
+    ]).execute()
+    # Заказы списывают книги со склада: запаса хватает на любое число итераций
+    Books.update(quantity=1000000).execute()
+    statuses = [status.id for status in OrderStatus.select()]
+    book = Books.select().first()
+    rng = random.Random(1)
+    with db.atomic():
+        for start in range(0, orders, 500):
+            Order.insert_many([
+                {'telegram_id': ORDER_USER_ID, 'fio': 'Иванов Иван', 'addres': 'Москва', 'phone': '+79000000000',
+                 'book_id': book.id, 'book_info': book.name, 'status': rng.choice(statuses)}
+                for _ in range(start, min(start + 500, orders))
+            ]).execute()
+    return statuses
+
+async def run_scenario(runner: Runner, scenario: Scenario, iterations: int, concurrency: int,
+                       users: Iterator[int]) -> float:
+    """Прогоняет iterations экземпляров сценария в concurrency параллельных цепочках"""
+    remaining = iter(range(iterations))
+
+    async def chain(worker: int) -> None:
+        rng = random.Random(worker)
+        for _ in remaining:
+            await scenario(runner, next(users), worker, rng)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(chain(worker) for worker in range(concurrency)))
+    return time.perf_counter() - started
+
+def summarize(runner: Runner, elapsed: float) -> Dict[str, float]:
+    updates = len(runner.latencies)
+    return {
+        'updates': updates,
+        'updates_per_s': round(updates / elapsed, 1),
+        'p50_ms': round(percentile(runner.latencies, 0.5) * 1000, 3),
+        'p99_ms': round(percentile(runner.latencies, 0.99) * 1000, 3),
+        'api_calls_per_update': round(runner.api_calls / updates, 3),
+        'queries_per_update': round(runner.queries / updates, 3),
+    }
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Регрессии относительно базового результата"""
+    problems = []
+    for name, current in results.items():
+        base = baseline['scenarios'].get(name)
+        if not base:
+            continue
+        if current['updates_per_s'] < base['updates_per_s'] * (1 - tolerance):
+            problems.append(f"{name}: {current['updates_per_s']:.0f} обновлений/с против {base['updates_per_s']:.0f}")
+        for key, title in (('api_calls_per_update', 'вызовов Bot API'), ('queries_per_update', 'SQL-запросов')):
+            # Число вызовов на обновление не зависит от машины, поэтому сравнивается без допуска
+            if current[key] > base[key] + 0.01:
+                problems.append(f"{name}: {title} на обновление {current[key]} против {base[key]}")
+    return problems
+
+async def measure(args: argparse.Namespace, photo_dir: str) -> Dict[str, Dict[str, float]]:
+    session = RecordingSession()
+    bot_main.bot.session = session
+    start_db_executor()
+    await run_db(bot_main.initialize_database_and_data)
+    statuses = await run_db(seed, photo_dir, args.orders, args.concurrency)
+    await run_db_read(load_admins)
+    install_loop_guard()
+
+    users = itertools.count(3000000)
+    results: Dict[str, Dict[str, float]] = {}
+    try:
+        for name in args.scenarios:
+            runner = Runner(bot_main.dp, bot_main.bot, args.orders, statuses)
+            # Прогрев: кэши каталога и file_id фото, соединения читателей
+            await run_scenario(runner, SCENARIOS[name], args.concurrency, args.concurrency, users)
+            runner = Runner(bot_main.dp, bot_main.bot, args.orders, statuses)
+            elapsed = await run_scenario(runner, SCENARIOS[name], args.iterations, args.concurrency, users)
+            results[name] = summarize(runner, elapsed)
+    finally:
+        await bot_main.dp.storage.close()
+        shutdown_db_executor()
+    return results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=300, help='экземпляров каждого сценария')
+    parser.add_argument('--concurrency', type=int, default=10, help='параллельных цепочек сценария')
+    parser.add_argument('--orders', type=int, default=1000)
+    parser.add_argument('--scenarios', nargs='+', choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--save', action='store_true', help='сохранить результат как базовый')
+    parser.add_argument('--tolerance', type=float, default=0.3, help='допустимое падение скорости, доля')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.configure(os.path.join(tmp, 'e2e.db'))
+        settings.MEDIA_DIR = tmp
+        results = asyncio.run(measure(args, tmp))
+
+    baseline = None
+    if not args.save and os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)
+
+    print(f"Итераций: {args.iterations}, параллельно: {args.concurrency}, ядер: {os.cpu_count()}")
+    print(f"{'Сценарий':<10}{'обновлений':>11}{'обн./с':>9}{'p50 мс':>9}{'p99 мс':>9}{'API/обн.':>10}{'SQL/обн.':>10}{'к базовому':>12}")
+    for name, result in results.items():
+        base = baseline['scenarios'].get(name) if baseline else None
+        delta = f"{result['updates_per_s'] / base['updates_per_s'] - 1:+.0%}" if base else '-'
+        print(f"{name:<10}{result['updates']:>11}{result['updates_per_s']:>9.0f}{result['p50_ms']:>9.2f}{result['p99_ms']:>9.2f}"
+              f"{result['api_calls_per_update']:>10.2f}{result['queries_per_update']:>10.2f}{delta:>12}")
+
+    if args.save:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as file:
+            json.dump({
+                'python': platform.python_version(),
+                'cpus': os.cpu_count(),
+                'iterations': args.iterations,
+                'concurrency': args.concurrency,
+                'scenarios': results,
+            }, file, ensure_ascii=False, indent=2)
+        print(f"Базовый результат сохранен: {args.baseline}")
+    elif baseline:
+        problems = compare(results, baseline, args.tolerance)
+        for problem in problems:
+            print(f"Регрессия: {problem}")
+        if problems:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
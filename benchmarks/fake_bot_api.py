@@ -0,0 +1,270 @@
+"""Локальный заменитель Telegram Bot API для нагрузочных тестов и внесения сбоев
+
+Сервер на aiohttp отвечает на методы, которые использует бот: getMe, getUpdates,
+setWebhook/deleteWebhook, setMyCommands, sendMessage, sendPhoto, sendMediaGroup,
+editMessageText/Media/Caption и answerCallbackQuery. Ответы строятся как у Telegram,
+отправленные фото получают file_id. Для исходящих методов настраиваются задержка,
+доля ответов 429 с retry_after и доля ошибок 500; getUpdates сбоев не получает.
+
+Обновления для бота кладутся через push_update (или POST /fake/updates со списком
+JSON-обновлений): без webhook их забирает getUpdates, после setWebhook сервер сам
+отправляет их на адрес webhook с секретным заголовком. Счетчики - GET /fake/stats.
+
+Бот из main.py подключается через TELEGRAM_API_URL=http://127.0.0.1:8081.
+
+Запуск: python -m benchmarks.fake_bot_api --port 8081 --latency 0.05 --retry-after-rate 0.01 --error-rate 0.01
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiohttp import ClientSession, web
+
+BOT_USER = {'id': 123456, 'is_bot': True, 'first_name': 'Fake', 'username': 'fake_bot'}
+# Методы, которые получают задержку и сбои: все, кроме получения обновлений и служебных
+FAULT_FREE_METHODS = ('getupdates', 'getme', 'setwebhook', 'deletewebhook')
+
+class FakeBotApi:
+    """Заменитель Bot API: хранит очередь обновлений, отвечает на методы и считает вызовы"""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, retry_after_rate: float = 0.0,
+                 retry_after: int = 1, error_rate: float = 0.0, seed: Optional[int] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.retry_after_rate = retry_after_rate
+        self.retry_after = retry_after
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.updates: List[Dict[str, Any]] = []
+        self.updates_ready = asyncio.Event()
+        self.webhook_url = ''
+        self.webhook_secret = ''
+        self._message_ids = itertools.count(1)
+        self._delivery: List['asyncio.Task[None]'] = []
+        self.calls: Counter = Counter()
+        self.succeeded: Counter = Counter()
+        self.retry_after_sent = 0
+        self.errors_sent = 0
+        # Вызывается после каждого успешного метода: (имя метода, параметры)
+        self.listeners: List[Callable[[str, Dict[str, Any]], None]] = []
+        self.handlers: Dict[str, Callable[[Dict[str, Any]], Awaitable[Any]]] = {
+            'getme': self._get_me,
+            'getupdates': self._get_updates,
+            'setwebhook': self._set_webhook,
+            'deletewebhook': self._delete_webhook,
+            'setmycommands': self._true,
+            'answercallbackquery': self._true,
+            'deletemessage': self._true,
+            'sendmessage': self._send_message,
+            'sendphoto': self._send_photo,
+            'sendmediagroup': self._send_media_group,
+            'editmessagetext': self._edit_message,
+            'editmessagecaption': self._edit_message,
+            'editmessagemedia': self._edit_message,
+        }
+
+    # Обновления для бота
+
+    def push_update(self, update: Dict[str, Any]) -> None:
+        """Новое обновление: в очередь getUpdates или сразу на webhook"""
+        if self.webhook_url:
+            self._delivery.append(asyncio.create_task(self._deliver(update)))
+        else:
+            self.updates.append(update)
+            self.updates_ready.set()
+
+    async def _deliver(self, update: Dict[str, Any]) -> None:
+        headers = {'X-Telegram-Bot-Api-Secret-Token': self.webhook_secret} if self.webhook_secret else {}
+        async with self._client.post(self.webhook_url, json=update, headers=headers) as response:
+            self.calls['webhook'] += 1
+            if response.status == 200:
+                self.succeeded['webhook'] += 1
+
+    # Методы Bot API
+
+    def _message(self, params: Dict[str, Any], **fields: Any) -> Dict[str, Any]:
+        chat_id = int(params.get('chat_id') or 0)
+        message = {
+            'message_id': next(self._message_ids),
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private' if chat_id > 0 else 'group'},
+            'from': BOT_USER,
+        }
+        message.update(fields)
+        return message
+
+    def _photo(self) -> List[Dict[str, Any]]:
+        file_id = f'fake-photo-{next(self._message_ids)}'
+        return [{'file_id': file_id, 'file_unique_id': file_id, 'width': 800, 'height': 600}]
+
+    async def _true(self, params: Dict[str, Any]) -> Any:
+        return True
+
+    async def _get_me(self, params: Dict[str, Any]) -> Any:
+        return BOT_USER
+
+    async def _get_updates(self, params: Dict[str, Any]) -> Any:
+        if self.webhook_url:
+            raise web.HTTPConflict(text=json.dumps({
+                'ok': False, 'error_code': 409,
+                'description': "Conflict: can't use getUpdates method while webhook is active",
+            }), content_type='application/json')
+        offset = int(params.get('offset') or 0)
+        limit = int(params.get('limit') or 100)
+        # Подтвержденные обновления (id меньше offset) больше не отдаются
+        self.updates = [update for update in self.updates if update['update_id'] >= offset]
+        if not self.updates:
+            self.updates_ready.clear()
+            try:
+                await asyncio.wait_for(self.updates_ready.wait(), float(params.get('timeout') or 0))
+            except asyncio.TimeoutError:
+                pass
+        return self.updates[:limit]
+
+    async def _set_webhook(self, params: Dict[str, Any]) -> Any:
+        self.webhook_url = params['url']
+        self.webhook_secret = params.get('secret_token', '')
+        return True
+
+    async def _delete_webhook(self, params: Dict[str, Any]) -> Any:
+        self.webhook_url = ''
+        if params.get('drop_pending_updates') in ('true', True):
+            self.updates = []
+        return True
+
+    async def _send_message(self, params: Dict[str, Any]) -> Any:
+        return self._message(params, text=params.get('text', ''))
+
+    async def _send_photo(self, params: Dict[str, Any]) -> Any:
+        return self._message(params, photo=self._photo(), caption=params.get('caption'))
+
+    async def _send_media_group(self, params: Dict[str, Any]) -> Any:
+        media = json.loads(params.get('media') or '[]')
+        return [self._message(params, photo=self._photo(), caption=item.get('caption')) for item in media]
+
+    async def _edit_message(self, params: Dict[str, Any]) -> Any:
+        if params.get('inline_message_id'):
+            return True
+        fields: Dict[str, Any] = {'edit_date': int(time.time())}
+        if params.get('text'):
+            fields['text'] = params['text']
+        if params.get('media'):
+            fields['photo'] = self._photo()
+        return self._message(params, **fields)
+
+    # HTTP
+
+    async def _read_params(self, request: web.Request) -> Dict[str, Any]:
+        if request.content_type == 'application/json':
+            return await request.json()
+        params: Dict[str, Any] = {}
+        for key, value in (await request.post()).items():
+            # Файлы только принимаются: содержимое боту обратно не нужно
+            params[key] = value if isinstance(value, str) else value.filename
+        params.update(request.query)
+        return params
+
+    def _fault(self) -> Optional[web.Response]:
+        roll = self.rng.random()
+        if roll < self.retry_after_rate:
+            self.retry_after_sent += 1
+            return web.json_response({
+                'ok': False, 'error_code': 429,
+                'description': f'Too Many Requests: retry after {self.retry_after}',
+                'parameters': {'retry_after': self.retry_after},
+            }, status=429)
+        if roll < self.retry_after_rate + self.error_rate:
+            self.errors_sent += 1
+            return web.json_response({'ok': False, 'error_code': 500, 'description': 'Internal Server Error'}, status=500)
+        return None
+
+    async def _handle_method(self, request: web.Request) -> web.Response:
+        name = request.match_info['method'].lower()
+        self.calls[name] += 1
+        handler = self.handlers.get(name)
+        if handler is None:
+            return web.json_response({'ok': False, 'error_code': 404, 'description': 'Not Found: method not found'}, status=404)
+        params = await self._read_params(request)
+        if name not in FAULT_FREE_METHODS:
+            if self.latency or self.jitter:
+                await asyncio.sleep(self.latency + self.rng.uniform(0, self.jitter))
+            fault = self._fault()
+            if fault is not None:
+                return fault
+        result = await handler(params)
+        self.succeeded[name] += 1
+        for listener in self.listeners:
+            listener(name, params)
+        return web.json_response({'ok': True, 'result': result})
+
+    async def _handle_push(self, request: web.Request) -> web.Response:
+        updates = await request.json()
+        for update in updates if isinstance(updates, list) else [updates]:
+            self.push_update(update)
+        return web.json_response({'ok': True, 'queued': len(self.updates)})
+
+    async def _handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats())
+
+    def stats(self) -> Dict[str, Any]:
+        """Вызовы методов, успешные ответы и внесенные сбои"""
+        return {
+            'calls': dict(self.calls),
+            'succeeded': dict(self.succeeded),
+            'retry_after': self.retry_after_sent,
+            'errors': self.errors_sent,
+            'pending_updates': len(self.updates),
+            'webhook': self.webhook_url,
+        }
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_route('*', '/bot{token}/{method}', self._handle_method)
+        app.router.add_post('/fake/updates', self._handle_push)
+        app.router.add_get('/fake/stats', self._handle_stats)
+        app.on_startup.append(self._open_client)
+        app.on_cleanup.append(self._close_client)
+        return app
+
+    async def _open_client(self, app: web.Application) -> None:
+        self._client = ClientSession()
+
+    async def _close_client(self, app: web.Application) -> None:
+        for task in self._delivery:
+            task.cancel()
+        await self._client.close()
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8081) -> web.AppRunner:
+        """Запускает сервер в текущем event loop; остановка - runner.cleanup()"""
+        runner = web.AppRunner(self.app())
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        return runner
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency', type=float, default=0.0, help='задержка ответа исходящим методам, секунды')
+    parser.add_argument('--jitter', type=float, default=0.0, help='случайная добавка к задержке, до стольких секунд')
+    parser.add_argument('--retry-after-rate', type=float, default=0.0, help='доля ответов 429')
+    parser.add_argument('--retry-after', type=int, default=1, help='retry_after в ответах 429, секунды')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='доля ответов 500')
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    fake = FakeBotApi(args.latency, args.jitter, args.retry_after_rate, args.retry_after, args.error_rate, args.seed)
+    print(f"Bot API: http://{args.host}:{args.port} (TELEGRAM_API_URL для бота)")
+    web.run_app(fake.app(), host=args.host, port=args.port, print=None)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Бенчмарк inline-режима: задержка подготовки ответа с кэшем и без него
+
+Заполняет синтетический каталог (как benchmarks.catalog_search), запускает
+пулы потоков базы данных и измеряет inline_results для набора запросов:
+первый запрос идет в базу, повторные берутся из LRU-кэша.
+
+Запуск: python -m benchmarks.inline_lookup --books 100000 --rounds 50
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from typing import List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.catalog_search import QUERIES, fill_catalog
+from config.inline_catalog import inline_results, invalidate_catalog_cache
+from data.db_executor import start_db_executor, shutdown_db_executor
+from data.migrations import apply_migrations
+from data.models import db
+
+def percentile(samples: List[float], share: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * share))]
+
+async def measure(rounds: int) -> None:
+    cold: List[float] = []
+    warm: List[float] = []
+    for _ in range(rounds):
+        invalidate_catalog_cache()
+        for query in QUERIES + ['']:
+            started = time.perf_counter()
+            await inline_results(query, 0)
+            cold.append((time.perf_counter() - started) * 1000)
+            for offset in (0, 20, 40):
+                started = time.perf_counter()
+                await inline_results(query, offset)
+                warm.append((time.perf_counter() - started) * 1000)
+
+    print(f"{'Ответ':<18}{'p50, мс':>10}{'p99, мс':>10}{'запросов':>10}")
+    for name, samples in (('без кэша', cold), ('из кэша', warm)):
+        print(f"{name:<18}{percentile(samples, 0.5):>10.2f}{percentile(samples, 0.99):>10.2f}{len(samples):>10}")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--books', type=int, default=100000)
+    parser.add_argument('--rounds', type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.configure(os.path.join(tmp, 'inline.db'))
+        apply_migrations()
+        fill_catalog(args.books)
+        db.close()
+
+        start_db_executor()
+        try:
+            print(f"Книг: {args.books}")
+            asyncio.run(measure(args.rounds))
+        finally:
+            shutdown_db_executor()
+
+if __name__ == '__main__':
+    main()
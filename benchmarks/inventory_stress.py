@@ -0,0 +1,164 @@
+"""Стресс-тест склада: параллельные покупатели из нескольких процессов не должны перепродать книги
+
+Создает временную базу с несколькими книгами в ограниченном количестве и запускает
+процессы-обработчики, в каждом - множество одновременных оформлений через пул записи
+бота. Покупатель откладывает книгу (reserve_book), думает, затем подтверждает заказ
+(place_order), отменяет или бросает оформление - такой резерв истекает по TTL и
+возвращается сборщиком, который работает в каждом процессе. Покупателей больше, чем
+книг, поэтому за последние экземпляры идет гонка.
+
+После остановки проверяется, что заказов не больше, чем было книг, и что остаток
+плюс заказы равны исходному количеству. --mode naive оформляет заказ чтением остатка
+и записью нового значения из Python - для сравнения.
+
+Запуск: python -m benchmarks.inventory_stress --processes 4 --buyers 500 --books 5 --stock 20
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Таблица результатов не перемешивается с логом
+os.environ.setdefault('LOG_CONSOLE', 'false')
+
+from peewee import fn
+
+from config.inventory import place_order, release_expired, release_reservation, reserve_book, sweep_reservations
+from data.db_executor import run_db, shutdown_db_executor, start_db_executor
+from data.migrations import apply_migrations
+from data.models import db, Books, Order, OrderStatus, StockReservation
+
+USER_BASE = 1000000
+ORDER_FIELDS = {'fio': 'Иванов Иван Иванович', 'addres': 'Москва', 'phone': '+79000000000', 'book_info': 'Книга'}
+
+def naive_order(book_id: int, **fields: Any) -> Optional[Order]:
+    """Проверка и списание отдельными запросами, как без движка склада"""
+    book = Books.get_by_id(book_id)
+    if book.quantity <= 0:
+        return None
+    order = Order.create(book_id=book_id, **fields)
+    book.quantity -= 1
+    book.save()
+    return order
+
+async def checkout(args: argparse.Namespace, user_id: int, status_id: int, rng: random.Random) -> str:
+    book_id = rng.randint(1, args.books)
+    fields = dict(ORDER_FIELDS, telegram_id=user_id, status=status_id)
+    if args.mode == 'naive':
+        await asyncio.sleep(rng.uniform(0, args.think))
+        return 'ordered' if await run_db(naive_order, book_id, **fields) else 'sold_out'
+
+    reservation_id = await run_db(reserve_book, book_id, user_id, args.ttl)
+    if reservation_id is None:
+        return 'sold_out'
+    await asyncio.sleep(rng.uniform(0, args.think))
+    roll = rng.random()
+    if roll < args.abandon:
+        return 'abandoned'
+    if roll < args.abandon + args.cancel:
+        await run_db(release_reservation, reservation_id, book_id)
+        return 'cancelled'
+    order = await run_db(place_order, reservation_id, book_id, **fields)
+    return 'ordered' if order else 'late_sold_out'
+
+async def run_buyers(index: int, args: argparse.Namespace, status_id: int, start_at: float) -> Counter:
+    rng = random.Random(index)
+    sweeper = asyncio.create_task(sweep_reservations(args.sweep_interval))
+    # Процессы стартуют одновременно, чтобы гонка шла между ними, а не по очереди
+    await asyncio.sleep(max(0.0, start_at - time.time()))
+    try:
+        outcomes = await asyncio.gather(*(
+            checkout(args, USER_BASE + index * args.buyers + buyer, status_id, rng) for buyer in range(args.buyers)
+        ))
+    finally:
+        sweeper.cancel()
+    return Counter(outcomes)
+
+def buyer_process(index: int, path: str, args: argparse.Namespace, status_id: int, start_at: float) -> Counter:
+    db.configure(path)
+    start_db_executor()
+    try:
+        return asyncio.run(run_buyers(index, args, status_id, start_at))
+    finally:
+        shutdown_db_executor()
+
+def seed(args: argparse.Namespace) -> int:
+    apply_migrations()
+    for status in OrderStatus.get_default_statuses():
+        OrderStatus.get_or_create(name=status['name'], defaults=status)
+    Books.insert_many([
+        {'id': book_id, 'name': f'Книга {book_id}', 'author': 'Автор', 'price': 500.0,
+         'description': 'Описание', 'photo': 'book.jpg', 'quantity': args.stock}
+        for book_id in range(1, args.books + 1)
+    ]).execute()
+    return OrderStatus.get(OrderStatus.name == 'new').id
+
+def check(args: argparse.Namespace) -> Dict[str, int]:
+    # Брошенные резервы, которые еще не истекли, возвращаются так же, как их вернул бы сборщик
+    release_expired(datetime.now() + timedelta(seconds=args.ttl + 1))
+    ordered = dict(Order.select(Order.book_id, fn.COUNT(Order.id)).group_by(Order.book_id).tuples())
+    result = Counter(oversold=0, mismatched=0, negative=0)
+    for book in Books.select():
+        orders = ordered.get(book.id, 0)
+        result['oversold'] += max(0, orders - args.stock)
+        result['mismatched'] += int(orders + book.quantity != args.stock)
+        result['negative'] += int(book.quantity < 0)
+    result['reservations'] = StockReservation.select().count()
+    result['orders'] = sum(ordered.values())
+    return result
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mode', choices=('atomic', 'naive'), default='atomic')
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--buyers', type=int, default=500, help='одновременных покупателей в каждом процессе')
+    parser.add_argument('--books', type=int, default=5)
+    parser.add_argument('--stock', type=int, default=20, help='экземпляров каждой книги')
+    parser.add_argument('--think', type=float, default=0.1, help='до стольких секунд покупатель оформляет заказ')
+    parser.add_argument('--ttl', type=float, default=0.05, help='срок резерва, секунд: часть резервов истекает до подтверждения')
+    parser.add_argument('--abandon', type=float, default=0.2, help='доля брошенных оформлений')
+    parser.add_argument('--cancel', type=float, default=0.1, help='доля отмененных оформлений')
+    parser.add_argument('--sweep-interval', type=float, default=0.05)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'inventory.db')
+        db.configure(path)
+        status_id = seed(args)
+        db.close()
+
+        # spawn: процессы открывают свои соединения, как процессы-обработчики бота
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(args.processes, mp_context=context) as pool:
+            start_at = time.time() + 2.0
+            futures = [pool.submit(buyer_process, index, path, args, status_id, start_at) for index in range(args.processes)]
+            outcomes = sum((future.result() for future in futures), Counter())
+        elapsed = time.time() - start_at
+
+        db.configure(path)
+        result = check(args)
+        db.close()
+
+    buyers = args.processes * args.buyers
+    print(f"Режим: {args.mode}, процессов: {args.processes}, покупателей: {buyers}, "
+          f"книг: {args.books} по {args.stock} шт., ядер: {os.cpu_count()}")
+    print("Исходы: " + ", ".join(f"{name} {count}" for name, count in sorted(outcomes.items())))
+    print(f"Заказов: {result['orders']} при {args.books * args.stock} шт. на складе за {elapsed:.2f} с "
+          f"({buyers / elapsed:.0f} оформлений/с)")
+    print(f"Перепродано: {result['oversold']}, книг с расхождением остатка: {result['mismatched']}, "
+          f"с отрицательным остатком: {result['negative']}, резервов осталось: {result['reservations']}")
+    if result['oversold'] or result['mismatched'] or result['negative'] or result['reservations']:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""Бенчмарк выгрузки заказов в файл: время, размер, задержка event loop и память
+
+Для каждого --orders создает временную базу генератором benchmarks.dataset и выгружает
+все заказы в CSV и XLSX тем же кодом, что и команда администратора /export: запись
+файла в пуле соединений для чтения, заказы пачками по ключу (created_at, id). Пока идет
+выгрузка, в event loop работает таймер - его наибольшее опоздание показывает, насколько
+выгрузка задерживает ответы другим пользователям. С --trace-memory печатается пик
+памяти Python: он не должен расти вместе с числом заказов (замеры времени при этом медленнее).
+
+Запуск: python -m benchmarks.order_export --orders 10000 100000 --formats csv xlsx
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Dict
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Таблица результатов не перемешивается с логом
+os.environ.setdefault('LOG_CONSOLE', 'false')
+
+from admin.order_export import ExportFilter, export_orders
+from benchmarks.dataset import generate
+from data.db_executor import run_db_read, shutdown_db_executor, start_db_executor
+from data.models import db
+
+TICK = 0.01
+
+async def measure(path: str, export_format: str, trace_memory: bool) -> Dict[str, float]:
+    lag = 0.0
+
+    async def ticker() -> None:
+        nonlocal lag
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(TICK)
+            lag = max(lag, time.perf_counter() - started - TICK)
+
+    if trace_memory:
+        tracemalloc.start()
+    ticks = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    count = await run_db_read(export_orders, path, export_format, ExportFilter())
+    elapsed = time.perf_counter() - started
+    ticks.cancel()
+    peak = 0
+    if trace_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return {'seconds': elapsed, 'count': count, 'lag_ms': lag * 1000, 'peak_mb': peak / 1024 / 1024}
+
+async def run(args: argparse.Namespace, orders: int, tmp: str) -> None:
+    start_db_executor()
+    try:
+        for export_format in args.formats:
+            path = os.path.join(tmp, f'orders.{export_format}')
+            result = await measure(path, export_format, args.trace_memory)
+            size = os.path.getsize(path) / 1024 / 1024
+            line = (f"{orders:<10}{export_format:<8}{size:>11.1f}{result['seconds']:>9.2f}"
+                    f"{result['count'] / result['seconds']:>10.0f}{result['lag_ms']:>15.1f}")
+            print(line + (f"{result['peak_mb']:>10.1f}" if args.trace_memory else ''))
+            os.remove(path)
+    finally:
+        shutdown_db_executor()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--orders', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--formats', nargs='+', choices=('csv', 'xlsx'), default=['csv', 'xlsx'])
+    parser.add_argument('--trace-memory', action='store_true', help='замерить пик памяти Python во время выгрузки')
+    args = parser.parse_args()
+
+    print(f"Ядер: {os.cpu_count()}")
+    print(f"{'Заказов':<10}{'Формат':<8}{'размер, МБ':>11}{'секунд':>9}{'строк/с':>10}{'опоздание, мс':>15}"
+          + (f"{'пик, МБ':>10}" if args.trace_memory else ''))
+    for orders in args.orders:
+        with tempfile.TemporaryDirectory() as tmp:
+            db.configure(os.path.join(tmp, 'order_export.db'))
+            # Время шагов генератора не смешивается с таблицей
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate(books=1000, orders=orders, dialogs=0, admins=1, users=max(1, orders // 10))
+            db.close()
+            asyncio.run(run(args, orders, tmp))
+
+if __name__ == '__main__':
+    main()
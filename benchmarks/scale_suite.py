@@ -0,0 +1,130 @@
+"""Набор замеров горячих запросов обработчиков на большой базе
+
+Выполняет те же функции и запросы, что и обработчики бота: поиск открытого диалога,
+администраторы, страницы и карточка каталога, поиск, список заказов с фильтрами и
+курсором, счетчики статусов, загрузка и смена статуса заказа, взятие заказа в работу
+и создание заказа. Каждый запрос повторяется со случайными параметрами; печатаются
+p50, p99, максимум и число SQL-запросов на вызов.
+
+Базу создает benchmarks.dataset; замеры записи меняют статусы нескольких заказов
+и добавляют заказы, поэтому для сравнения запусков лучше брать копию базы.
+
+Запуск: python -m benchmarks.scale_suite --db scale.db --repeat 200
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Таблица результатов не перемешивается с логом
+os.environ.setdefault('LOG_CONSOLE', 'false')
+
+from peewee import fn
+
+from admin.order_list import fetch_orders_page, fetch_orders_view
+from admin.order_queue import claim_next_order, invalidate_status_counts, load_status_counts
+from benchmarks.catalog_search import QUERIES
+from benchmarks.dataset import ADMIN_BASE, USER_BASE
+from benchmarks.inline_lookup import percentile
+from config.catalog_search import search_books
+from config.gallery import ALBUM_SIZE, fetch_book_card, fetch_books_page
+from data.models import db, Admin, Books, Dialog, Order, OrderStatus
+from data.query_stats import QueryStats, query_stats
+
+# Техподдержка из обработчика contact_tech_support
+TECH_SUPPORT_ID = 5069224643
+
+def hot_queries(rng: random.Random, users: int) -> List[Tuple[str, Callable[[], Any]]]:
+    """Запросы в том виде, в каком их выполняют обработчики"""
+    books = Books.select(fn.MAX(Books.id)).scalar()
+    orders = Order.select(fn.MAX(Order.id)).scalar()
+    statuses = {status.name: status.id for status in OrderStatus.select()}
+
+    def user() -> int:
+        return USER_BASE + rng.randrange(users)
+
+    def change_status() -> None:
+        # set_order_status: заказ со статусом одним запросом, затем save
+        order = Order.select(Order, OrderStatus).join(OrderStatus).where(Order.id == rng.randint(1, orders)).first()
+        order.status = rng.choice(list(statuses.values()))
+        order.save()
+        invalidate_status_counts()
+
+    def status_counts() -> Any:
+        # Счетчики пересчитываются после каждой смены статуса
+        invalidate_status_counts()
+        return load_status_counts()
+
+    return [
+        ('Открытый диалог пользователя', lambda: Dialog.get_or_none((Dialog.user_id == user()) & (Dialog.is_closed == False))),
+        ('Открытый диалог с техподдержкой', lambda: Dialog.get_or_none(
+            (Dialog.user_id == user()) & (Dialog.admin_id == TECH_SUPPORT_ID) & (Dialog.is_closed == False))),
+        ('Администратор по user_id', lambda: Admin.get_or_none(Admin.user_id == ADMIN_BASE + rng.randrange(50))),
+        ('Администраторы для вопросов', lambda: list(Admin.select().where(Admin.role == 'admin'))),
+        ('Каталог: первая страница', lambda: fetch_books_page()),
+        ('Каталог: страница вперед', lambda: fetch_books_page(after_id=rng.randint(1, books))),
+        ('Каталог: страница назад', lambda: fetch_books_page(before_id=rng.randint(1, books))),
+        ('Каталог: альбом', lambda: fetch_books_page(after_id=rng.randint(1, books), limit=ALBUM_SIZE)),
+        ('Карточка книги', lambda: fetch_book_card(rng.randint(1, books))),
+        ('Поиск по каталогу', lambda: search_books(rng.choice(QUERIES))),
+        ('Заказы: первая страница', lambda: fetch_orders_view()),
+        ('Заказы: новые', lambda: fetch_orders_view(statuses['new'])),
+        ('Заказы: доставленные', lambda: fetch_orders_view(statuses['delivered'])),
+        ('Заказы: за сутки', lambda: fetch_orders_view(period=1)),
+        ('Заказы: дальняя страница', lambda: fetch_orders_page(after_id=rng.randint(1, orders))),
+        ('Заказы: дальняя, по статусу', lambda: fetch_orders_page(statuses['delivered'], after_id=rng.randint(1, orders))),
+        ('Счетчики статусов', status_counts),
+        ('Смена статуса заказа', change_status),
+        ('Взять заказ в работу', claim_next_order),
+        ('Новый заказ', lambda: Order.create(
+            telegram_id=user(), fio='Иванов Иван Иванович', addres='Москва', phone='+79000000000',
+            book_id=rng.randint(1, books), book_info='Книга', status=statuses['new'],
+            created_at=datetime.now(), updated_at=datetime.now())),
+    ]
+
+def measure(name: str, query: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    samples: List[float] = []
+    stats = QueryStats()
+    token = query_stats.set(stats)
+    try:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            query()
+            samples.append((time.perf_counter() - started) * 1000)
+    finally:
+        query_stats.reset(token)
+    return {
+        'p50': percentile(samples, 0.5),
+        'p99': percentile(samples, 0.99),
+        'max': max(samples),
+        'queries': stats.queries / repeat,
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', required=True, help='база из benchmarks.dataset')
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--users', type=int, default=500000, help='размер пула пользователей, как при генерации')
+    parser.add_argument('--slow-ms', type=float, default=10.0, help='отметить запросы с p99 выше, мс')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        parser.error(f"{args.db} не найдена: создайте ее через python -m benchmarks.dataset --db {args.db}")
+    db.configure(args.db)
+    counts = {model.__name__: model.select().count() for model in (Books, Order, Dialog, Admin)}
+    print("База: " + ", ".join(f"{name} {count}" for name, count in counts.items()))
+    print(f"{'Запрос':<34}{'p50, мс':>9}{'p99, мс':>9}{'макс, мс':>10}{'SQL':>6}")
+    rng = random.Random(1)
+    for name, query in hot_queries(rng, args.users):
+        result = measure(name, query, args.repeat)
+        mark = '  <- медленно' if result['p99'] > args.slow_ms else ''
+        print(f"{name:<34}{result['p50']:>9.2f}{result['p99']:>9.2f}{result['max']:>10.2f}{result['queries']:>6.1f}{mark}")
+    db.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Бенчмарк процессов-обработчиков: пропускная способность при 1, 2, 4 и 8 процессах
+
+Создает временную базу через миграции бота, запускает супервизор с N процессами
+и раздает им синтетические текстовые сообщения от множества пользователей.
+Каждое сообщение проходит полный путь в диспетчере: разбор обновления, фильтры,
+состояние FSM в SQLite и поиск открытого диалога. Обращений к Telegram нет.
+Время считается от первого обновления до остановки последнего процесса.
+
+Запуск: python -m benchmarks.sharding_throughput --updates 20000 --workers 1 2 4 8
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from typing import Any, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.webhook_load import text_update
+from config.sharding import Supervisor, run_worker
+from data.migrations import apply_migrations
+from data.models import db
+
+def benchmark_worker(index: int, workers: int, updates: Any, ready: Any) -> None:
+    """Процесс-обработчик с роутерами бота и ботом без сети"""
+    from aiogram import Bot, Dispatcher
+    from admin.state_book_handlers import admin_router
+    from config.handlers import router
+    from config.search_handlers import search_router
+    from config.inline_handlers import inline_router
+    from config.fsm_storage import SQLiteStorage
+
+    dp = Dispatcher(storage=SQLiteStorage())
+    for included in (admin_router, search_router, inline_router, router):
+        dp.include_router(included)
+    asyncio.run(run_worker(dp, Bot(token='123456:benchmark'), index, workers, updates, ready))
+
+def measure(workers: int, updates: int) -> float:
+    supervisor = Supervisor(benchmark_worker, workers)
+    supervisor.start()
+    batch: List[dict] = []
+    started = time.perf_counter()
+    for update_id in range(1, updates + 1):
+        batch.append(text_update(update_id))
+        # Пачки как у getUpdates
+        if len(batch) == 100:
+            supervisor.route(batch)
+            batch = []
+    if batch:
+        supervisor.route(batch)
+    supervisor.stop()
+    return time.perf_counter() - started
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--updates', type=int, default=20000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'sharding.db')
+        # Процессы-обработчики читают путь к базе из окружения; сервер метрик им не нужен
+        os.environ['DB_PATH'] = path
+        os.environ['METRICS_PORT'] = '0'
+        db.configure(path)
+        apply_migrations()
+        db.close()
+
+        print(f"Обновлений: {args.updates}, ядер: {os.cpu_count()}")
+        print(f"{'Процессов':<12}{'секунд':>10}{'обновлений/с':>15}{'ускорение':>12}")
+        baseline = None
+        for workers in args.workers:
+            elapsed = measure(workers, args.updates)
+            rate = args.updates / elapsed
+            baseline = baseline or rate
+            print(f"{workers:<12}{elapsed:>10.2f}{rate:>15.0f}{rate / baseline:>11.2f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""Бенчмарк профиля SQLite: одновременное чтение каталога и запись заказов
+
+Сравнивает настройки по умолчанию (rollback journal, synchronous=FULL,
+одинаковые соединения для чтения и записи) с профилем BotDatabase
+(WAL, synchronous=NORMAL, mmap, кэш, соединения только для чтения).
+
+Запуск: python -m benchmarks.sqlite_profile --seconds 5 --readers 4
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from peewee import SqliteDatabase, OperationalError
+
+from data.database import BotDatabase, default_pragmas
+from data.models import Books, Order, OrderStatus
+
+MODELS = [Books, OrderStatus, Order]
+PAGE_SIZE = 10
+
+def fill_database(database: SqliteDatabase, books: int) -> None:
+    """Создает таблицы и заполняет каталог"""
+    with database.bind_ctx(MODELS):
+        database.create_tables(MODELS)
+        with database.atomic():
+            OrderStatus.insert_many(OrderStatus.get_default_statuses()).execute()
+            rows = [
+                {
+                    'name': f'Книга {i}',
+                    'author': f'Автор {i % 100}',
+                    'price': 100.0 + i % 900,
+                    'description': 'Описание книги для бенчмарка',
+                    'photo': f'photo_{i}',
+                    'quantity': 10,
+                }
+                for i in range(books)
+            ]
+            for start in range(0, len(rows), 500):
+                Books.insert_many(rows[start:start + 500]).execute()
+
+def read_page(books: int, counter: int) -> None:
+    offset = (counter * PAGE_SIZE) % max(books - PAGE_SIZE, 1)
+    list(Books.select().where(Books.id > offset).order_by(Books.id).limit(PAGE_SIZE))
+
+def write_order(counter: int) -> None:
+    Order.insert(
+        telegram_id=1000 + counter,
+        fio='Иванов Иван',
+        addres='Москва',
+        phone='79990000000',
+        book_id=1 + counter % 100,
+        book_info='Книга - Автор',
+        status=1,
+        created_at=datetime.now(),
+        updated_at=datetime.now(),
+    ).execute()
+
+def run_profile(database: SqliteDatabase, readers: int, seconds: float, books: int,
+                reader_setup: Callable[[], None]) -> Dict[str, float]:
+    """Запускает читателей и одного писателя на заданное время"""
+    stop = threading.Event()
+    reads: List[int] = [0] * readers
+    writes = [0]
+    errors = [0]
+
+    def reader(index: int) -> None:
+        reader_setup()
+        database.connect(reuse_if_open=True)
+        counter = 0
+        while not stop.is_set():
+            try:
+                read_page(books, counter)
+                counter += 1
+            except OperationalError:
+                errors[0] += 1
+        reads[index] = counter
+        database.close()
+
+    def writer() -> None:
+        database.connect(reuse_if_open=True)
+        counter = 0
+        while not stop.is_set():
+            try:
+                write_order(counter)
+                counter += 1
+            except OperationalError:
+                errors[0] += 1
+        writes[0] = counter
+        database.close()
+
+    with database.bind_ctx(MODELS):
+        threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+        threads.append(threading.Thread(target=writer))
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    return {
+        'reads_per_sec': sum(reads) / seconds,
+        'writes_per_sec': writes[0] / seconds,
+        'errors': errors[0],
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--books', type=int, default=2000)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        before_path = os.path.join(tmp, 'before.db')
+        before = SqliteDatabase(before_path, check_same_thread=False)
+        fill_database(before, args.books)
+        before.close()
+        results['до (по умолчанию)'] = run_profile(before, args.readers, args.seconds, args.books, lambda: None)
+
+        after_path = os.path.join(tmp, 'after.db')
+        after = BotDatabase(None, check_same_thread=False)
+        after.configure(after_path, default_pragmas())
+        fill_database(after, args.books)
+        after.close()
+        results['после (WAL + читатели)'] = run_profile(after, args.readers, args.seconds, args.books, after.mark_read_only_thread)
+
+    print(f"Читателей: {args.readers}, писателей: 1, длительность: {args.seconds} с, книг: {args.books}")
+    print(f"{'Профиль':<26}{'чтений/с':>12}{'записей/с':>12}{'ошибок':>10}")
+    for name, result in results.items():
+        print(f"{name:<26}{result['reads_per_sec']:>12.0f}{result['writes_per_sec']:>12.0f}{result['errors']:>10}")
+
+if __name__ == '__main__':
+    main()
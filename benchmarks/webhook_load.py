@@ -0,0 +1,121 @@
+"""Нагрузочный тест webhook: время подтверждения обновлений встроенным сервером
+
+Поднимает сервер webhook локально по HTTP без setWebhook (обращений к Telegram нет),
+отправляет синтетические текстовые сообщения с секретным заголовком и измеряет,
+за сколько сервер отвечает 200 и за сколько диспетчер обрабатывает все обновления.
+Такие сообщения попадают в обработчик диалога и только читают базу.
+
+Запуск: python -m benchmarks.webhook_load --updates 5000 --concurrency 100
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiogram import Bot, Dispatcher
+from aiohttp import ClientSession, web
+
+from admin.state_book_handlers import admin_router
+from benchmarks.inline_lookup import percentile
+from config import settings
+from config.handlers import router
+from config.search_handlers import search_router
+from config.inline_handlers import inline_router
+from config.webhook import build_webhook_app
+from data.db_executor import start_db_executor, shutdown_db_executor
+from data.migrations import apply_migrations
+from data.models import db
+
+SECRET = 'benchmark-secret'
+
+def text_update(update_id: int) -> Dict[str, Any]:
+    user_id = 1000000 + update_id % 1000
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': int(time.time()),
+            'chat': {'id': user_id, 'type': 'private'},
+            'from': {'id': user_id, 'is_bot': False, 'first_name': 'Тест'},
+            'text': f'Сообщение {update_id}',
+        },
+    }
+
+async def measure(updates: int, concurrency: int, port: int) -> None:
+    settings.WEBHOOK_SECRET = SECRET
+    dp = Dispatcher()
+    dp.include_router(admin_router)
+    dp.include_router(search_router)
+    dp.include_router(inline_router)
+    dp.include_router(router)
+    processed = 0
+
+    @dp.update.outer_middleware()
+    async def count_processed(handler, event, data):
+        nonlocal processed
+        try:
+            return await handler(event, data)
+        finally:
+            processed += 1
+
+    bot = Bot(token='123456:benchmark')
+    runner = web.AppRunner(build_webhook_app(dp, bot, register=False))
+    await runner.setup()
+    await web.TCPSite(runner, '127.0.0.1', port).start()
+    url = f'http://127.0.0.1:{port}{settings.WEBHOOK_PATH}'
+
+    try:
+        async with ClientSession() as session:
+            async with session.post(url, json=text_update(0), headers={'X-Telegram-Bot-Api-Secret-Token': 'wrong'}) as response:
+                print(f"Неверный секрет: HTTP {response.status}")
+
+            latencies: List[float] = []
+            queue = iter(range(1, updates + 1))
+
+            async def client() -> None:
+                for update_id in queue:
+                    started = time.perf_counter()
+                    async with session.post(url, json=text_update(update_id),
+                                            headers={'X-Telegram-Bot-Api-Secret-Token': SECRET}) as response:
+                        await response.read()
+                        assert response.status == 200, response.status
+                    latencies.append((time.perf_counter() - started) * 1000)
+
+            started = time.perf_counter()
+            await asyncio.gather(*(client() for _ in range(concurrency)))
+            acked = time.perf_counter() - started
+            while processed < updates:
+                await asyncio.sleep(0.01)
+            total = time.perf_counter() - started
+    finally:
+        await runner.cleanup()
+
+    print(f"Обновлений: {updates}, одновременных запросов: {concurrency}")
+    print(f"Подтверждение: p50 {percentile(latencies, 0.5):.2f} мс, p99 {percentile(latencies, 0.99):.2f} мс")
+    print(f"Приняты за {acked:.2f} с ({updates / acked:.0f}/с), обработаны за {total:.2f} с ({updates / total:.0f}/с)")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--updates', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--port', type=int, default=8089)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.configure(os.path.join(tmp, 'webhook.db'))
+        apply_migrations()
+        db.close()
+
+        start_db_executor()
+        try:
+            asyncio.run(measure(args.updates, args.concurrency, args.port))
+        finally:
+            shutdown_db_executor()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+import re
+from typing import Callable, List, NamedTuple, Optional
+
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+
+from config.logger_config import setup_logger, log_debug
+from data.models import db, Books, BooksFts
+
+logger = setup_logger('catalog_search')
+
+# Результатов на одной странице поиска
+PAGE_SIZE = 5
+# Слов запроса, больше не учитываем: длинный запрос почти ничего не находит и медленнее
+MAX_TERMS = 8
+
+# Частые окончания русских слов, от длинных к коротким. Отрезаем одно и ищем по префиксу,
+# чтобы "пушкина" и "книги" находили "Пушкин" и "книга"
+_ENDINGS = (
+    'иями', 'ями', 'ами', 'ого', 'его', 'ому', 'ему', 'ыми', 'ими', 'ией',
+    'ой', 'ей', 'ий', 'ый', 'ая', 'яя', 'ое', 'ее', 'ые', 'ие', 'ом', 'ем',
+    'ым', 'им', 'ых', 'их', 'ах', 'ях', 'ов', 'ев', 'ам', 'ям', 'ую', 'юю',
+    'ия', 'ью', 'ья', 'ье',
+    'а', 'я', 'о', 'е', 'ы', 'и', 'у', 'ю', 'ь', 'й',
+)
+_MIN_STEM = 3
+# Предлоги и союзы: как префикс "и*" совпадают почти со всем каталогом
+_STOP_WORDS = frozenset({
+    'и', 'а', 'в', 'во', 'на', 'не', 'но', 'с', 'со', 'о', 'об', 'по', 'к', 'ко',
+    'от', 'до', 'за', 'из', 'у', 'для', 'или', 'же', 'ли', 'бы',
+})
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+class SearchPage(NamedTuple):
+    books: List[Books]
+    offset: int
+    has_next: bool
+
+_fts_available: Optional[bool] = None
+# Кэши, которые нужно сбросить при изменении каталога (например, inline-результаты)
+_change_listeners: List[Callable[[], None]] = []
+
+def on_catalog_change(listener: Callable[[], None]) -> None:
+    _change_listeners.append(listener)
+
+def notify_catalog_changed() -> None:
+    """Вызывается после добавления, изменения или удаления книги"""
+    for listener in _change_listeners:
+        listener()
+
+def fts_available() -> bool:
+    """Есть ли в базе индекс books_fts (SQLite может быть собран без FTS5)"""
+    global _fts_available
+    if _fts_available is None:
+        row = db.execute_sql("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'books_fts';").fetchone()
+        _fts_available = row is not None
+    return _fts_available
+
+def stem(word: str) -> str:
+    # В индексе ё заменена на е (см. миграцию books_fts)
+    word = word.lower().replace('ё', 'е')
+    for ending in _ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= _MIN_STEM:
+            return word[:-len(ending)]
+    return word
+
+def query_terms(text: str) -> List[str]:
+    words = [word for word in _WORD_RE.findall(text.lower()) if word not in _STOP_WORDS]
+    return [stem(word) for word in words][:MAX_TERMS]
+
+def fts_query(terms: List[str]) -> str:
+    """Строка MATCH: каждое слово в кавычках как префикс, слова объединяются через AND"""
+    return " ".join(f'"{term}"*' for term in terms)
+
+def search_books(text: str, offset: int = 0, limit: int = PAGE_SIZE) -> SearchPage:
+    """Ранжированный поиск по названию, автору и описанию. Выполняется в потоке базы данных"""
+    terms = query_terms(text)
+    if not terms:
+        return SearchPage([], offset, False)
+
+    if fts_available():
+        # Сначала ранжируем только rowid внутри индекса и берем страницу, затем читаем книги страницы.
+        # bm25: совпадение в названии весит больше, чем в авторе, а в авторе больше, чем в описании
+        score = BooksFts.bm25(10.0, 5.0, 1.0)
+        ranked = (BooksFts.select(BooksFts.rowid, score.alias('score'))
+                  .where(BooksFts.match(fts_query(terms)))
+                  .order_by(score, BooksFts.rowid)
+                  .offset(offset)
+                  .limit(limit + 1))
+        query = (Books.select()
+                 .join(ranked, on=(ranked.c.rowid == Books.id))
+                 .order_by(ranked.c.score, Books.id))
+    else:
+        query = Books.select().order_by(Books.id)
+        for term in terms:
+            query = query.where(Books.name.contains(term) | Books.author.contains(term) | Books.description.contains(term))
+        query = query.offset(offset).limit(limit + 1)
+
+    rows = list(query)
+    log_debug(logger, "Поиск по каталогу", {"terms": terms, "offset": offset, "found": len(rows)})
+    return SearchPage(rows[:limit], offset, len(rows) > limit)
+
+def render_results(text: str, page: SearchPage) -> str:
+    if not page.books:
+        return f"🔍 По запросу «{text}» ничего не найдено."
+    lines = [f"🔍 Результаты по запросу «{text}»:", ""]
+    for number, book in enumerate(page.books, start=page.offset + 1):
+        lines.append(f"{number}. 📚 {book.name} — {book.author} ({book.price} руб.)")
+    return "\n".join(lines)
+
+def results_keyboard(page: SearchPage) -> InlineKeyboardMarkup:
+    """Кнопки открытия карточек search_book_{id} и навигация search_page_{offset}"""
+    rows = [
+        [InlineKeyboardButton(text=f"{number}. {book.name}"[:60], callback_data=f"search_book_{book.id}")]
+        for number, book in enumerate(page.books, start=page.offset + 1)
+    ]
+    navigation = []
+    if page.offset > 0:
+        navigation.append(InlineKeyboardButton(text="◀️ Назад", callback_data=f"search_page_{max(page.offset - PAGE_SIZE, 0)}"))
+    if page.has_next:
+        navigation.append(InlineKeyboardButton(text="Вперед ▶️", callback_data=f"search_page_{page.offset + PAGE_SIZE}"))
+    if navigation:
+        rows.append(navigation)
+    return InlineKeyboardMarkup(inline_keyboard=rows)
@@ -0,0 +1,186 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Mapping, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, StateType, StorageKey
+from peewee import chunked
+
+from config import settings
+from config.logger_config import setup_logger, log_debug, log_info, log_error
+from data.db_executor import run_db, run_db_read
+from data.models import db, FsmState
+
+logger = setup_logger('fsm_storage')
+
+# Как часто удалять из базы брошенные состояния, секунд
+SWEEP_INTERVAL = 600.0
+
+class _Record:
+    """Неизменяемый снимок состояния: запись заменяется целиком, поэтому ее можно отдавать без копирования"""
+    __slots__ = ('state', 'data', 'updated_at')
+
+    def __init__(self, state: Optional[str], data: str, updated_at: Optional[datetime]):
+        self.state = state
+        self.data = data
+        self.updated_at = updated_at
+
+    @property
+    def empty(self) -> bool:
+        return self.state is None and self.data == '{}'
+
+EMPTY = _Record(None, '{}', None)
+
+def load_record(key: str) -> Optional[_Record]:
+    row = FsmState.select(FsmState.state, FsmState.data, FsmState.updated_at).where(FsmState.key == key).first()
+    return _Record(row.state, row.data, row.updated_at) if row else None
+
+def write_records(records: Dict[str, _Record]) -> None:
+    """Записывает пачку изменений одной транзакцией; пустые состояния удаляются. Выполняется в потоке-писателе"""
+    rows = [
+        {'key': key, 'state': record.state, 'data': record.data, 'updated_at': record.updated_at}
+        for key, record in records.items() if not record.empty
+    ]
+    removed = [key for key, record in records.items() if record.empty]
+    with db.atomic():
+        for batch in chunked(rows, 100):
+            FsmState.insert_many(batch).on_conflict_replace().execute()
+        for batch in chunked(removed, 500):
+            FsmState.delete().where(FsmState.key.in_(batch)).execute()
+
+def delete_expired(before: datetime) -> int:
+    return FsmState.delete().where(FsmState.updated_at < before).execute()
+
+class SQLiteStorage(BaseStorage):
+    """Хранилище FSM в таблице fsmstate.
+
+    Горячие состояния лежат в LRU-кэше, изменения копятся и раз в FSM_FLUSH_INTERVAL
+    записываются в базу одной транзакцией. Состояние без изменений дольше
+    FSM_STATE_TTL считается брошенным: оно не читается и периодически удаляется.
+    """
+
+    def __init__(self, cache_size: Optional[int] = None, flush_interval: Optional[float] = None,
+                 ttl: Optional[int] = None):
+        self.key_builder = DefaultKeyBuilder(with_bot_id=True, with_destiny=True)
+        self.cache_size = cache_size or settings.FSM_CACHE_SIZE
+        self.flush_interval = flush_interval or settings.FSM_FLUSH_INTERVAL
+        self.ttl = settings.FSM_STATE_TTL if ttl is None else ttl
+        self._cache: 'OrderedDict[str, _Record]' = OrderedDict()
+        # Изменения, еще не отданные в базу, и пачка, которая пишется прямо сейчас
+        self._dirty: Dict[str, _Record] = {}
+        self._flushing: Dict[str, _Record] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._last_sweep = time.monotonic()
+        self.loads = 0
+        self.flushes = 0
+
+    def _expired(self, record: _Record, now: datetime) -> bool:
+        return bool(self.ttl) and record.updated_at is not None \
+            and record.updated_at < now - timedelta(seconds=self.ttl)
+
+    def _pending(self, key: str) -> Optional[_Record]:
+        return self._dirty.get(key) or self._flushing.get(key) or self._cache.get(key)
+
+    def _remember(self, key: str, record: _Record) -> None:
+        self._cache[key] = record
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            # Несохраненные изменения остаются в _dirty, так что вытеснение их не теряет
+            self._cache.popitem(last=False)
+
+    async def _get(self, key: StorageKey) -> _Record:
+        name = self.key_builder.build(key)
+        record = self._pending(name)
+        if record is None:
+            loaded = await run_db_read(load_record, name)
+            self.loads += 1
+            # Пока шло чтение, состояние могли изменить
+            record = self._pending(name) or loaded or EMPTY
+        if self._expired(record, datetime.now()):
+            record = EMPTY
+        self._remember(name, record)
+        return record
+
+    def _put(self, key: StorageKey, state: Optional[str], data: str) -> None:
+        name = self.key_builder.build(key)
+        record = _Record(state, data, datetime.now())
+        self._remember(name, record)
+        self._dirty[name] = record
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        record = await self._get(key)
+        self._put(key, state.state if isinstance(state, State) else state, record.data)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return (await self._get(key)).state
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        # Сериализуем сразу, чтобы несохраняемое значение падало в обработчике, а не при записи
+        serialized = json.dumps(dict(data), ensure_ascii=False)
+        record = await self._get(key)
+        self._put(key, record.state, serialized)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        return json.loads((await self._get(key)).data)
+
+    async def flush(self) -> None:
+        """Записывает накопленные изменения в базу"""
+        if not self._dirty:
+            return
+        self._flushing, self._dirty = self._dirty, {}
+        try:
+            await run_db(write_records, self._flushing)
+            self.flushes += 1
+            log_debug(logger, "Состояния FSM записаны", {"count": len(self._flushing)})
+        except BaseException:
+            # Вернем несохраненное (в том числе при отмене), не затирая более новые изменения
+            for name, record in self._flushing.items():
+                self._dirty.setdefault(name, record)
+            raise
+        finally:
+            self._flushing = {}
+
+    async def sweep(self) -> int:
+        """Удаляет брошенные состояния из базы и кэша"""
+        now = datetime.now()
+        self._last_sweep = time.monotonic()
+        for name in [name for name, record in self._cache.items() if self._expired(record, now)]:
+            del self._cache[name]
+        removed = await run_db(delete_expired, now - timedelta(seconds=self.ttl))
+        if removed:
+            log_info(logger, "Удалены брошенные состояния FSM", {"count": removed})
+        return removed
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+                if self.ttl and time.monotonic() - self._last_sweep >= SWEEP_INTERVAL:
+                    await self.sweep()
+            except Exception as e:
+                log_error(logger, e, "Ошибка при записи состояний FSM")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "cached": len(self._cache),
+            "dirty": len(self._dirty),
+            "loads": self.loads,
+            "flushes": self.flushes,
+        }
+
+    async def close(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush()
+        log_info(logger, "Хранилище FSM закрыто", self.stats())
@@ -0,0 +1,168 @@
+from typing import List, NamedTuple, Optional, Tuple
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton, InputMediaPhoto
+
+from config.logger_config import setup_logger, log_debug, log_warning
+from config.media import send_with_photo, send_with_photos, looks_like_file_id, local_photo_path
+from data.models import Books
+
+logger = setup_logger('gallery')
+
+# Подпись к фото в Telegram ограничена 1024 символами
+CAPTION_LIMIT = 1024
+# В одном альбоме (sendMediaGroup) от 2 до 10 фото
+ALBUM_SIZE = 10
+
+class GalleryPage(NamedTuple):
+    books: List[Books]
+    has_prev: bool
+    has_next: bool
+
+def fetch_books_page(after_id: Optional[int] = None, before_id: Optional[int] = None, limit: int = 1) -> GalleryPage:
+    """Страница каталога по ключу Books.id. Выполняется в потоке базы данных"""
+    query = Books.select()
+    if before_id is not None:
+        # Листаем назад: берем ближайшие меньшие id и разворачиваем
+        rows = list(query.where(Books.id < before_id).order_by(Books.id.desc()).limit(limit + 1))
+        has_prev = len(rows) > limit
+        books = list(reversed(rows[:limit]))
+        has_next = True
+    else:
+        if after_id is not None:
+            query = query.where(Books.id > after_id)
+        rows = list(query.order_by(Books.id).limit(limit + 1))
+        has_next = len(rows) > limit
+        books = rows[:limit]
+        has_prev = bool(books) and Books.select().where(Books.id < books[0].id).exists()
+    return GalleryPage(books, has_prev, has_next)
+
+def fetch_book_card(book_id: int) -> Optional[GalleryPage]:
+    """Страница каталога из одной книги с признаками соседей. Выполняется в потоке базы данных"""
+    book = Books.get_or_none(Books.id == book_id)
+    if not book:
+        return None
+    has_prev = Books.select().where(Books.id < book.id).exists()
+    has_next = Books.select().where(Books.id > book.id).exists()
+    return GalleryPage([book], has_prev, has_next)
+
+def book_caption(book: Books) -> str:
+    caption = (
+        f"📚 *{book.name}*\n"
+        f"✍️ Автор: {book.author}\n"
+        f"💰 Цена: {book.price} руб.\n"
+        f"📦 В наличии: {book.quantity} шт.\n"
+        f"📝 Описание: {book.description}"
+    )
+    if len(caption) > CAPTION_LIMIT:
+        caption = caption[:CAPTION_LIMIT - 1] + "…"
+    return caption
+
+def card_keyboard(page: GalleryPage, prefix: str, action_rows: List[List[InlineKeyboardButton]]) -> InlineKeyboardMarkup:
+    """Клавиатура карточки: кнопки действий и навигация prefix_prev_{id} / prefix_next_{id}"""
+    navigation = []
+    if page.has_prev:
+        navigation.append(InlineKeyboardButton(text="◀️ Назад", callback_data=f"{prefix}_prev_{page.books[0].id}"))
+    if page.has_next:
+        navigation.append(InlineKeyboardButton(text="Вперед ▶️", callback_data=f"{prefix}_next_{page.books[-1].id}"))
+    rows = list(action_rows)
+    if navigation:
+        rows.append(navigation)
+    return InlineKeyboardMarkup(inline_keyboard=rows)
+
+def parse_page_callback(data: str) -> Optional[Tuple[str, int]]:
+    """Разбирает prefix_next_{id} / prefix_prev_{id} в (направление, id)"""
+    parts = data.rsplit("_", 2)
+    if len(parts) != 3 or parts[1] not in ("next", "prev"):
+        return None
+    try:
+        return parts[1], int(parts[2])
+    except ValueError:
+        return None
+
+def _has_photo(book: Books) -> bool:
+    return looks_like_file_id(book.photo) or local_photo_path(book.photo) is not None
+
+async def send_book_card(message: Message, book: Books, keyboard: InlineKeyboardMarkup) -> None:
+    """Отправляет карточку книги новым сообщением"""
+    caption = book_caption(book)
+    if book.photo:
+        try:
+            sent = await send_with_photo(
+                book.photo,
+                lambda photo: message.answer_photo(photo, caption=caption, parse_mode="Markdown", reply_markup=keyboard)
+            )
+            if sent is not None:
+                return
+        except TelegramBadRequest as e:
+            log_warning(logger, "Не удалось отправить фото книги", {"book_id": book.id, "error": str(e)})
+    await message.answer(caption, parse_mode="Markdown", reply_markup=keyboard)
+
+async def replace_book_card(message: Message, book: Books, keyboard: InlineKeyboardMarkup) -> None:
+    """Отправляет карточку заново и удаляет старую: текст нельзя отредактировать в фото и обратно"""
+    await send_book_card(message, book, keyboard)
+    try:
+        await message.delete()
+    except TelegramBadRequest as e:
+        # Сообщения старше 48 часов бот удалить не может - старая карточка просто останется выше
+        log_warning(logger, "Не удалось удалить прежнюю карточку книги", {"error": str(e)})
+
+async def edit_book_card(message: Message, book: Books, keyboard: InlineKeyboardMarkup) -> None:
+    """Показывает другую книгу в уже отправленной карточке"""
+    caption = book_caption(book)
+    try:
+        if message.photo and book.photo:
+            try:
+                edited = await send_with_photo(
+                    book.photo,
+                    lambda photo: message.edit_media(
+                        InputMediaPhoto(media=photo, caption=caption, parse_mode="Markdown"),
+                        reply_markup=keyboard
+                    )
+                )
+            except TelegramBadRequest as e:
+                if "message is not modified" in str(e):
+                    raise
+                log_warning(logger, "Не удалось заменить фото книги", {"book_id": book.id, "error": str(e)})
+                edited = None
+            if edited is None:
+                # Под новой подписью не должно остаться фото прежней книги
+                await replace_book_card(message, book, keyboard)
+        elif not message.photo and not _has_photo(book):
+            await message.edit_text(caption, parse_mode="Markdown", reply_markup=keyboard)
+        else:
+            await replace_book_card(message, book, keyboard)
+    except TelegramBadRequest as e:
+        # Повторное нажатие на ту же кнопку: сообщение не изменилось
+        if "message is not modified" not in str(e):
+            raise
+        log_debug(logger, "Карточка книги не изменилась", {"book_id": book.id})
+
+def album_caption(book: Books) -> str:
+    return f"📚 {book.name}\n✍️ {book.author}\n💰 {book.price} руб."
+
+def album_text(page: GalleryPage) -> str:
+    lines = ["📚 Книги на этой странице:", ""]
+    for number, book in enumerate(page.books, start=1):
+        lines.append(f"{number}. {book.name} — {book.author}, {book.price} руб.")
+    return "\n".join(lines)
+
+async def send_album(message: Message, page: GalleryPage, text: str, keyboard: InlineKeyboardMarkup) -> None:
+    """Страница каталога двумя запросами: альбом фото с подписями и одно сообщение с кнопками"""
+    books = [book for book in page.books if _has_photo(book)]
+    try:
+        if len(books) >= 2:
+            await send_with_photos(
+                [book.photo for book in books],
+                lambda media: message.answer_media_group([
+                    InputMediaPhoto(media=photo, caption=album_caption(book))
+                    for photo, book in zip(media, books)
+                ])
+            )
+        elif books:
+            book = books[0]
+            await send_with_photo(book.photo, lambda photo: message.answer_photo(photo, caption=album_caption(book)))
+    except TelegramBadRequest as e:
+        # Кнопки и список книг все равно отправим ниже
+        log_warning(logger, "Не удалось отправить альбом каталога", {"error": str(e)})
+    await message.answer(text, reply_markup=keyboard)
@@ -3,35 +3,20 @@ from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKe
 from aiogram.filters import Command
 from data.models import Greeting, Admin, Dialog
 from config.keyboards import greetings_kb
-from data.models import Books
 from config.state_order_handlers import AskQuestionState
 from aiogram.fsm.context import FSMContext
 from typing import cast, Optional, Union
-from datetime import datetime, timedelta
+from datetime import datetime
 from config.logger_config import setup_logger, log_error, log_info, log_debug, log_warning
+from data.db_executor import run_db_read, db_get_or_none, db_fetch_all, db_create, db_save
+from admin.admin_registry import is_admin
+from config.gallery import (GalleryPage, ALBUM_SIZE, fetch_books_page, fetch_book_card, card_keyboard, parse_page_callback,
+                            send_book_card, edit_book_card, send_album, album_text)
 
 # Настройка логгера
 logger = setup_logger('handlers')
 
-router = Router()
-
-# Словарь для защиты от спама: {user_id: last_message_time}
-spam_protection: dict[int, datetime] = {}
-
-def is_spam(user_id: int) -> bool:
-    """Проверяет, не спамит ли пользователь"""
-    try:
-        current_time = datetime.now()
-        if user_id in spam_protection:
-            last_message_time = spam_protection[user_id]
-            if current_time - last_message_time < timedelta(seconds=5):  # 5 секунд между сообщениями
-                log_warning(logger, f"Обнаружен спам от пользователя {user_id}")
-                return True
-        spam_protection[user_id] = current_time
-        return False
-    except Exception as e:
-        log_error(logger, e, f"Ошибка при проверке спама для пользователя {user_id}")
-        return False
+router = Router(name="router")
 
 @router.message(Command("start"))
 async def cmd_start(message: Message) -> None:
@@ -43,11 +28,11 @@ async def cmd_start(message: Message) -> None:
         log_debug(logger, "Обработка команды /start", {"user_id": message.from_user.id})
             
         # Check if the user is an admin. If so, let the admin_router handle it.
-        if Admin.get_or_none(Admin.user_id == message.from_user.id):
+        if is_admin(message.from_user.id):
             log_debug(logger, "Пользователь является администратором", {"user_id": message.from_user.id})
             return # Do not send a keyboard if the user is an admin
 
-        great = Greeting.get_or_none()
+        great = await db_get_or_none(Greeting)
         if great:
             log_debug(logger, "Отправка приветствия", {"text": great.text[:50] + "..."})
             await message.answer(great.text, reply_markup=greetings_kb)
@@ -71,7 +56,8 @@ async def help(message: Message) -> None:
             "📚 *Бот книжного магазина*\n\n"
             "*Основные команды:*\n"
             "/start - Начать взаимодействие с ботом\n"
-            "/help - Показать эту справку\n\n"
+            "/help - Показать эту справку\n"
+            "/search - Поиск книг по названию, автору и описанию\n\n"
             "*Функционал:*\n"
             "1. *Галерея книг* 📚\n"
             "   - Просмотр доступных книг\n"
@@ -108,112 +94,123 @@ async def help(message: Message) -> None:
         log_error(logger, e, "Ошибка в обработчике help")
         await message.answer("Произошла ошибка. Пожалуйста, попробуйте позже.")
 
+def gallery_keyboard(page: GalleryPage) -> InlineKeyboardMarkup:
+    book = page.books[0]
+    return card_keyboard(page, "gallery", [
+        [InlineKeyboardButton(text=f"Заказать {book.name}", callback_data=f"order_book_{book.id}")],
+        [InlineKeyboardButton(text="🗂 Показать альбомом", callback_data="gallery_album")]
+    ])
+
+def album_keyboard(page: GalleryPage) -> InlineKeyboardMarkup:
+    """Одна клавиатура на весь альбом: подробнее и заказ для каждой книги, навигация album_prev/album_next"""
+    return card_keyboard(page, "album", [
+        [
+            InlineKeyboardButton(text=f"ℹ️ {number}. {book.name}"[:40], callback_data=f"gallery_card_{book.id}"),
+            InlineKeyboardButton(text="🛒 Заказать", callback_data=f"order_book_{book.id}")
+        ]
+        for number, book in enumerate(page.books, start=1)
+    ])
+
 @router.callback_query(F.data == "books_gallery")
 async def go_in_gallery(callback: CallbackQuery) -> None:
+    # Отвечаем сразу, чтобы у пользователя не крутились часики
+    await callback.answer()
     try:
         if not callback.message or isinstance(callback.message, InaccessibleMessage):
             log_warning(logger, "Получен недоступный callback message")
-            await callback.answer()
             return
             
         log_debug(logger, "Обработка запроса галереи книг", {"user_id": callback.from_user.id})
+        message_obj = cast(Message, callback.message)
             
-        books = Books.select()
-        if not books:
+        page = await run_db_read(fetch_books_page)
+        if not page.books:
             log_warning(logger, "В базе нет книг")
-            message_obj = cast(Message, callback.message)
             await message_obj.answer(text="В базе нет книг.")
-            await callback.answer()
             return
         
-        for book in books:
-            try:
-                log_debug(logger, "Отправка информации о книге", {
-                    "book_id": book.id,
-                    "name": book.name,
-                    "user_id": callback.from_user.id
-                })
-                
-                if book.photo:
-                    # Отправляем фото, если оно есть
-                    message_obj = cast(Message, callback.message)
-                    await message_obj.answer_photo(book.photo)
-                
-                order_kb = InlineKeyboardMarkup(
-                    inline_keyboard=[
-                        [InlineKeyboardButton(text=f"Заказать {book.name}", callback_data=f"order_book_{book.id}")]
-                    ]
-                )
-                message_obj = cast(Message, callback.message)
-                await message_obj.answer(
-                    f"📚 *{book.name}*\n"
-                    f"✍️ Автор: {book.author}\n"
-                    f"💰 Цена: {book.price} руб.\n"
-                    f"📦 В наличии: {book.quantity} шт.\n"
-                    f"📝 Описание: {book.description}",
-                    parse_mode="Markdown",
-                    reply_markup=order_kb
-                )
-            except Exception as e:
-                log_error(logger, e, f"Ошибка при отправке информации о книге {book.id}")
-                continue
-        
-        message_obj = cast(Message, callback.message)
-        await message_obj.answer("Выберите действие:")
-        await callback.answer()
+        await send_book_card(message_obj, page.books[0], gallery_keyboard(page))
     except Exception as e:
         log_error(logger, e, "Ошибка в обработчике books_gallery")
         if callback.message and not isinstance(callback.message, InaccessibleMessage):
             message_obj = cast(Message, callback.message)
             await message_obj.answer("Произошла ошибка при загрузке каталога. Пожалуйста, попробуйте позже.")
-        await callback.answer()
 
-@router.callback_query(F.data.startswith("order_book_"))
-async def process_order(callback: CallbackQuery):
-    if not callback.data:
-        log_warning(logger, "Получен пустой callback_data")
-        await callback.answer()
-        return
-        
-    # Получаем ID книги из callback_data
+@router.callback_query(F.data.startswith("gallery_next_") | F.data.startswith("gallery_prev_"))
+async def gallery_page(callback: CallbackQuery) -> None:
+    await callback.answer()
     try:
-        book_id = int(callback.data.split("_")[-1])
-        log_debug(logger, "Обработка заказа книги", {
-            "book_id": book_id,
-            "user_id": callback.from_user.id
-        })
-    except (ValueError, IndexError):
-        log_error(logger, ValueError("Неверный формат callback_data"), f"callback_data: {callback.data}")
-        if callback.message and isinstance(callback.message, Message) and not isinstance(callback.message, InaccessibleMessage):
-            await callback.message.answer("Ошибка при обработке заказа")
-        await callback.answer()
-        return
-    
-    # Получаем информацию о книге
-    book = Books.get_or_none(Books.id == book_id)
-    if not book:
-        log_warning(logger, f"Книга не найдена", {"book_id": book_id})
-        if callback.message and isinstance(callback.message, Message) and not isinstance(callback.message, InaccessibleMessage):
-            await callback.message.answer("Книга не найдена")
-        await callback.answer()
-        return
-    
-    # Здесь можно добавить логику оформления заказа
-    if callback.message and isinstance(callback.message, Message) and not isinstance(callback.message, InaccessibleMessage):
-        log_debug(logger, "Отправка формы заказа", {
-            "book_id": book.id,
-            "name": book.name,
-            "user_id": callback.from_user.id
-        })
-        await callback.message.answer(
-            f"Вы выбрали книгу:\n"
-            f"Название: {book.name}\n"
-            f"Автор: {book.author}\n"
-            f"Цена: {book.price} руб.\n\n"
-            f"Для оформления заказа введите свои данные в формате:\n"
-            f"ФИО, адрес, телефон"
-        )
+        if not callback.data or not callback.message or isinstance(callback.message, InaccessibleMessage):
+            return
+
+        parsed = parse_page_callback(callback.data)
+        if not parsed:
+            log_warning(logger, "Неверный формат callback_data галереи", {"callback_data": callback.data})
+            return
+        direction, book_id = parsed
+
+        if direction == "next":
+            page = await run_db_read(fetch_books_page, after_id=book_id)
+        else:
+            page = await run_db_read(fetch_books_page, before_id=book_id)
+        if not page.books:
+            log_debug(logger, "Страница галереи пуста", {"callback_data": callback.data})
+            return
+
+        await edit_book_card(cast(Message, callback.message), page.books[0], gallery_keyboard(page))
+    except Exception as e:
+        log_error(logger, e, "Ошибка при листании галереи")
+
+@router.callback_query(F.data == "gallery_album")
+async def gallery_album(callback: CallbackQuery) -> None:
+    await callback.answer()
+    try:
+        if not callback.message or isinstance(callback.message, InaccessibleMessage):
+            return
+        page = await run_db_read(fetch_books_page, limit=ALBUM_SIZE)
+        if not page.books:
+            await callback.message.answer(text="В базе нет книг.")
+            return
+        await send_album(cast(Message, callback.message), page, album_text(page), album_keyboard(page))
+    except Exception as e:
+        log_error(logger, e, "Ошибка при показе каталога альбомом")
+
+@router.callback_query(F.data.startswith("album_next_") | F.data.startswith("album_prev_"))
+async def gallery_album_page(callback: CallbackQuery) -> None:
     await callback.answer()
+    try:
+        if not callback.data or not callback.message or isinstance(callback.message, InaccessibleMessage):
+            return
+        parsed = parse_page_callback(callback.data)
+        if not parsed:
+            log_warning(logger, "Неверный формат callback_data альбома", {"callback_data": callback.data})
+            return
+        direction, book_id = parsed
+
+        if direction == "next":
+            page = await run_db_read(fetch_books_page, after_id=book_id, limit=ALBUM_SIZE)
+        else:
+            page = await run_db_read(fetch_books_page, before_id=book_id, limit=ALBUM_SIZE)
+        if not page.books:
+            return
+        await send_album(cast(Message, callback.message), page, album_text(page), album_keyboard(page))
+    except Exception as e:
+        log_error(logger, e, "Ошибка при листании альбома")
+
+@router.callback_query(F.data.startswith("gallery_card_"))
+async def gallery_card(callback: CallbackQuery) -> None:
+    """Подробная карточка книги из альбома; дальше можно листать по одной"""
+    await callback.answer()
+    try:
+        if not callback.data or not callback.message or isinstance(callback.message, InaccessibleMessage):
+            return
+        page = await run_db_read(fetch_book_card, int(callback.data.rsplit("_", 1)[1]))
+        if not page:
+            await callback.message.answer("Книга не найдена.")
+            return
+        await send_book_card(cast(Message, callback.message), page.books[0], gallery_keyboard(page))
+    except Exception as e:
+        log_error(logger, e, "Ошибка при показе карточки книги")
 
 # Новый обработчик для кнопки "Задать вопрос"
 @router.callback_query(F.data == "ask_question_start")
@@ -229,7 +226,7 @@ async def ask_question_start(callback: CallbackQuery, state: FSMContext):
         message_obj = cast(Message, callback.message)
 
         # Получаем всех администраторов, кроме техподдержки
-        admins = Admin.select().where(Admin.role == 'admin')
+        admins = await db_fetch_all(Admin.select().where(Admin.role == 'admin'))
         
         keyboard_buttons = []
         for admin in admins:
@@ -279,7 +276,7 @@ async def select_admin_for_question(callback: CallbackQuery, state: FSMContext):
             await callback.answer()
             return
 
-        admin = Admin.get_or_none(Admin.user_id == admin_user_id)
+        admin = await db_get_or_none(Admin, Admin.user_id == admin_user_id)
         if not admin:
             log_warning(logger, "Выбранный администратор не найден", {"admin_user_id": admin_user_id})
             await message_obj.answer("Выбранный администратор не найден. Пожалуйста, попробуйте еще раз.")
@@ -321,7 +318,8 @@ async def process_user_question(message: Message, state: FSMContext):
             return
         
         # Создаем новую запись в таблице Dialog
-        dialog = Dialog.create(
+        dialog = await db_create(
+            Dialog,
             user_id=user_id,
             admin_id=selected_admin_id,
             question=question_text,
@@ -332,7 +330,7 @@ async def process_user_question(message: Message, state: FSMContext):
         log_info(logger, "Новый диалог создан", {"dialog_id": dialog.id, "user_id": user_id, "admin_id": selected_admin_id})
 
         # Уведомляем администратора
-        admin = Admin.get_or_none(Admin.user_id == selected_admin_id)
+        admin = await db_get_or_none(Admin, Admin.user_id == selected_admin_id)
         if admin:
             try:
                 reply_markup = InlineKeyboardMarkup(inline_keyboard=[
@@ -349,7 +347,7 @@ async def process_user_question(message: Message, state: FSMContext):
                 else:
                     log_warning(logger, "Бот объект недоступен для отправки сообщения администратору.", {"admin_id": admin.user_id})
                     dialog.is_closed = True # Временное решение, чтобы диалог не висел открытым
-                    dialog.save()
+                    await db_save(dialog)
                     await message.answer("Ваш вопрос отправлен, но возникла проблема с уведомлением администратора. Мы постараемся ответить как можно скорее.")
                     await state.clear()
                     return
@@ -357,7 +355,7 @@ async def process_user_question(message: Message, state: FSMContext):
                 log_error(logger, e, f"Не удалось уведомить администратора {admin.user_id} о новом вопросе. User ID: {user_id}, Question: {question_text[:50]}...")
                 # Если не удалось уведомить администратора, можно удалить диалог или пометить его как требующий внимания
                 dialog.is_closed = True # Временное решение, чтобы диалог не висел открытым
-                dialog.save()
+                await db_save(dialog)
                 await message.answer("Ваш вопрос отправлен, но возникла проблема с уведомлением администратора. Мы постараемся ответить как можно скорее.")
                 await state.clear()
                 return
@@ -381,7 +379,7 @@ async def reply_to_question(callback: CallbackQuery, state: FSMContext) -> None:
 
     try:
         dialog_id = int(callback.data.split("_")[-1])
-        dialog = Dialog.get_or_none(Dialog.id == dialog_id)
+        dialog = await db_get_or_none(Dialog, Dialog.id == dialog_id)
         
         if not dialog:
             await callback.answer("❌ Диалог не найден", show_alert=True)
@@ -421,7 +419,7 @@ async def process_admin_answer(message: Message, state: FSMContext):
         await state.clear()
         return
 
-    dialog = Dialog.get_or_none(Dialog.id == dialog_id)
+    dialog = await db_get_or_none(Dialog, Dialog.id == dialog_id)
     if not dialog:
         await message.answer("❌ Диалог не найден")
         await state.clear()
@@ -434,7 +432,7 @@ async def process_admin_answer(message: Message, state: FSMContext):
 
     # Обновляем диалог
     dialog.answer = message.text
-    dialog.save()
+    await db_save(dialog)
 
     # Отправляем ответ пользователю
     try:
@@ -458,7 +456,7 @@ async def close_dialog(callback: CallbackQuery):
 
     try:
         dialog_id = int(callback.data.split("_")[-1])
-        dialog = Dialog.get_or_none(Dialog.id == dialog_id)
+        dialog = await db_get_or_none(Dialog, Dialog.id == dialog_id)
         
         if not dialog:
             await callback.answer("❌ Диалог не найден", show_alert=True)
@@ -470,7 +468,7 @@ async def close_dialog(callback: CallbackQuery):
 
         # Закрываем диалог
         dialog.is_closed = True
-        dialog.save()
+        await db_save(dialog)
 
         # Уведомляем пользователя
         try:
@@ -498,7 +496,8 @@ async def continue_dialog(message: Message):
         return
 
     # Ищем активный диалог пользователя
-    dialog = Dialog.get_or_none(
+    dialog = await db_get_or_none(
+        Dialog,
         (Dialog.user_id == message.from_user.id) & 
         (Dialog.is_closed == False)
     )
@@ -507,7 +506,7 @@ async def continue_dialog(message: Message):
         return  # Если нет активного диалога, игнорируем сообщение
 
     # Получаем администратора
-    admin = Admin.get_or_none(Admin.user_id == dialog.admin_id)
+    admin = await db_get_or_none(Admin, Admin.user_id == dialog.admin_id)
     if not admin:
         return
 
@@ -548,7 +547,8 @@ async def contact_tech_support(callback: CallbackQuery, state: FSMContext):
         log_debug(logger, "Запрос на связь с техподдержкой", {"user_id": user_id})
 
         # Проверяем, есть ли уже открытый диалог с техподдержкой
-        existing_dialog = Dialog.get_or_none(
+        existing_dialog = await db_get_or_none(
+            Dialog,
             (Dialog.user_id == user_id) & 
             (Dialog.admin_id == tech_support_id) & 
             (Dialog.is_closed == False)
@@ -562,7 +562,8 @@ async def contact_tech_support(callback: CallbackQuery, state: FSMContext):
             return
         
         # Создаем новую запись в таблице Dialog
-        dialog = Dialog.create(
+        dialog = await db_create(
+            Dialog,
             user_id=user_id,
             admin_id=tech_support_id,
             question="Пользователь запросил связь с техподдержкой.", # Начальное сообщение
@@ -588,7 +589,7 @@ async def contact_tech_support(callback: CallbackQuery, state: FSMContext):
             else:
                 log_warning(logger, "Бот объект недоступен для отправки сообщения техподдержке.", {"tech_support_id": tech_support_id})
                 dialog.is_closed = True # Временное решение
-                dialog.save()
+                await db_save(dialog)
                 message_obj = cast(Message, callback.message)
                 await message_obj.answer("Произошла ошибка при связи с техподдержкой. Мы постараемся ответить как можно скорее.")
                 await callback.answer()
@@ -597,7 +598,7 @@ async def contact_tech_support(callback: CallbackQuery, state: FSMContext):
             log_error(logger, e, f"Не удалось уведомить техподдержку {tech_support_id} о запросе. User ID: {user_id}")
             # Если не удалось уведомить техподдержку, можно удалить диалог или пометить его как требующий внимания
             dialog.is_closed = True # Временное решение
-            dialog.save()
+            await db_save(dialog)
             message_obj = cast(Message, callback.message)
             await message_obj.answer("Произошла ошибка при связи с техподдержкой. Мы постараемся ответить как можно скорее.")
             await callback.answer()
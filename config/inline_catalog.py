@@ -0,0 +1,107 @@
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
+
+from aiogram.types import (InlineQueryResultCachedPhoto, InlineQueryResultArticle, InputTextMessageContent,
+                           InlineQueryResultUnion)
+
+from config import settings
+from config.catalog_search import search_books, query_terms, on_catalog_change
+from config.gallery import book_caption
+from config.media import looks_like_file_id
+from config.logger_config import setup_logger, log_debug
+from data.db_executor import run_db_read
+from data.models import Books
+
+logger = setup_logger('inline_catalog')
+
+# Telegram принимает не больше 50 результатов в одном ответе
+PAGE_SIZE = 20
+# Сколько результатов на один запрос хранится в кэше (пять страниц, дальше листать не даем)
+MAX_RESULTS = 100
+
+class ResultCache:
+    """LRU-кэш: нормализованный запрос -> готовый список результатов"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._items: "OrderedDict[str, Tuple[InlineQueryResultUnion, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Поколение: результаты, собранные до сброса, в кэш не попадают
+        self.generation = 0
+
+    def get(self, key: str) -> Optional[Tuple[InlineQueryResultUnion, ...]]:
+        with self._lock:
+            results = self._items.get(key)
+            if results is not None:
+                self._items.move_to_end(key)
+            return results
+
+    def put(self, key: str, results: Tuple[InlineQueryResultUnion, ...], generation: int) -> None:
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._items[key] = results
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+_cache = ResultCache(settings.INLINE_CACHE_SIZE)
+
+def invalidate_catalog_cache() -> None:
+    """Сбрасывает кэш inline-результатов после добавления, изменения или удаления книги"""
+    _cache.clear()
+    log_debug(logger, "Кэш inline-результатов сброшен")
+
+on_catalog_change(invalidate_catalog_cache)
+
+def inline_result(book: Books) -> InlineQueryResultUnion:
+    title = f"{book.name} — {book.author}"
+    description = f"{book.price} руб. · в наличии {book.quantity} шт."
+    caption = book_caption(book)
+    if looks_like_file_id(book.photo):
+        return InlineQueryResultCachedPhoto(
+            id=str(book.id),
+            photo_file_id=book.photo,
+            title=title,
+            description=description,
+            caption=caption,
+            parse_mode="Markdown"
+        )
+    # Локальный файл еще не загружен в Telegram: отправляем карточку текстом
+    return InlineQueryResultArticle(
+        id=str(book.id),
+        title=title,
+        description=description,
+        input_message_content=InputTextMessageContent(message_text=caption, parse_mode="Markdown")
+    )
+
+def load_results(key: str, text: str, generation: int) -> Tuple[InlineQueryResultUnion, ...]:
+    """Выбирает книги и собирает результаты. Выполняется в потоке базы данных"""
+    if key:
+        books: Sequence[Books] = search_books(text, 0, MAX_RESULTS).books
+    else:
+        books = list(Books.select().order_by(Books.id).limit(MAX_RESULTS))
+    results = tuple(inline_result(book) for book in books)
+    _cache.put(key, results, generation)
+    return results
+
+async def inline_results(text: str, offset: int) -> Tuple[List[InlineQueryResultUnion], str]:
+    """Страница результатов и next_offset для answerInlineQuery"""
+    key = " ".join(query_terms(text))
+    results = _cache.get(key)
+    if results is None:
+        results = await run_db_read(load_results, key, text, _cache.generation)
+        log_debug(logger, "Inline-запрос без кэша", {"key": key, "found": len(results)})
+
+    page = list(results[offset:offset + PAGE_SIZE])
+    next_offset = str(offset + PAGE_SIZE) if offset + PAGE_SIZE < len(results) else ""
+    return page, next_offset
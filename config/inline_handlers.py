@@ -0,0 +1,28 @@
+from aiogram import Router
+from aiogram.types import InlineQuery
+
+from config import settings
+from config.inline_catalog import inline_results
+from config.logger_config import setup_logger, log_error
+
+inline_router = Router(name="inline_router")
+
+logger = setup_logger('inline_handlers')
+
+@inline_router.inline_query()
+async def inline_catalog(inline_query: InlineQuery) -> None:
+    """Поиск по каталогу из любого чата: @бот запрос"""
+    try:
+        offset = max(int(inline_query.offset or 0), 0)
+    except ValueError:
+        offset = 0
+    try:
+        results, next_offset = await inline_results(inline_query.query, offset)
+        await inline_query.answer(
+            results,
+            cache_time=settings.INLINE_CACHE_TIME,
+            is_personal=False,
+            next_offset=next_offset
+        )
+    except Exception as e:
+        log_error(logger, e, "Ошибка при ответе на inline-запрос")
@@ -0,0 +1,116 @@
+import asyncio
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, List, Optional
+
+from aiogram import Dispatcher
+
+from config import settings
+from config.logger_config import setup_logger, log_debug, log_info, log_error
+from data.db_executor import run_db
+from data.models import db, Books, Order, StockReservation
+
+logger = setup_logger('inventory')
+
+# Остаток уменьшается и увеличивается только условными UPDATE внутри транзакции записи:
+# проверка наличия и списание - один запрос, поэтому параллельные покупатели (в том числе
+# из разных процессов-обработчиков) не могут продать больше, чем есть на складе.
+# Транзакции открываются как BEGIN IMMEDIATE: блокировка записи берется сразу, и другой
+# процесс ждет ее busy_timeout, а не получает "database is locked" после чтения
+
+def _take_one(book_id: int) -> bool:
+    taken = (Books.update(quantity=Books.quantity - 1)
+             .where((Books.id == book_id) & (Books.quantity > 0))
+             .execute())
+    return taken == 1
+
+def _return(book_id: int, count: int = 1) -> None:
+    Books.update(quantity=Books.quantity + count).where(Books.id == book_id).execute()
+
+def reserve_book(book_id: int, user_id: int, ttl: Optional[float] = None) -> Optional[int]:
+    """Откладывает экземпляр книги за покупателем на ttl секунд. Выполняется в потоке-писателе.
+
+    Прежний резерв покупателя (брошенное оформление) возвращается на склад.
+    Возвращает id резерва или None, если книги нет в наличии.
+    """
+    ttl = settings.ORDER_RESERVATION_TTL if ttl is None else ttl
+    with db.atomic('IMMEDIATE'):
+        for previous in StockReservation.select().where(StockReservation.user_id == user_id):
+            _release(previous.id, previous.book_id)
+        if not _take_one(book_id):
+            return None
+        reservation = StockReservation.create(
+            book=book_id, user_id=user_id, expires_at=datetime.now() + timedelta(seconds=ttl)
+        )
+    log_debug(logger, "Книга отложена", {"book_id": book_id, "reservation_id": reservation.id})
+    return reservation.id
+
+def _release(reservation_id: int, book_id: int) -> bool:
+    # Экземпляр возвращает тот, кто удалил резерв: повторная отмена или сборщик ничего не вернут
+    if not StockReservation.delete().where(
+            (StockReservation.id == reservation_id) & (StockReservation.book == book_id)).execute():
+        return False
+    _return(book_id)
+    return True
+
+def release_reservation(reservation_id: int, book_id: int) -> bool:
+    """Отменяет резерв и возвращает книгу на склад. Выполняется в потоке-писателе"""
+    with db.atomic('IMMEDIATE'):
+        return _release(reservation_id, book_id)
+
+def place_order(reservation_id: Optional[int], book_id: int, **fields: Any) -> Optional[Order]:
+    """Создает заказ на отложенную книгу одной транзакцией. Выполняется в потоке-писателе.
+
+    Если резерв уже просрочен и возвращен на склад, книга списывается заново.
+    Возвращает None, если за это время ее раскупили.
+    """
+    with db.atomic('IMMEDIATE'):
+        consumed = reservation_id is not None and StockReservation.delete().where(
+            (StockReservation.id == reservation_id) & (StockReservation.book == book_id)
+        ).execute() == 1
+        if not consumed and not _take_one(book_id):
+            return None
+        order = Order.create(book_id=book_id, **fields)
+    return order
+
+def release_expired(now: Optional[datetime] = None) -> int:
+    """Возвращает на склад просроченные резервы. Выполняется в потоке-писателе"""
+    with db.atomic('IMMEDIATE'):
+        # DELETE ... RETURNING: резерв, удаленный другим процессом, не вернется на склад дважды
+        cursor = db.execute_sql(
+            'DELETE FROM stockreservation WHERE expires_at < ? RETURNING book_id;', (now or datetime.now(),)
+        )
+        released = Counter(book_id for book_id, in cursor.fetchall())
+        for book_id, count in released.items():
+            _return(book_id, count)
+    return sum(released.values())
+
+async def sweep_reservations(interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            released = await run_db(release_expired)
+            if released:
+                log_info(logger, "Просроченные резервы возвращены на склад", {"count": released})
+        except Exception as e:
+            log_error(logger, e, "Ошибка при возврате просроченных резервов")
+
+def install_reservation_sweeper(dp: Dispatcher, interval: Optional[float] = None) -> None:
+    """Запускает сборщик просроченных резервов вместе с диспетчером (polling, webhook и процессы-обработчики)"""
+    interval = settings.ORDER_RESERVATION_SWEEP_INTERVAL if interval is None else interval
+    tasks: List['asyncio.Task[None]'] = []
+
+    async def on_startup() -> None:
+        tasks.append(asyncio.create_task(sweep_reservations(interval)))
+
+    async def on_shutdown() -> None:
+        while tasks:
+            task = tasks.pop()
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    dp.startup.register(on_startup)
+    dp.shutdown.register(on_shutdown)
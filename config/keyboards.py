@@ -20,6 +20,7 @@ orders_menu_kb = ReplyKeyboardMarkup(
         [KeyboardButton(text="🆕 Новые заказы")],
         [KeyboardButton(text="📋 Все заказы")],
         [KeyboardButton(text="🔄 Изменить статус заказа")],
+        [KeyboardButton(text="📤 Выгрузить заказы")],
         [KeyboardButton(text="❌ Отмена")],
         [KeyboardButton(text="🏠 Назад в главное меню")]
     ],
@@ -31,6 +32,7 @@ books_menu_kb = ReplyKeyboardMarkup(
         [KeyboardButton(text="➕ Добавить книгу")],
         # [KeyboardButton(text="🗑 Удалить книгу")], # Удалено, так как теперь есть инлайн-кнопки
         [KeyboardButton(text="📚 Показать книги")],
+        [KeyboardButton(text="📥 Импорт книг")],
         [KeyboardButton(text="❌ Отмена")],
         [KeyboardButton(text="🏠 Назад в главное меню")]
     ],
@@ -60,6 +62,7 @@ admins_menu_kb = ReplyKeyboardMarkup(
 greetings_kb = InlineKeyboardMarkup(
     inline_keyboard=[
         [InlineKeyboardButton(text="📚 Перейти к галерее книг", callback_data="books_gallery")],
+        [InlineKeyboardButton(text="🔍 Поиск книг", callback_data="search_start")],
         [InlineKeyboardButton(text="❓ Задать вопрос", callback_data="ask_question_start")],
         [InlineKeyboardButton(text="🛠️ Техподдержка", callback_data="contact_tech_support")]
     ]
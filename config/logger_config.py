@@ -1,77 +1,151 @@
+import atexit
+import json
 import logging
-import traceback
 import os
+import queue
+import time
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any, Dict, Optional
 
-# Создаем директорию для логов, если её нет
-if not os.path.exists('logs'):
-    os.makedirs('logs')
+from config import settings
+
+# Записи из всех потоков попадают в очередь, а в файл и консоль их пишет фоновый поток
+_listener: Optional[QueueListener] = None
+_levels: Dict[str, int] = {}
+
+class JsonFormatter(logging.Formatter):
+    """Одна запись - одна JSON-строка: время, уровень, модуль, сообщение, данные, трейсбек"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        data = getattr(record, 'data', None)
+        if data:
+            entry["data"] = data
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class ConsoleFormatter(logging.Formatter):
+    """Короткая строка для консоли"""
+
+    def __init__(self) -> None:
+        super().__init__('%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        data = getattr(record, 'data', None)
+        return f"{line} {data}" if data else line
+
+class RotatingDailyFileHandler(RotatingFileHandler):
+    """Ротация по размеру, как у RotatingFileHandler, и дополнительно раз в сутки"""
+
+    def __init__(self, filename: str, max_bytes: int, backups: int):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backups, encoding='utf-8')
+        self.rollover_at = self._next_midnight()
+
+    @staticmethod
+    def _next_midnight() -> float:
+        now = time.localtime()
+        return time.mktime((now.tm_year, now.tm_mon, now.tm_mday + 1, 0, 0, 0, 0, 0, -1))
+
+    def shouldRollover(self, record: logging.LogRecord) -> int:
+        if time.time() >= self.rollover_at:
+            return 1
+        return super().shouldRollover(record)
+
+    def doRollover(self) -> None:
+        super().doRollover()
+        self.rollover_at = self._next_midnight()
+
+class _BackgroundQueueHandler(QueueHandler):
+    """Кладет запись в очередь без форматирования: сообщение собирается в фоновом потоке"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        data = getattr(record, 'data', None)
+        if isinstance(data, dict):
+            # Снимок, чтобы изменения словаря после вызова не попали в лог
+            record.data = dict(data)
+        return record
+
+def _parse_levels(value: str) -> Dict[str, int]:
+    levels: Dict[str, int] = {}
+    for item in value.split(','):
+        if '=' in item:
+            name, level = item.split('=', 1)
+            levels[name.strip()] = logging.getLevelName(level.strip().upper())
+    return levels
+
+def start_logging() -> None:
+    """Подключает очередь к корневому логгеру и запускает фоновую запись"""
+    global _listener, _levels
+    if _listener is not None:
+        return
+    log_dir = os.path.dirname(settings.LOG_FILE)
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+
+    file_handler = RotatingDailyFileHandler(settings.LOG_FILE, settings.LOG_MAX_MB * 1024 * 1024, settings.LOG_BACKUPS)
+    file_handler.setFormatter(JsonFormatter())
+    handlers = [file_handler]
+    if settings.LOG_CONSOLE:
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(ConsoleFormatter())
+        handlers.append(console_handler)
+
+    records: queue.Queue = queue.Queue(-1)
+    root = logging.getLogger()
+    root.setLevel(settings.LOG_LEVEL)
+    root.addHandler(_BackgroundQueueHandler(records))
+    _levels = _parse_levels(settings.LOG_LEVELS)
+    for name, level in _levels.items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+def stop_logging() -> None:
+    """Дописывает очередь и останавливает фоновый поток"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
 
 # Настройка логирования
 def setup_logger(name: str) -> logging.Logger:
-    """Настройка логгера для модуля"""
+    """Логгер модуля: пишет через общую очередь, уровень берется из LOG_LEVELS или LOG_LEVEL"""
+    start_logging()
     logger = logging.getLogger(name)
-    
-    # Если логгер уже настроен, возвращаем его
-    if logger.handlers:
-        return logger
-    
-    logger.setLevel(logging.DEBUG)
-    
-    # Формат логов
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s\n'
-        'File: %(pathname)s:%(lineno)d\n'
-        'Function: %(funcName)s\n'
-        'Traceback: %(exc_info)s'
-    )
-    
-    # Хендлер для файла
-    current_date = datetime.now().strftime('%Y-%m-%d')
-    file_handler = logging.FileHandler(
-        f'logs/{name}_{current_date}.log',
-        encoding='utf-8'
-    )
-    file_handler.setLevel(logging.DEBUG)
-    file_handler.setFormatter(formatter)
-    
-    # Хендлер для консоли
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.DEBUG)
-    console_handler.setFormatter(formatter)
-    
-    # Добавляем хендлеры к логгеру
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
-    
+    logger.setLevel(_levels.get(name, logging.getLevelName(settings.LOG_LEVEL)))
     return logger
 
 def log_error(logger: logging.Logger, error: Exception, context: str = None):
     """Логирование ошибки с контекстом"""
-    error_msg = f"Ошибка: {str(error)}"
+    error_msg = f"Ошибка: {error}"
     if context:
         error_msg = f"{context} - {error_msg}"
-    
-    logger.error(error_msg)
-    logger.error(f"Traceback:\n{traceback.format_exc()}")
+    exc_info = (type(error), error, error.__traceback__) if error.__traceback__ else None
+    logger.error(error_msg, exc_info=exc_info)
 
 def log_debug(logger: logging.Logger, message: str, data: dict = None):
     """Логирование отладочной информации"""
-    if data:
-        logger.debug(f"{message} - Данные: {data}")
-    else:
-        logger.debug(message)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(message, extra={"data": data})
 
 def log_info(logger: logging.Logger, message: str, data: dict = None):
     """Логирование информационных сообщений"""
-    if data:
-        logger.info(f"{message} - Данные: {data}")
-    else:
-        logger.info(message)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(message, extra={"data": data})
 
 def log_warning(logger: logging.Logger, message: str, data: dict = None):
     """Логирование предупреждений"""
-    if data:
-        logger.warning(f"{message} - Данные: {data}")
-    else:
-        logger.warning(message) 
\ No newline at end of file
+    if logger.isEnabledFor(logging.WARNING):
+        logger.warning(message, extra={"data": data})
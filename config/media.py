@@ -0,0 +1,140 @@
+import asyncio
+import hashlib
+import os
+import re
+from contextlib import AsyncExitStack
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from aiogram.types import FSInputFile, Message
+
+from config import settings
+from config.catalog_search import notify_catalog_changed
+from config.logger_config import setup_logger, log_debug, log_info, log_warning
+from data.db_executor import run_db, run_db_read
+from data.models import db, Books, MediaFile
+
+logger = setup_logger('media')
+
+# file_id, который Telegram выдает при загрузке фото; локальные имена файлов ему не соответствуют
+_FILE_ID_RE = re.compile(r'^[A-Za-z0-9_-]{20,}$')
+
+# Хэши локальных файлов: путь -> (mtime, размер, sha256), чтобы не перечитывать файл при каждом показе
+_hashes: Dict[str, Tuple[float, int, str]] = {}
+# Одна загрузка на содержимое: пока файл загружается, остальные показы ждут ее file_id
+_upload_locks: Dict[str, asyncio.Lock] = {}
+
+PhotoSender = Callable[[Union[str, FSInputFile]], Awaitable[Any]]
+GroupSender = Callable[[List[Union[str, FSInputFile]]], Awaitable[Any]]
+
+def looks_like_file_id(photo: Optional[str]) -> bool:
+    return bool(photo) and _FILE_ID_RE.match(photo) is not None
+
+def local_photo_path(photo: Optional[str]) -> Optional[str]:
+    """Путь к локальному файлу фото относительно MEDIA_DIR.
+
+    Books.photo заполняет и импорт каталога, поэтому абсолютные пути и выход за MEDIA_DIR
+    через ".." или символическую ссылку отклоняются: бот загружает в Telegram только фото из MEDIA_DIR.
+    """
+    if not photo or looks_like_file_id(photo):
+        return None
+    media_dir = os.path.realpath(settings.MEDIA_DIR)
+    path = os.path.realpath(os.path.join(media_dir, photo))
+    try:
+        inside = os.path.commonpath([media_dir, path]) == media_dir
+    except ValueError:
+        # Windows: путь на другом диске
+        inside = False
+    if not inside:
+        log_warning(logger, "Фото вне каталога MEDIA_DIR не отправляется", {"photo": photo})
+        return None
+    return path if os.path.isfile(path) else None
+
+def file_sha256(path: str) -> str:
+    stat = os.stat(path)
+    cached = _hashes.get(path)
+    if cached and cached[0] == stat.st_mtime and cached[1] == stat.st_size:
+        return cached[2]
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    _hashes[path] = (stat.st_mtime, stat.st_size, digest.hexdigest())
+    return digest.hexdigest()
+
+def cached_file_ids(hashes: List[str]) -> Dict[str, str]:
+    query = MediaFile.select(MediaFile.sha256, MediaFile.file_id).where(MediaFile.sha256.in_(hashes))
+    return {media.sha256: media.file_id for media in query}
+
+def store_file_ids(uploads: Dict[str, Tuple[str, str]]) -> int:
+    """Запоминает file_id по хэшу и одной транзакцией заменяет ими локальные пути у книг.
+
+    uploads: локальный путь из Books.photo -> (sha256, file_id). Книги, у которых фото
+    уже успели поменять, не затрагиваются. Выполняется в потоке-писателе.
+    """
+    updated = 0
+    with db.atomic():
+        for photo, (sha256, file_id) in uploads.items():
+            MediaFile.insert(sha256=sha256, file_id=file_id).on_conflict(
+                conflict_target=[MediaFile.sha256],
+                update={MediaFile.file_id: file_id}
+            ).execute()
+            updated += Books.update(photo=file_id).where(Books.photo == photo).execute()
+    log_info(logger, "file_id фото сохранены", {"photos": list(uploads), "books": updated})
+    return updated
+
+def _sent_file_id(result: Any) -> Optional[str]:
+    if isinstance(result, Message) and result.photo:
+        return result.photo[-1].file_id
+    return None
+
+async def send_with_photos(photos: Sequence[str], send: GroupSender) -> Optional[Any]:
+    """Отправляет несколько фото книг одним вызовом send и возвращает его результат.
+
+    file_id передаются как есть. Локальный файл загружается один раз: повторный показ
+    (и другой файл с тем же содержимым) берет file_id из таблицы mediafile.
+    Возвращает None, если какого-то фото нет ни в Telegram, ни на диске.
+    """
+    paths: Dict[str, str] = {}
+    for photo in photos:
+        if looks_like_file_id(photo):
+            continue
+        path = local_photo_path(photo)
+        if path is None:
+            log_debug(logger, "Локальное фото не найдено", {"photo": photo})
+            return None
+        paths[photo] = path
+    hashes = {photo: await asyncio.to_thread(file_sha256, path) for photo, path in paths.items()}
+
+    async with AsyncExitStack() as stack:
+        # Блокировки берем в порядке хэшей, чтобы параллельные альбомы не ждали друг друга по кругу
+        for sha256 in sorted(set(hashes.values())):
+            await stack.enter_async_context(_upload_locks.setdefault(sha256, asyncio.Lock()))
+        cached = await run_db_read(cached_file_ids, list(set(hashes.values()))) if hashes else {}
+
+        media: List[Union[str, FSInputFile]] = []
+        for photo in photos:
+            if photo not in paths:
+                media.append(photo)
+            elif hashes[photo] in cached:
+                media.append(cached[hashes[photo]])
+            else:
+                log_info(logger, "Загрузка локального фото в Telegram", {"path": paths[photo]})
+                media.append(FSInputFile(paths[photo]))
+
+        result = await send(media)
+        messages = result if isinstance(result, list) else [result]
+        uploads: Dict[str, Tuple[str, str]] = {}
+        for photo, message in zip(photos, messages):
+            if photo in paths:
+                file_id = cached.get(hashes[photo]) or _sent_file_id(message)
+                if file_id:
+                    uploads[photo] = (hashes[photo], file_id)
+        if uploads and await run_db(store_file_ids, uploads):
+            notify_catalog_changed()
+    return result
+
+async def send_with_photo(photo: Optional[str], send: PhotoSender) -> Optional[Any]:
+    """Отправляет одно фото книги через send, см. send_with_photos"""
+    if not photo:
+        return None
+    return await send_with_photos([photo], lambda media: send(media[0]))
@@ -0,0 +1,290 @@
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from aiogram import BaseMiddleware, Bot, Dispatcher
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.dispatcher.event.bases import CancelHandler, SkipHandler
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import TelegramType, Response
+from aiogram.types import TelegramObject, Update
+from aiohttp import web
+
+from config import settings, send_limiter, throttling
+from config.logger_config import setup_logger, log_info
+from data.query_stats import QueryStats, check_query_budget, query_stats
+
+logger = setup_logger('metrics')
+
+# Границы корзин гистограмм: задержка в секундах и число вызовов на обновление
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50)
+
+HandlerKey = Tuple[str, str]
+
+class Histogram:
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, share: float) -> float:
+        """Оценка сверху: граница корзины, в которую попадает квантиль"""
+        target = share * self.count
+        total = 0
+        for bound, count in zip(self.bounds, self.counts):
+            total += count
+            if total >= target:
+                return bound
+        return float('inf')
+
+class _UpdateContext:
+    __slots__ = ('api_calls',)
+
+    def __init__(self) -> None:
+        self.api_calls = 0
+
+_update: ContextVar[Optional[_UpdateContext]] = ContextVar('update_metrics', default=None)
+
+class Metrics:
+    """Счетчики бота; обновляются только из потока event loop, поэтому без блокировок"""
+
+    def __init__(self) -> None:
+        self.started = time.time()
+        self.updates: Counter = Counter()
+        self.update_latency = Histogram(LATENCY_BUCKETS)
+        self.update_api_calls = Histogram(COUNT_BUCKETS)
+        self.update_db_queries = Histogram(COUNT_BUCKETS)
+        self.update_db_time = Histogram(LATENCY_BUCKETS)
+        self.handler_latency: Dict[HandlerKey, Histogram] = {}
+        self.handler_errors: Counter = Counter()
+        self.handler_in_flight: Counter = Counter()
+        self.handler_api_calls: Counter = Counter()
+        self.handler_db_queries: Counter = Counter()
+        self.api_calls: Counter = Counter()
+        self.api_errors: Counter = Counter()
+
+    def observe_handler(self, key: HandlerKey, seconds: float) -> None:
+        histogram = self.handler_latency.get(key)
+        if histogram is None:
+            histogram = self.handler_latency[key] = Histogram(LATENCY_BUCKETS)
+        histogram.observe(seconds)
+
+metrics = Metrics()
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    """Время обработки обновления, число вызовов Bot API и SQL-запросов за него"""
+
+    async def __call__(
+        self,
+        handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any],
+    ) -> Any:
+        context = _UpdateContext()
+        stats = QueryStats(parent=query_stats.get())
+        update_token = _update.set(context)
+        stats_token = query_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            metrics.updates[event.event_type] += 1
+            metrics.update_latency.observe(time.perf_counter() - started)
+            metrics.update_api_calls.observe(context.api_calls)
+            metrics.update_db_queries.observe(stats.queries)
+            metrics.update_db_time.observe(stats.time)
+            query_stats.reset(stats_token)
+            check_query_budget(stats, event.update_id, event.event_type)
+            _update.reset(update_token)
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Задержка, ошибки и число одновременно выполняемых вызовов каждого обработчика"""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        router = data.get('event_router')
+        handler_object = data.get('handler')
+        key = (router.name if router else '-', getattr(getattr(handler_object, 'callback', None), '__name__', '-'))
+        context = _update.get()
+        stats = query_stats.get()
+        api_before = context.api_calls if context else 0
+        db_before = stats.queries if stats else 0
+        metrics.handler_in_flight[key] += 1
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except (SkipHandler, CancelHandler):
+            raise
+        except Exception:
+            metrics.handler_errors[key] += 1
+            raise
+        finally:
+            metrics.observe_handler(key, time.perf_counter() - started)
+            metrics.handler_in_flight[key] -= 1
+            if context:
+                metrics.handler_api_calls[key] += context.api_calls - api_before
+            if stats:
+                metrics.handler_db_queries[key] += stats.queries - db_before
+
+class ApiCallMetrics(BaseRequestMiddleware):
+    """Считает вызовы Bot API по методам и в рамках текущего обновления"""
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        name = type(method).__name__
+        metrics.api_calls[name] += 1
+        context = _update.get()
+        if context is not None:
+            context.api_calls += 1
+        try:
+            return await make_request(bot, method)
+        except Exception:
+            metrics.api_errors[name] += 1
+            raise
+
+def install_metrics(dp: Dispatcher, bot: Bot) -> Metrics:
+    """Подключает сбор метрик к диспетчеру и сессии бота"""
+    dp.update.outer_middleware(UpdateMetricsMiddleware())
+    handler_middleware = HandlerMetricsMiddleware()
+    # Внутренние middleware диспетчера применяются к обработчикам всех вложенных роутеров
+    for name, observer in dp.observers.items():
+        if name not in ('update', 'error'):
+            observer.middleware(handler_middleware)
+    bot.session.middleware(ApiCallMetrics())
+    return metrics
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' ')
+
+def _labels(**labels: Any) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+def _histogram_lines(name: str, histogram: Histogram, **labels: Any) -> List[str]:
+    lines = []
+    total = 0
+    for bound, count in zip(histogram.bounds, histogram.counts):
+        total += count
+        lines.append(f'{name}_bucket{_labels(**labels, le=bound)} {total}')
+    lines.append(f'{name}_bucket{_labels(**labels, le="+Inf")} {histogram.count}')
+    lines.append(f'{name}_sum{_labels(**labels)} {histogram.sum}')
+    lines.append(f'{name}_count{_labels(**labels)} {histogram.count}')
+    return lines
+
+def render_prometheus() -> str:
+    """Метрики в текстовом формате Prometheus"""
+    lines = [
+        '# TYPE bot_uptime_seconds gauge',
+        f'bot_uptime_seconds {time.time() - metrics.started:.0f}',
+        '# TYPE bot_updates_total counter',
+    ]
+    lines += [f'bot_updates_total{_labels(type=kind)} {count}' for kind, count in metrics.updates.items()]
+    lines.append('# TYPE bot_update_latency_seconds histogram')
+    lines += _histogram_lines('bot_update_latency_seconds', metrics.update_latency)
+    lines.append('# TYPE bot_update_api_calls histogram')
+    lines += _histogram_lines('bot_update_api_calls', metrics.update_api_calls)
+    lines.append('# TYPE bot_update_db_queries histogram')
+    lines += _histogram_lines('bot_update_db_queries', metrics.update_db_queries)
+    lines.append('# TYPE bot_update_db_seconds histogram')
+    lines += _histogram_lines('bot_update_db_seconds', metrics.update_db_time)
+
+    lines.append('# TYPE bot_handler_latency_seconds histogram')
+    for (router, handler), histogram in metrics.handler_latency.items():
+        lines += _histogram_lines('bot_handler_latency_seconds', histogram, router=router, handler=handler)
+    for name, kind, counter in (
+        ('bot_handler_errors_total', 'counter', metrics.handler_errors),
+        ('bot_handler_in_flight', 'gauge', metrics.handler_in_flight),
+        ('bot_handler_api_calls_total', 'counter', metrics.handler_api_calls),
+        ('bot_handler_db_queries_total', 'counter', metrics.handler_db_queries),
+    ):
+        lines.append(f'# TYPE {name} {kind}')
+        lines += [f'{name}{_labels(router=router, handler=handler)} {value}' for (router, handler), value in counter.items()]
+
+    lines.append('# TYPE bot_api_calls_total counter')
+    lines += [f'bot_api_calls_total{_labels(method=method)} {count}' for method, count in metrics.api_calls.items()]
+    lines.append('# TYPE bot_api_errors_total counter')
+    lines += [f'bot_api_errors_total{_labels(method=method)} {count}' for method, count in metrics.api_errors.items()]
+
+    if send_limiter.outbound_limiter is not None:
+        lines.append('# TYPE bot_outbound gauge')
+        lines += [f'bot_outbound{_labels(stat=stat)} {value}' for stat, value in send_limiter.outbound_limiter.stats().items()]
+    if throttling.throttling is not None:
+        lines.append('# TYPE bot_throttled_total counter')
+        lines += [f'bot_throttled_total{_labels(kind=kind)} {count}' for kind, count in throttling.throttling.throttled.items()]
+    return '\n'.join(lines) + '\n'
+
+def _ms(seconds: float) -> str:
+    return '>5000 мс' if seconds == float('inf') else f'≤{seconds * 1000:.0f} мс'
+
+def render_summary(top: int = 10) -> str:
+    """Сводка для команды /stats"""
+    uptime = time.time() - metrics.started
+    updates = metrics.update_latency.count
+    lines = [
+        "📊 Статистика бота",
+        f"Время работы: {int(uptime // 3600)} ч {int(uptime % 3600 // 60)} мин",
+        f"Обновлений: {updates} ({updates / max(uptime, 1):.2f}/с)",
+    ]
+    if updates:
+        lines.append(f"Обработка: p50 {_ms(metrics.update_latency.quantile(0.5))}, p99 {_ms(metrics.update_latency.quantile(0.99))}")
+        lines.append(f"На обновление: вызовов Bot API {metrics.update_api_calls.sum / updates:.1f}, "
+                     f"SQL-запросов {metrics.update_db_queries.sum / updates:.1f} "
+                     f"({metrics.update_db_time.sum / updates * 1000:.1f} мс)")
+    if metrics.api_errors:
+        lines.append(f"Ошибок Bot API: {sum(metrics.api_errors.values())}")
+    if send_limiter.outbound_limiter is not None:
+        stats = send_limiter.outbound_limiter.stats()
+        lines.append(f"Исходящие: отправлено {stats['sent']}, в очереди {stats['depth']} (макс. {stats['max_depth']}), повторов {stats['retries']}")
+    if throttling.throttling is not None and throttling.throttling.throttled:
+        lines.append(f"Антифлуд отклонил: {dict(throttling.throttling.throttled)}")
+
+    slowest = sorted(metrics.handler_latency.items(), key=lambda item: (item[1].quantile(0.99), item[1].count), reverse=True)
+    if slowest:
+        lines.append("")
+        lines.append("Обработчики (по p99):")
+    for key, histogram in slowest[:top]:
+        router, handler = key
+        line = (f"• {router}.{handler}: {histogram.count} выз., p50 {_ms(histogram.quantile(0.5))}, "
+                f"p99 {_ms(histogram.quantile(0.99))}, SQL {metrics.handler_db_queries[key] / histogram.count:.1f}/выз.")
+        if metrics.handler_errors[key]:
+            line += f", ошибок {metrics.handler_errors[key]}"
+        if metrics.handler_in_flight[key]:
+            line += f", сейчас {metrics.handler_in_flight[key]}"
+        lines.append(line)
+    return "\n".join(lines)
+
+async def _metrics_handler(request: web.Request) -> web.Response:
+    return web.Response(text=render_prometheus(), content_type='text/plain', charset='utf-8')
+
+async def start_metrics_server(port: Optional[int] = None) -> Optional[web.AppRunner]:
+    """Запускает локальный HTTP-сервер с /metrics; None, если METRICS_PORT=0"""
+    port = settings.METRICS_PORT if port is None else port
+    if not port:
+        return None
+    app = web.Application()
+    app.router.add_get('/metrics', _metrics_handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, settings.METRICS_HOST, port).start()
+    log_info(logger, "Метрики доступны", {"url": f"http://{settings.METRICS_HOST}:{port}/metrics"})
+    return runner
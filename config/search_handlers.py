@@ -0,0 +1,98 @@
+from aiogram import Router, F
+from aiogram.filters import Command, CommandObject
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.types import Message, CallbackQuery, InaccessibleMessage
+from aiogram.exceptions import TelegramBadRequest
+from typing import cast
+
+from config.catalog_search import search_books, render_results, results_keyboard
+from config.gallery import GalleryPage, send_book_card
+from config.handlers import gallery_keyboard
+from config.logger_config import setup_logger, log_debug, log_error
+from data.db_executor import run_db_read, db_get_or_none
+from data.models import Books
+
+search_router = Router(name="search_router")
+
+logger = setup_logger('search_handlers')
+
+class SearchState(StatesGroup):
+    waiting_for_query = State()
+
+async def _send_results(message: Message, state: FSMContext, text: str) -> None:
+    page = await run_db_read(search_books, text)
+    # Запрос нужен для листания страниц, а режим поиска выключаем, чтобы не перехватывать другие сообщения
+    await state.update_data(search_query=text)
+    await state.set_state(None)
+    await message.answer(render_results(text, page), reply_markup=results_keyboard(page) if page.books else None)
+
+@search_router.message(Command("search"))
+async def cmd_search(message: Message, command: CommandObject, state: FSMContext) -> None:
+    try:
+        if command.args and command.args.strip():
+            await _send_results(message, state, command.args.strip())
+            return
+        await state.set_state(SearchState.waiting_for_query)
+        await message.answer("🔍 Введите название книги, автора или слова из описания:")
+    except Exception as e:
+        log_error(logger, e, "Ошибка в обработчике /search")
+        await message.answer("Произошла ошибка при поиске. Пожалуйста, попробуйте позже.")
+
+@search_router.callback_query(F.data == "search_start")
+async def search_start(callback: CallbackQuery, state: FSMContext) -> None:
+    await callback.answer()
+    if not callback.message or isinstance(callback.message, InaccessibleMessage):
+        return
+    await state.set_state(SearchState.waiting_for_query)
+    await callback.message.answer("🔍 Введите название книги, автора или слова из описания:")
+
+@search_router.message(SearchState.waiting_for_query, F.text)
+async def search_query(message: Message, state: FSMContext) -> None:
+    try:
+        if not message.text or message.text.startswith('/'):
+            await state.set_state(None)
+            return
+        await _send_results(message, state, message.text.strip())
+    except Exception as e:
+        log_error(logger, e, "Ошибка при поиске по каталогу")
+        await message.answer("Произошла ошибка при поиске. Пожалуйста, попробуйте позже.")
+
+@search_router.callback_query(F.data.startswith("search_page_"))
+async def search_page(callback: CallbackQuery, state: FSMContext) -> None:
+    await callback.answer()
+    if not callback.data or not callback.message or isinstance(callback.message, InaccessibleMessage):
+        return
+    text = (await state.get_data()).get("search_query")
+    if not text:
+        await callback.message.answer("Поиск устарел. Повторите запрос командой /search")
+        return
+    try:
+        offset = max(int(callback.data.rsplit("_", 1)[1]), 0)
+    except ValueError:
+        log_debug(logger, "Неверный формат callback_data поиска", {"callback_data": callback.data})
+        return
+
+    try:
+        page = await run_db_read(search_books, text, offset)
+        message_obj = cast(Message, callback.message)
+        await message_obj.edit_text(render_results(text, page), reply_markup=results_keyboard(page))
+    except TelegramBadRequest as e:
+        if "message is not modified" not in str(e):
+            log_error(logger, e, "Ошибка при листании результатов поиска")
+
+@search_router.callback_query(F.data.startswith("search_book_"))
+async def search_open_book(callback: CallbackQuery) -> None:
+    await callback.answer()
+    if not callback.data or not callback.message or isinstance(callback.message, InaccessibleMessage):
+        return
+    try:
+        book_id = int(callback.data.rsplit("_", 1)[1])
+    except ValueError:
+        return
+
+    book = await db_get_or_none(Books, Books.id == book_id)
+    if not book:
+        await callback.message.answer("Книга не найдена.")
+        return
+    await send_book_card(cast(Message, callback.message), book, gallery_keyboard(GalleryPage([book], False, False)))
@@ -0,0 +1,214 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter, TelegramNetworkError, TelegramServerError
+from aiogram.methods import TelegramMethod, CopyMessage, ForwardMessage
+from aiogram.methods.base import TelegramType, Response
+
+from config import settings
+from config.logger_config import setup_logger, log_debug, log_warning
+
+logger = setup_logger('send_limiter')
+
+# Пауза перед повтором после сетевой ошибки, дальше удваивается
+NETWORK_RETRY_DELAY = 0.5
+# Корзины чатов, которые не использовались дольше этого времени, удаляются
+IDLE_BUCKET_TTL = 60.0
+
+class TokenBucket:
+    """Корзина токенов с резервированием: токен списывается сразу, а вызывающий ждет свою очередь"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def reserve(self, now: float) -> float:
+        """Списывает токен и возвращает, сколько секунд ждать до отправки"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+    def consume(self, now: float) -> bool:
+        """Списывает токен, если он есть; в отличие от reserve, в долг не уходит"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def idle(self, now: float) -> bool:
+        return self.tokens >= 0 and now - self.updated > IDLE_BUCKET_TTL
+
+class SlidingWindow:
+    """Не больше limit отправок за любые period секунд.
+
+    Время последних отправок хранится в очереди, место в окне занимается в момент
+    отправки. Ожидающие проходят по одному в порядке прихода.
+    """
+
+    def __init__(self, limit: float, period: float = 1.0):
+        self.limit = max(1, int(limit))
+        self.period = period
+        self.sent: Deque[float] = deque()
+        self._lock: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def delay(self, now: float) -> float:
+        """Сколько секунд ждать, пока в окне освободится место"""
+        while self.sent and now - self.sent[0] >= self.period:
+            self.sent.popleft()
+        if len(self.sent) < self.limit:
+            return 0.0
+        return self.sent[0] + self.period - now
+
+    def _turn_lock(self) -> asyncio.Lock:
+        # Блокировка привязана к event loop: бенчмарки запускают бота в нескольких asyncio.run
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._loop is not loop:
+            self._lock, self._loop = asyncio.Lock(), loop
+        return self._lock
+
+    def try_acquire(self, now: float) -> bool:
+        """Отмечает отправку, если место есть сразу и никто не ждет в очереди"""
+        if (self._lock is not None and self._lock.locked()) or self.delay(now) > 0:
+            return False
+        self.sent.append(now)
+        return True
+
+    async def acquire(self) -> None:
+        """Ждет места в окне и отмечает отправку"""
+        async with self._turn_lock():
+            while True:
+                now = time.monotonic()
+                delay = self.delay(now)
+                if delay <= 0:
+                    self.sent.append(now)
+                    return
+                await asyncio.sleep(delay)
+
+class OutboundLimiter(BaseRequestMiddleware):
+    """Очередь исходящих сообщений поверх сессии бота.
+
+    Методы отправки ждут места в общем окне (30 сообщений за любую секунду) и токен корзины чата
+    (1 сообщение/с, в группах 20 в минуту). На RetryAfter и сетевые ошибки запрос
+    повторяется. Обработчики по-прежнему просто вызывают message.answer и bot.send_message.
+    """
+
+    def __init__(self, global_rate: Optional[float] = None, chat_rate: Optional[float] = None,
+                 chat_burst: Optional[float] = None, group_rate: Optional[float] = None,
+                 max_retries: Optional[int] = None):
+        self.global_window = SlidingWindow(global_rate or settings.SEND_GLOBAL_RATE)
+        self.chat_rate = chat_rate or settings.SEND_CHAT_RATE
+        self.chat_burst = chat_burst or settings.SEND_CHAT_BURST
+        self.group_rate = (group_rate or settings.SEND_GROUP_RATE_PER_MINUTE) / 60
+        self.max_retries = settings.SEND_MAX_RETRIES if max_retries is None else max_retries
+        self.chat_buckets: Dict[Any, TokenBucket] = {}
+        # Сколько запросов сейчас ждут своей очереди, и максимум за время работы
+        self.depth = 0
+        self.max_depth = 0
+        self.sent = 0
+        self.retries = 0
+
+    @staticmethod
+    def is_limited(method: TelegramMethod[Any]) -> bool:
+        """Лимиты Telegram считают новые сообщения: send*, copy и forward"""
+        return (type(method).__name__.startswith('Send') or isinstance(method, (CopyMessage, ForwardMessage))) \
+            and getattr(method, 'chat_id', None) is not None
+
+    def _chat_bucket(self, chat_id: Any, now: float) -> TokenBucket:
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self.chat_buckets) > 10000:
+                self.chat_buckets = {key: value for key, value in self.chat_buckets.items() if not value.idle(now)}
+            # Отрицательный id (или @username) - группа или канал
+            is_group = not isinstance(chat_id, int) or chat_id < 0
+            if is_group:
+                bucket = TokenBucket(self.group_rate, 1)
+            else:
+                bucket = TokenBucket(self.chat_rate, self.chat_burst)
+            self.chat_buckets[chat_id] = bucket
+        return bucket
+
+    async def _wait_turn(self, chat_id: Any) -> None:
+        now = time.monotonic()
+        delay = self._chat_bucket(chat_id, now).reserve(now)
+        if delay <= 0 and self.global_window.try_acquire(now):
+            return
+        self.depth += 1
+        self.max_depth = max(self.max_depth, self.depth)
+        try:
+            # Сначала очередь чата, и только потом место в общем окне: если занять его заранее,
+            # оно пропадет, пока запрос ждет свой чат, а отправки потом пойдут пачкой сверх лимита
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await self.global_window.acquire()
+        finally:
+            self.depth -= 1
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        limited = self.is_limited(method)
+        chat_id = getattr(method, 'chat_id', None)
+        attempt = 0
+        while True:
+            if limited:
+                await self._wait_turn(chat_id)
+            try:
+                response = await make_request(bot, method)
+                if limited:
+                    self.sent += 1
+                return response
+            except TelegramRetryAfter as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = float(e.retry_after)
+                log_warning(logger, "Telegram попросил подождать", {"delay": delay, "method": type(method).__name__, "chat_id": chat_id})
+            except (TelegramNetworkError, TelegramServerError) as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = NETWORK_RETRY_DELAY * 2 ** attempt
+                log_warning(logger, "Ошибка сети, повтор", {"method": type(method).__name__, "delay": delay, "error": str(e)})
+            attempt += 1
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+    def share(self, workers: int) -> None:
+        """Делит общий лимит между процессами-обработчиками: чаты у каждого свои, а лимит бота один"""
+        self.global_window = SlidingWindow(self.global_window.limit / workers)
+
+    def stats(self) -> Dict[str, int]:
+        """Глубина очереди и счетчики отправок"""
+        return {
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "sent": self.sent,
+            "retries": self.retries,
+            "chats": len(self.chat_buckets),
+        }
+
+outbound_limiter: Optional[OutboundLimiter] = None
+
+def install_outbound_limiter(bot: Bot) -> OutboundLimiter:
+    """Подключает очередь исходящих сообщений к сессии бота"""
+    global outbound_limiter
+    outbound_limiter = OutboundLimiter()
+    bot.session.middleware(outbound_limiter)
+    log_debug(logger, "Очередь исходящих сообщений подключена", outbound_limiter.stats())
+    return outbound_limiter
+
+def outbound_queue_depth() -> int:
+    return outbound_limiter.depth if outbound_limiter else 0
@@ -0,0 +1,101 @@
+import os
+from dotenv import load_dotenv
+
+# Загрузка переменных окружения
+load_dotenv(".env")
+
+# Путь к файлу базы данных
+DB_PATH = os.getenv("DB_PATH", "books.db")
+
+# Количество потоков (и соединений только для чтения), выполняющих запросы на чтение
+DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", "4"))
+
+# Параметры SQLite
+DB_JOURNAL_MODE = os.getenv("DB_JOURNAL_MODE", "wal")
+DB_SYNCHRONOUS = os.getenv("DB_SYNCHRONOUS", "normal")
+DB_CACHE_SIZE = int(os.getenv("DB_CACHE_SIZE", "-65536"))  # отрицательное значение - размер в КиБ
+DB_MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE", str(256 * 1024 * 1024)))
+DB_BUSY_TIMEOUT = int(os.getenv("DB_BUSY_TIMEOUT", "5000"))  # миллисекунды
+DB_TEMP_STORE = os.getenv("DB_TEMP_STORE", "memory")
+
+# Реакция на синхронный запрос из потока event loop: off, log или raise
+DB_LOOP_GUARD = os.getenv("DB_LOOP_GUARD", "log").lower()
+
+# Предупреждение в логе, если обновление выполнило больше DB_QUERY_BUDGET SQL-запросов
+# или один и тот же запрос не меньше DB_QUERY_REPEAT_LIMIT раз (0 - не проверять)
+DB_QUERY_BUDGET = int(os.getenv("DB_QUERY_BUDGET", "20"))
+DB_QUERY_REPEAT_LIMIT = int(os.getenv("DB_QUERY_REPEAT_LIMIT", "5"))
+
+# Inline-режим: сколько запросов хранить в кэше результатов и сколько секунд Telegram кэширует ответ
+INLINE_CACHE_SIZE = int(os.getenv("INLINE_CACHE_SIZE", "512"))
+INLINE_CACHE_TIME = int(os.getenv("INLINE_CACHE_TIME", "30"))
+
+# Лимиты исходящих сообщений Bot API: всего в секунду, в один чат в секунду (с запасом на короткую серию),
+# в группу в минуту, и сколько раз повторять запрос после RetryAfter или сетевой ошибки
+SEND_GLOBAL_RATE = float(os.getenv("SEND_GLOBAL_RATE", "30"))
+SEND_CHAT_RATE = float(os.getenv("SEND_CHAT_RATE", "1"))
+SEND_CHAT_BURST = float(os.getenv("SEND_CHAT_BURST", "3"))
+SEND_GROUP_RATE_PER_MINUTE = float(os.getenv("SEND_GROUP_RATE_PER_MINUTE", "20"))
+SEND_MAX_RETRIES = int(os.getenv("SEND_MAX_RETRIES", "5"))
+
+# Каталог с локальными фото книг (например, для начальных данных): Books.photo = "bible.jpg"
+MEDIA_DIR = os.getenv("MEDIA_DIR", "media")
+
+# Адрес сервера Bot API, например локального telegram-bot-api или benchmarks.fake_bot_api; пусто - api.telegram.org
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "")
+
+# Способ получения обновлений: polling или webhook
+BOT_MODE = os.getenv("BOT_MODE", "polling").lower()
+
+# Webhook: публичный адрес (без пути), путь и секрет, который Telegram передает в X-Telegram-Bot-Api-Secret-Token
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+# Адрес встроенного aiohttp-сервера
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8080"))
+# Самоподписанный сертификат: сервер поднимает HTTPS и передает сертификат в setWebhook
+WEBHOOK_SSL_CERT = os.getenv("WEBHOOK_SSL_CERT", "")
+WEBHOOK_SSL_KEY = os.getenv("WEBHOOK_SSL_KEY", "")
+# false - не вызывать setWebhook/deleteWebhook (локальный запуск и нагрузочные тесты без Telegram)
+WEBHOOK_REGISTER = os.getenv("WEBHOOK_REGISTER", "true").lower() in ("1", "true", "yes")
+# Сколько секунд при остановке ждать обработки уже принятых обновлений
+WEBHOOK_SHUTDOWN_TIMEOUT = float(os.getenv("WEBHOOK_SHUTDOWN_TIMEOUT", "10"))
+
+# Хранилище FSM: sqlite (переживает перезапуск) или memory
+FSM_STORAGE = os.getenv("FSM_STORAGE", "sqlite").lower()
+# Сколько состояний держать в памяти (LRU) и как часто сбрасывать изменения в базу, секунд
+FSM_CACHE_SIZE = int(os.getenv("FSM_CACHE_SIZE", "1000"))
+FSM_FLUSH_INTERVAL = float(os.getenv("FSM_FLUSH_INTERVAL", "1"))
+# Через сколько секунд без изменений состояние считается брошенным и удаляется (0 - не удалять)
+FSM_STATE_TTL = int(os.getenv("FSM_STATE_TTL", str(24 * 60 * 60)))
+
+# Сколько секунд книга отложена за покупателем, пока он оформляет заказ
+ORDER_RESERVATION_TTL = int(os.getenv("ORDER_RESERVATION_TTL", str(15 * 60)))
+# Как часто возвращать на склад просроченные резервы, секунд
+ORDER_RESERVATION_SWEEP_INTERVAL = float(os.getenv("ORDER_RESERVATION_SWEEP_INTERVAL", "60"))
+
+# Число процессов-обработчиков: больше 1 - супервизор раздает обновления процессам по chat_id
+WORKERS = int(os.getenv("WORKERS", "1"))
+# Как часто процессы сверяют счетчики изменений каталога, администраторов и заказов, секунд
+SHARD_SYNC_INTERVAL = float(os.getenv("SHARD_SYNC_INTERVAL", "1"))
+
+# Антифлуд: класс обработчика=событий в секунду/запас; администраторов не ограничивает
+THROTTLE_RATES = os.getenv("THROTTLE_RATES", "default=1/5,gallery=3/10,search=2/10,order=0.5/5")
+# Сколько пользователей помнить (LRU); вытесненный пользователь начинает с полным запасом
+THROTTLE_MAX_USERS = int(os.getenv("THROTTLE_MAX_USERS", "100000"))
+
+# Логи: JSON-строки в файл из фонового потока
+LOG_FILE = os.getenv("LOG_FILE", "logs/bot.log")
+# Уровень по умолчанию и уровни отдельных модулей: "handlers=DEBUG,aiogram.event=WARNING"
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_LEVELS = os.getenv("LOG_LEVELS", "aiogram.event=WARNING")
+# Ротация: по размеру файла (МБ) и раз в сутки; сколько старых файлов хранить
+LOG_MAX_MB = int(os.getenv("LOG_MAX_MB", "20"))
+LOG_BACKUPS = int(os.getenv("LOG_BACKUPS", "7"))
+# Дублировать ли логи в консоль
+LOG_CONSOLE = os.getenv("LOG_CONSOLE", "true").lower() in ("1", "true", "yes")
+
+# Метрики в формате Prometheus: http://METRICS_HOST:METRICS_PORT/metrics (0 - не запускать)
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9100"))
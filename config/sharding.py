@@ -0,0 +1,226 @@
+import asyncio
+import multiprocessing
+import queue
+import signal
+from typing import Any, Callable, Dict, List, Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.methods import GetUpdates, TelegramMethod
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler
+from aiohttp import web
+
+from admin.admin_registry import load_admins
+from admin.order_queue import invalidate_status_counts
+from config import settings, send_limiter
+from config.catalog_search import notify_catalog_changed
+from config.metrics import start_metrics_server
+from config.logger_config import setup_logger, log_debug, log_info, log_warning, log_error
+from config.webhook import run_webhook, stop_event, webhook_secret
+from data.db_executor import start_db_executor, shutdown_db_executor, install_loop_guard, run_db_read
+from data.models import db
+from data.shared_state import watch, watch_versions
+
+logger = setup_logger('sharding')
+
+# Таймаут long polling для getUpdates, секунд
+POLLING_TIMEOUT = 30
+# Процессу-обработчику: (номер, всего процессов, очередь обновлений, очередь готовности)
+WorkerTarget = Callable[[int, int, Any, Any], None]
+
+def shard_key(update: Dict[str, Any]) -> int:
+    """chat_id события; если чата нет (inline-запрос, callback inline-сообщения) - id пользователя.
+
+    Для личных чатов это одно и то же, поэтому все события одного пользователя
+    попадают в один процесс вместе с его состоянием FSM.
+    """
+    for name, event in update.items():
+        if name == 'update_id' or not isinstance(event, dict):
+            continue
+        chat = event.get('chat') or (event.get('message') or {}).get('chat')
+        if chat:
+            return chat['id']
+        user = event.get('from') or event.get('user')
+        if user:
+            return user['id']
+    return 0
+
+class ShardWorker:
+    """Обработка обновлений внутри процесса: чаты параллельно, события одного чата строго по порядку"""
+
+    def __init__(self, dp: Dispatcher, bot: Bot):
+        self.dp = dp
+        self.bot = bot
+        # Последняя задача каждого чата: следующая ждет ее завершения
+        self._tails: Dict[int, asyncio.Task] = {}
+        self.processed = 0
+
+    def submit(self, update: Dict[str, Any]) -> None:
+        key = shard_key(update)
+        previous = self._tails.get(key)
+        self._tails[key] = asyncio.create_task(self._process(key, previous, update))
+
+    async def _process(self, key: int, previous: Optional[asyncio.Task], update: Dict[str, Any]) -> None:
+        if previous is not None:
+            await asyncio.wait([previous])
+        try:
+            result = await self.dp.feed_raw_update(self.bot, update)
+            if isinstance(result, TelegramMethod):
+                await self.dp.silent_call_request(self.bot, result)
+        except Exception as e:
+            log_error(logger, e, f"Ошибка при обработке обновления {update.get('update_id')}")
+        finally:
+            self.processed += 1
+            if self._tails.get(key) is asyncio.current_task():
+                del self._tails[key]
+
+    async def drain(self) -> None:
+        while self._tails:
+            await asyncio.wait(list(self._tails.values()))
+
+def _next_batch(updates: Any) -> Optional[List[Dict[str, Any]]]:
+    """Ждет пачку обновлений; None - сигнал остановки или завершение процесса-супервизора"""
+    parent = multiprocessing.parent_process()
+    while True:
+        try:
+            return updates.get(timeout=1)
+        except queue.Empty:
+            if parent is not None and not parent.is_alive():
+                return None
+
+async def run_worker(dp: Dispatcher, bot: Bot, index: int, workers: int, updates: Any, ready: Any) -> None:
+    """Цикл процесса-обработчика: свои соединения с базой, своя сессия бота, свои кэши"""
+    # Остановкой управляет супервизор: Ctrl+C и SIGTERM приходят всей группе процессов
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    db.configure(settings.DB_PATH)
+    start_db_executor()
+    await run_db_read(load_admins)
+    install_loop_guard()
+    if send_limiter.outbound_limiter is not None:
+        send_limiter.outbound_limiter.share(workers)
+    # Кэши этого процесса сбрасываются, когда данные меняет другой процесс
+    watch('catalog', notify_catalog_changed)
+    watch('admins', lambda: run_db_read(load_admins))
+    watch('orders', invalidate_status_counts)
+
+    metrics_runner = await start_metrics_server(settings.METRICS_PORT + 1 + index) if settings.METRICS_PORT else None
+    worker = ShardWorker(dp, bot)
+    await dp.emit_startup(bot=bot, dispatcher=dp, bots=[bot], **dp.workflow_data)
+    sync_task = asyncio.create_task(watch_versions(settings.SHARD_SYNC_INTERVAL))
+    ready.put(index)
+    log_info(logger, "Процесс-обработчик запущен", {"index": index})
+    try:
+        while True:
+            batch = await asyncio.to_thread(_next_batch, updates)
+            if batch is None:
+                break
+            for update in batch:
+                worker.submit(update)
+    finally:
+        sync_task.cancel()
+        await worker.drain()
+        await dp.emit_shutdown(bot=bot, dispatcher=dp, bots=[bot], **dp.workflow_data)
+        await bot.session.close()
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
+        shutdown_db_executor()
+        log_info(logger, "Процесс-обработчик остановлен", {"index": index, "processed": worker.processed})
+
+class Supervisor:
+    """Запускает процессы-обработчики и раздает им обновления по chat_id"""
+
+    def __init__(self, target: WorkerTarget, workers: int):
+        # spawn: дочерний процесс не наследует потоки базы и event loop родителя
+        context = multiprocessing.get_context('spawn')
+        self.queues = [context.Queue() for _ in range(workers)]
+        self.ready = context.Queue()
+        self.processes = [
+            context.Process(target=target, args=(index, workers, self.queues[index], self.ready), name=f'shard-{index}')
+            for index in range(workers)
+        ]
+        self.routed = [0] * workers
+
+    def start(self, timeout: float = 60) -> None:
+        """Запускает процессы и ждет, пока каждый подключится к базе"""
+        for process in self.processes:
+            process.start()
+        for _ in self.processes:
+            self.ready.get(timeout=timeout)
+        log_info(logger, "Процессы-обработчики запущены", {"workers": len(self.processes)})
+
+    def route(self, updates: List[Dict[str, Any]]) -> None:
+        batches: Dict[int, List[Dict[str, Any]]] = {}
+        for update in updates:
+            batches.setdefault(shard_key(update) % len(self.queues), []).append(update)
+        for index, batch in batches.items():
+            self.queues[index].put(batch)
+            self.routed[index] += len(batch)
+
+    def stop(self, timeout: float = 30) -> None:
+        """Просит процессы доработать принятые обновления и дожидается их"""
+        for updates in self.queues:
+            updates.put(None)
+        for process in self.processes:
+            process.join(timeout)
+            if process.is_alive():
+                log_warning(logger, "Процесс не остановился, завершаем принудительно", {"process": process.name})
+                process.terminate()
+                process.join()
+        log_info(logger, "Процессы-обработчики остановлены", {"routed": self.routed})
+
+class ShardingRequestHandler(SimpleRequestHandler):
+    """Принимает обновления webhook и передает их процессам-обработчикам"""
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, supervisor: Supervisor, **kwargs: Any):
+        super().__init__(dispatcher, bot, **kwargs)
+        self.supervisor = supervisor
+
+    async def handle(self, request: web.Request) -> web.Response:
+        if not self.verify_secret(request.headers.get("X-Telegram-Bot-Api-Secret-Token", ""), self.bot):
+            return web.Response(body="Unauthorized", status=401)
+        self.supervisor.route([await request.json(loads=self.bot.session.json_loads)])
+        return web.json_response({})
+
+async def poll_updates(dp: Dispatcher, bot: Bot, supervisor: Supervisor) -> None:
+    """Long polling в супервизоре до SIGINT/SIGTERM"""
+    stop = stop_event()
+    stopping = asyncio.create_task(stop.wait())
+    get_updates = GetUpdates(timeout=POLLING_TIMEOUT, allowed_updates=dp.resolve_used_update_types())
+    request_timeout = int((bot.session.timeout or 0) + POLLING_TIMEOUT)
+    delay = 1.0
+    try:
+        while True:
+            request = asyncio.create_task(bot(get_updates, request_timeout=request_timeout))
+            await asyncio.wait([request, stopping], return_when=asyncio.FIRST_COMPLETED)
+            if not request.done():
+                # Непрочитанные обновления Telegram отдаст при следующем запуске
+                request.cancel()
+                return
+            try:
+                updates = request.result()
+            except Exception as e:
+                log_warning(logger, "Ошибка getUpdates, повтор", {"delay": delay, "error": str(e)})
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 60.0)
+                continue
+            delay = 1.0
+            if updates:
+                get_updates.offset = updates[-1].update_id + 1
+                supervisor.route([update.model_dump(mode='json', by_alias=True, exclude_none=True) for update in updates])
+                log_debug(logger, "Обновления распределены", {"count": len(updates)})
+    finally:
+        stopping.cancel()
+
+async def run_supervisor(dp: Dispatcher, bot: Bot, target: WorkerTarget, workers: int) -> None:
+    """Получает обновления (polling или webhook) и распределяет их по процессам"""
+    supervisor = Supervisor(target, workers)
+    await asyncio.to_thread(supervisor.start)
+    try:
+        if settings.BOT_MODE == "webhook":
+            handler = ShardingRequestHandler(dp, bot, supervisor, secret_token=webhook_secret())
+            await run_webhook(dp, bot, handler=handler)
+        else:
+            await poll_updates(dp, bot, supervisor)
+    finally:
+        await asyncio.to_thread(supervisor.stop)
+        await bot.session.close()
@@ -2,14 +2,17 @@ from aiogram.fsm.state import State, StatesGroup
 from aiogram.fsm.context import FSMContext
 from aiogram.types import Message, CallbackQuery
 from aiogram import Router, F
-from data.models import Order, Books, OrderStatus
+from data.models import Books, OrderStatus
 from config.logger_config import setup_logger, log_error, log_info, log_debug, log_warning
 from typing import Optional, cast, Dict, Any
+from data.db_executor import db_get_or_none, run_db
+from admin.order_queue import invalidate_status_counts
+from config.inventory import reserve_book, release_reservation, place_order
 
 # Настройка логгера
 logger = setup_logger('state_order_handlers')
 
-router = Router()
+router = Router(name="state_order_router")
 
 class UserOrderState(StatesGroup):
     waiting_for_fio = State()
@@ -22,6 +25,13 @@ class AskQuestionState(StatesGroup):
     input_question = State()
     input_answer = State()
 
+async def abort_order(state: FSMContext) -> None:
+    """Сбрасывает оформление заказа и сразу возвращает отложенную книгу на склад, не дожидаясь истечения резерва"""
+    data = await state.get_data()
+    await state.clear()
+    if data.get('reservation_id') and data.get('book_id'):
+        await run_db(release_reservation, data['reservation_id'], data['book_id'])
+
 @router.callback_query(F.data.startswith("order_book_"))
 async def order_book(callback: CallbackQuery, state: FSMContext):
     if not callback.data:
@@ -38,16 +48,25 @@ async def order_book(callback: CallbackQuery, state: FSMContext):
         return
     
     # Получаем информацию о книге
-    book = Books.get_or_none(Books.id == book_id)
+    book = await db_get_or_none(Books, Books.id == book_id)
     if not book:
         if callback.message and isinstance(callback.message, Message):
             await callback.message.answer("Книга не найдена")
         await callback.answer()
         return
     
+    # Откладываем экземпляр на время оформления: проверка наличия и списание - один UPDATE
+    reservation_id = await run_db(reserve_book, book.id, callback.from_user.id)
+    if reservation_id is None:
+        if callback.message and isinstance(callback.message, Message):
+            await callback.message.answer("К сожалению, этой книги сейчас нет в наличии.")
+        await callback.answer()
+        return
+
     # Сохраняем информацию о книге в состояние
     await state.update_data(
-        book_id_from_fsm=book.id,
+        book_id=book.id,
+        reservation_id=reservation_id,
         book_info=f"{book.name} - {book.author}"
     )
     
@@ -57,56 +76,6 @@ async def order_book(callback: CallbackQuery, state: FSMContext):
         await callback.message.answer("Введите ваше ФИО:")
     await callback.answer()
 
-@router.message(UserOrderState.waiting_for_fio)
-async def process_name(message:Message, state:FSMContext):
-    fio = message.text
-    if not fio:
-        await message.reply(text="Пожалуйста, введите ваши ФИО.")
-        return
-    await state.update_data(fio = message.text)
-    await state.set_state(UserOrderState.waiting_for_address)
-    await message.answer(text="Пожалуйста, введите адрес доставки.")
-
-@router.message(UserOrderState.waiting_for_address)
-async def addres_state(message:Message, state:FSMContext):
-    addres = message.text
-    if not addres:
-        await message.reply(text="Пожалуйста, введите адрес доставки.")
-        return
-    await state.update_data(addres = message.text)
-    await state.set_state(UserOrderState.waiting_for_phone)
-    await message.answer(text="Введите ваш номер телефона, для возможности связаться с вами.")
-
-@router.message(UserOrderState.waiting_for_phone)
-async def phone_state(message:Message, state:FSMContext):
-    phone = message.text
-    if not phone:
-        await message.reply(text="Введите ваш номер телефона")
-        return
-    await state.update_data(phone = message.text)
-    
-    # Получаем все данные из состояния
-    data = await state.get_data()
-    
-    if not message.from_user:
-        await message.answer("Ошибка: не удалось получить ID пользователя")
-        return
-    
-    user_id = message.from_user.id
-    
-    # Создаем заказ в базе данных
-    Order.create(
-        telegram_id=user_id,
-        fio=data['fio'],
-        addres=data['addres'],
-        phone=data['phone'],
-        book_id=data['book_id_from_fsm'],
-        book_info=data['book_info']
-    )
-    
-    await message.answer("Спасибо за заказ! Мы свяжемся с вами в ближайшее время.")
-    await state.clear()
-
 @router.message(cast(State, UserOrderState.waiting_for_fio))
 async def process_fio(message: Message, state: FSMContext):
     try:
@@ -124,7 +93,7 @@ async def process_fio(message: Message, state: FSMContext):
 
         # Сохраняем ФИО
         await state.update_data(fio=message.text)
-        log_debug(logger, "ФИО сохранено", {"user_id": message.from_user.id, "fio": message.text})
+        log_debug(logger, "ФИО сохранено", {"user_id": message.from_user.id})
 
         # Запрашиваем адрес
         await message.answer("Введите адрес доставки:")
@@ -150,7 +119,7 @@ async def process_address(message: Message, state: FSMContext):
 
         # Сохраняем адрес
         await state.update_data(address=message.text)
-        log_debug(logger, "Адрес сохранен", {"user_id": message.from_user.id, "address": message.text})
+        log_debug(logger, "Адрес сохранен", {"user_id": message.from_user.id})
 
         # Запрашиваем телефон
         await message.answer("Введите номер телефона:")
@@ -176,7 +145,7 @@ async def process_phone(message: Message, state: FSMContext):
 
         # Сохраняем телефон
         await state.update_data(phone=message.text)
-        log_debug(logger, "Телефон сохранен", {"user_id": message.from_user.id, "phone": message.text})
+        log_debug(logger, "Телефон сохранен", {"user_id": message.from_user.id})
 
         # Получаем все данные
         data: Dict[str, Any] = await state.get_data()
@@ -185,23 +154,20 @@ async def process_phone(message: Message, state: FSMContext):
         if not book_id:
             log_error(logger, ValueError("Отсутствует book_id в данных состояния"), "Ошибка при получении данных заказа")
             await message.answer("Произошла ошибка. Пожалуйста, начните заказ заново.")
-            await state.clear()
+            await abort_order(state)
             return
             
         log_debug(logger, "Получены все данные заказа", {
             "user_id": message.from_user.id,
-            "book_id": book_id,
-            "fio": data.get('fio'),
-            "address": data.get('address'),
-            "phone": data.get('phone')
+            "book_id": book_id
         })
 
         # Получаем информацию о книге
-        book = Books.get_or_none(Books.id == book_id)
+        book = await db_get_or_none(Books, Books.id == book_id)
         if not book:
             log_error(logger, ValueError(f"Книга не найдена: {book_id}"), "Ошибка при получении информации о книге")
             await message.answer("Произошла ошибка. Пожалуйста, начните заказ заново.")
-            await state.clear()
+            await abort_order(state)
             return
         
         # Формируем сообщение для подтверждения
@@ -235,7 +201,7 @@ async def process_confirmation(message: Message, state: FSMContext):
         if message.text and message.text.lower() not in ['да', 'yes', 'верно', 'правильно']:
             log_warning(logger, "Пользователь отменил заказ", {"user_id": message.from_user.id})
             await message.answer("Заказ отменен. Начните заново.")
-            await state.clear()
+            await abort_order(state)
             return
 
         # Получаем данные заказа
@@ -245,43 +211,48 @@ async def process_confirmation(message: Message, state: FSMContext):
         if not book_id:
             log_error(logger, ValueError("Отсутствует book_id в данных состояния"), "Ошибка при получении данных заказа")
             await message.answer("Произошла ошибка. Пожалуйста, начните заказ заново.")
-            await state.clear()
+            await abort_order(state)
             return
             
         log_debug(logger, "Создание заказа", {
             "user_id": message.from_user.id,
-            "book_id": book_id,
-            "fio": data.get('fio'),
-            "address": data.get('address'),
-            "phone": data.get('phone')
+            "book_id": book_id
         })
 
         # Получаем книгу
-        book = Books.get_or_none(Books.id == book_id)
+        book = await db_get_or_none(Books, Books.id == book_id)
         if not book:
             log_error(logger, ValueError(f"Книга не найдена: {book_id}"), "Ошибка при получении информации о книге")
             await message.answer("Произошла ошибка. Пожалуйста, начните заказ заново.")
-            await state.clear()
+            await abort_order(state)
             return
         
         # Получаем статус "новый"
-        new_status = OrderStatus.get_or_none(OrderStatus.name == 'new')
+        new_status = await db_get_or_none(OrderStatus, OrderStatus.name == 'new')
         if not new_status:
             log_error(logger, ValueError("Статус 'new' не найден"), "Ошибка при получении статуса заказа")
             await message.answer("Произошла ошибка. Пожалуйста, попробуйте позже.")
-            await state.clear()
+            await abort_order(state)
             return
         
-        # Создаем заказ
-        order = Order.create(
+        # Создаем заказ на отложенную книгу; списание и заказ - одна транзакция
+        order = await run_db(
+            place_order,
+            data.get('reservation_id'),
+            book.id,
             telegram_id=message.from_user.id,
             fio=data['fio'],
             addres=data['address'],
             phone=data['phone'],
-            book_id=book.id,
             book_info=f"{book.name} - {book.author}",
             status=new_status
         )
+        if order is None:
+            log_warning(logger, "Книга закончилась до подтверждения заказа", {"book_id": book.id})
+            await message.answer("К сожалению, пока вы оформляли заказ, книга закончилась.")
+            await state.clear()
+            return
+        invalidate_status_counts()
         
         log_info(logger, "Заказ успешно создан", {"order_id": order.id})
         
@@ -297,4 +268,4 @@ async def process_confirmation(message: Message, state: FSMContext):
     except Exception as e:
         log_error(logger, e, "Ошибка при создании заказа")
         await message.answer("Произошла ошибка при создании заказа. Пожалуйста, попробуйте позже.")
-        await state.clear()
+        await abort_order(state)
@@ -17,6 +17,7 @@ HELP_TEXT = """
 - /start: Перезапускает бота и возвращает в главное меню.
 - /help: Показывает эту подробную инструкцию.
 - /cancel: Отменяет текущее действие и возвращает в предыдущее меню или главное меню.
+- /stats: Показывает сводку по нагрузке: число обновлений, время ответа обработчиков, вызовы Telegram и запросы к базе.
 
 *Функционал для администраторов:*
 
@@ -25,11 +26,13 @@ HELP_TEXT = """
     *   **Показать книги:** Отображает список всех книг из базы данных с их полным описанием, включая название, автора, цену, количество, описание и *прикрепленное изображение*. Для каждой книги доступны кнопки "✏️ Изменить книгу" и "🗑 Удалить книгу".
     *   **Изменить книгу:** После выбора книги можно изменить ее название, автора, описание, цену, количество или *фотографию*.
     *   **Удалить книгу:** Позволяет удалить выбранную книгу из базы данных после подтверждения.
+    *   **Импорт книг (/import):** Загружает каталог из файла CSV, JSON или XLSX: name, author, price, description, photo, quantity и необязательный id (книга с этим id обновляется). Строки с ошибками пропускаются, ход импорта показывается в одном сообщении.
 
 2.  **📦 Управление заказами:**
-    *   **Новые заказы:** Просмотр заказов, ожидающих обработки (функция в разработке).
-    *   **Все заказы:** Отображает полный список всех заказов с подробной информацией о покупателе, адресе, телефоне, заказанной книге и текущем статусе. Для каждого заказа доступны кнопки "🔄 Изменить статус" и "🗑️ Удалить заказ".
+    *   **Новые заказы:** Показывает количество заказов по статусам. Кнопка "▶️ Взять следующий заказ" переводит самый старый новый заказ в статус "В обработке" и показывает его карточку.
+    *   **Все заказы:** Отображает заказы постранично (от новых к старым) в одном сообщении с подробной информацией о покупателе, адресе, телефоне, заказанной книге и текущем статусе. Кнопками можно листать страницы и фильтровать заказы по статусу и периоду. Для каждого заказа доступны кнопки "🔄 Статус" и "🗑️ Удалить".
     *   **Изменить статус заказа:** Позволяет выбрать заказ и обновить его статус (например, "В обработке", "Отправлен", "Выполнен"). Пользователь получит уведомление об изменении статуса.
+    *   **Выгрузить заказы (/export):** Присылает заказы одним файлом CSV или XLSX для бухгалтерии, с фильтром по периоду и статусу: `/export xlsx 01.09.2026 30.09.2026 delivered`. Текущую выборку списка "Все заказы" выгружают кнопки "📤 CSV" и "📤 XLSX" под ним.
 
 3.  **👥 Управление администраторами:**
     *   **Добавить администратора:** Позволяет добавить нового администратора, запросив его контактные данные (ID пользователя и имя/телефон).
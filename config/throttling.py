@@ -0,0 +1,140 @@
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from aiogram import BaseMiddleware, Dispatcher
+from aiogram.types import Update, User
+
+from admin.admin_registry import is_admin
+from config import settings
+from config.logger_config import setup_logger, log_debug, log_warning
+from config.send_limiter import TokenBucket
+
+logger = setup_logger('throttling')
+
+THROTTLED_TEXT = "⏳ Слишком много запросов, подождите немного"
+
+# Префикс callback_data -> класс обработчика
+CALLBACK_CLASSES = (
+    ('books_gallery', 'gallery'),
+    ('gallery_', 'gallery'),
+    ('album_', 'gallery'),
+    ('search_', 'search'),
+    ('order_book_', 'order'),
+)
+# Группа состояний FSM -> класс обработчика для сообщений в этом состоянии
+STATE_CLASSES = (
+    ('UserOrderState:', 'order'),
+    ('SearchState:', 'search'),
+)
+
+def parse_rates(value: str) -> Dict[str, Tuple[float, float]]:
+    """'default=1/5,gallery=3/10' -> {'default': (1.0, 5.0), 'gallery': (3.0, 10.0)}"""
+    rates: Dict[str, Tuple[float, float]] = {}
+    for item in value.split(','):
+        if not item.strip():
+            continue
+        name, limits = item.split('=')
+        rate, burst = limits.split('/')
+        rates[name.strip()] = (float(rate), float(burst))
+    rates.setdefault('default', (1.0, 5.0))
+    return rates
+
+def throttle_class(update: Update, raw_state: Optional[str]) -> str:
+    """Класс обработчика по событию: определяется до выбора обработчика, без запросов к базе"""
+    if update.callback_query and update.callback_query.data:
+        for prefix, name in CALLBACK_CLASSES:
+            if update.callback_query.data.startswith(prefix):
+                return name
+    elif update.inline_query:
+        return 'search'
+    elif update.message:
+        if update.message.text and update.message.text.startswith('/search'):
+            return 'search'
+        for prefix, name in STATE_CLASSES:
+            if raw_state and raw_state.startswith(prefix):
+                return name
+    return 'default'
+
+class _Entry:
+    __slots__ = ('bucket', 'warned')
+
+    def __init__(self, bucket: TokenBucket):
+        self.bucket = bucket
+        # Предупреждаем один раз за серию отклоненных событий
+        self.warned = False
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """Антифлуд на входе диспетчера: корзина токенов на пользователя и класс обработчика.
+
+    Корзины хранятся в LRU ограниченного размера: вытесняются давно молчащие
+    пользователи, чьи корзины и так полны, поэтому память не растет с числом пользователей.
+    """
+
+    def __init__(self, rates: Optional[Dict[str, Tuple[float, float]]] = None, max_users: Optional[int] = None):
+        self.rates = rates or parse_rates(settings.THROTTLE_RATES)
+        self.max_users = max_users or settings.THROTTLE_MAX_USERS
+        self._entries: 'OrderedDict[Tuple[int, str], _Entry]' = OrderedDict()
+        self.passed: Counter = Counter()
+        self.throttled: Counter = Counter()
+        self.evicted = 0
+
+    def _entry(self, key: Tuple[int, str]) -> _Entry:
+        entry = self._entries.get(key)
+        if entry is None:
+            rate, burst = self.rates.get(key[1], self.rates['default'])
+            entry = self._entries[key] = _Entry(TokenBucket(rate, burst))
+            if len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+                self.evicted += 1
+        else:
+            self._entries.move_to_end(key)
+        return entry
+
+    async def __call__(
+        self,
+        handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any],
+    ) -> Any:
+        user: Optional[User] = data.get('event_from_user')
+        if user is None or is_admin(user.id):
+            return await handler(event, data)
+
+        name = throttle_class(event, data.get('raw_state'))
+        entry = self._entry((user.id, name))
+        if entry.bucket.consume(time.monotonic()):
+            entry.warned = False
+            self.passed[name] += 1
+            return await handler(event, data)
+
+        self.throttled[name] += 1
+        warn = not entry.warned
+        if warn:
+            entry.warned = True
+            log_warning(logger, "Пользователь превысил лимит запросов", {"user_id": user.id, "class": name})
+        if event.callback_query:
+            # Без ответа на callback кнопка крутится до таймаута Telegram: повторно отвечаем без текста
+            await event.callback_query.answer(THROTTLED_TEXT if warn else None)
+        elif event.message and warn:
+            await event.message.answer(THROTTLED_TEXT)
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        """Пропущенные и отклоненные события по классам и размер хранилища корзин"""
+        return {
+            "passed": dict(self.passed),
+            "throttled": dict(self.throttled),
+            "users": len(self._entries),
+            "evicted": self.evicted,
+        }
+
+throttling: Optional[ThrottlingMiddleware] = None
+
+def install_throttling(dp: Dispatcher) -> ThrottlingMiddleware:
+    """Подключает антифлуд после FSM-middleware диспетчера, чтобы видеть текущее состояние"""
+    global throttling
+    throttling = ThrottlingMiddleware()
+    dp.update.outer_middleware(throttling)
+    log_debug(logger, "Антифлуд подключен", {"rates": throttling.rates})
+    return throttling
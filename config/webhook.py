@@ -0,0 +1,109 @@
+import asyncio
+import signal
+import ssl
+from typing import Any, Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import FSInputFile
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+from config import settings
+from config.logger_config import setup_logger, log_info, log_warning, log_error
+
+logger = setup_logger('webhook')
+
+def webhook_url() -> str:
+    return settings.WEBHOOK_URL.rstrip('/') + settings.WEBHOOK_PATH
+
+def webhook_secret() -> str:
+    """Секрет для заголовка X-Telegram-Bot-Api-Secret-Token.
+
+    Без него любой, кто знает адрес webhook, мог бы прислать поддельное обновление от имени администратора.
+    """
+    if not settings.WEBHOOK_SECRET:
+        raise ValueError("WEBHOOK_SECRET не задан: режим webhook без проверки секрета не запускается")
+    return settings.WEBHOOK_SECRET
+
+def _ssl_context() -> Optional[ssl.SSLContext]:
+    if not (settings.WEBHOOK_SSL_CERT and settings.WEBHOOK_SSL_KEY):
+        return None
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(settings.WEBHOOK_SSL_CERT, settings.WEBHOOK_SSL_KEY)
+    return context
+
+def stop_event() -> asyncio.Event:
+    """Событие, которое устанавливают SIGINT/SIGTERM"""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, stop.set)
+        except (NotImplementedError, RuntimeError):
+            # Windows: остановка через KeyboardInterrupt, который отменит ожидание события
+            pass
+    return stop
+
+def build_webhook_app(dp: Dispatcher, bot: Bot, register: Optional[bool] = None,
+                      handler: Optional[SimpleRequestHandler] = None) -> web.Application:
+    """aiohttp-приложение с обработчиком обновлений и жизненным циклом webhook"""
+    secret = webhook_secret()
+    register = settings.WEBHOOK_REGISTER if register is None else register
+    handler = handler or SimpleRequestHandler(dispatcher=dp, bot=bot, secret_token=secret)
+    app = web.Application()
+
+    async def on_startup(app: web.Application) -> None:
+        if not register:
+            log_warning(logger, "setWebhook пропущен (WEBHOOK_REGISTER=false)")
+            return
+        certificate = FSInputFile(settings.WEBHOOK_SSL_CERT) if settings.WEBHOOK_SSL_CERT else None
+        await bot.set_webhook(
+            webhook_url(),
+            certificate=certificate,
+            secret_token=secret,
+            allowed_updates=dp.resolve_used_update_types()
+        )
+        log_info(logger, "Webhook установлен", {"url": webhook_url()})
+
+    async def on_shutdown(app: web.Application) -> None:
+        # Новые запросы сервер уже не принимает; даем досчитать обновления, принятые в фоне
+        pending = list(handler._background_feed_update_tasks)
+        if pending:
+            log_info(logger, "Ожидание обработки принятых обновлений", {"count": len(pending)})
+            done, not_done = await asyncio.wait(pending, timeout=settings.WEBHOOK_SHUTDOWN_TIMEOUT)
+            if not_done:
+                log_warning(logger, "Не все обновления обработаны до остановки", {"count": len(not_done)})
+        if register:
+            try:
+                await bot.delete_webhook()
+                log_info(logger, "Webhook удален")
+            except Exception as e:
+                log_error(logger, e, "Ошибка при удалении webhook")
+
+    app.on_startup.append(on_startup)
+    # Должен выполниться раньше, чем обработчик закроет сессию бота
+    app.on_shutdown.append(on_shutdown)
+    handler.register(app, path=settings.WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+    return app
+
+async def run_webhook(dp: Dispatcher, bot: Bot, **kwargs: Any) -> None:
+    """Запускает сервер webhook и работает до SIGINT/SIGTERM"""
+    app = build_webhook_app(dp, bot, **kwargs)
+    runner = web.AppRunner(app, shutdown_timeout=settings.WEBHOOK_SHUTDOWN_TIMEOUT)
+    await runner.setup()
+    site = web.TCPSite(runner, settings.WEBHOOK_HOST, settings.WEBHOOK_PORT, ssl_context=_ssl_context())
+
+    stop = stop_event()
+    try:
+        await site.start()
+        log_info(logger, "Сервер webhook запущен", {
+            "host": settings.WEBHOOK_HOST,
+            "port": settings.WEBHOOK_PORT,
+            "path": settings.WEBHOOK_PATH,
+            "tls": bool(settings.WEBHOOK_SSL_CERT)
+        })
+        await stop.wait()
+    finally:
+        log_info(logger, "Остановка сервера webhook")
+        await runner.cleanup()
@@ -0,0 +1,107 @@
+from peewee import SqliteDatabase
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.request import pathname2url
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from config import settings
+from data.query_stats import record_query
+
+logger = logging.getLogger(__name__)
+
+LOOP_GUARD_MODES = ('off', 'log', 'raise')
+
+# Параметры, которые применяются только к соединению-писателю
+WRITER_ONLY_PRAGMAS = ('journal_mode', 'synchronous')
+
+class SyncQueryOnLoopError(RuntimeError):
+    """Синхронный запрос к базе данных из потока event loop"""
+    pass
+
+def default_pragmas() -> Dict[str, Any]:
+    """Профиль производительности SQLite из настроек"""
+    return {
+        'journal_mode': settings.DB_JOURNAL_MODE,
+        'synchronous': settings.DB_SYNCHRONOUS,
+        'cache_size': settings.DB_CACHE_SIZE,
+        'mmap_size': settings.DB_MMAP_SIZE,
+        'busy_timeout': settings.DB_BUSY_TIMEOUT,
+        'temp_store': settings.DB_TEMP_STORE,
+    }
+
+class BotDatabase(SqliteDatabase):
+    """SQLite с разделением соединений на писателя и читателей
+
+    Потоки, помеченные через mark_read_only_thread(), открывают файл базы
+    в режиме только для чтения (mode=ro). В режиме WAL такие соединения
+    не блокируются записью заказов.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._guard_mode = 'off'
+        self._loop_thread_id: Optional[int] = None
+        self._thread_role = threading.local()
+
+    def configure(self, path: str, pragmas: Optional[Dict[str, Any]] = None) -> None:
+        """Инициализирует базу с профилем производительности"""
+        pragmas = pragmas if pragmas is not None else default_pragmas()
+        timeout = pragmas.get('busy_timeout', settings.DB_BUSY_TIMEOUT) / 1000
+        self.init(path, pragmas=pragmas, timeout=timeout)
+        logger.info("База данных %s настроена: %s", path, pragmas)
+
+    def mark_read_only_thread(self) -> None:
+        """Помечает текущий поток как читателя"""
+        self._thread_role.read_only = True
+
+    def is_read_only_thread(self) -> bool:
+        return getattr(self._thread_role, 'read_only', False)
+
+    def _read_only_uri(self) -> Optional[str]:
+        if not self.database or self.database == ':memory:' or self.database.startswith('file:'):
+            return None
+        return 'file:%s?mode=ro' % pathname2url(os.path.abspath(self.database))
+
+    def _connect(self) -> sqlite3.Connection:
+        uri = self._read_only_uri() if self.is_read_only_thread() else None
+        if uri is None:
+            return super()._connect()
+        params = dict(self.connect_params, uri=True)
+        conn = sqlite3.connect(uri, timeout=self._timeout, isolation_level=None, **params)
+        try:
+            self._add_conn_hooks(conn)
+        except Exception:
+            conn.close()
+            raise
+        return conn
+
+    def _set_pragmas(self, conn: sqlite3.Connection) -> None:
+        pragmas: List[Tuple[str, Any]] = self._pragmas
+        if self.is_read_only_thread():
+            pragmas = [(name, value) for name, value in pragmas if name not in WRITER_ONLY_PRAGMAS]
+        cursor = conn.cursor()
+        for pragma, value in pragmas:
+            cursor.execute('PRAGMA %s = %s;' % (pragma, value))
+        cursor.close()
+
+    def set_loop_guard(self, mode: str, loop_thread_id: Optional[int] = None) -> None:
+        """Включает проверку запросов для потока event loop"""
+        if mode not in LOOP_GUARD_MODES:
+            raise ValueError(f"Неизвестный режим проверки: {mode}. Допустимо: {', '.join(LOOP_GUARD_MODES)}")
+        self._guard_mode = mode
+        self._loop_thread_id = loop_thread_id if loop_thread_id is not None else threading.get_ident()
+
+    def execute_sql(self, sql: str, params: Any = None, *args: Any, **kwargs: Any) -> Any:
+        if self._guard_mode != 'off' and threading.get_ident() == self._loop_thread_id:
+            if self._guard_mode == 'raise':
+                raise SyncQueryOnLoopError(f"Синхронный запрос в потоке event loop: {sql[:200]}")
+            logger.warning("Синхронный запрос в потоке event loop: %s", sql[:200], stack_info=True)
+        started = time.perf_counter()
+        try:
+            return super().execute_sql(sql, params, *args, **kwargs)
+        finally:
+            # Учитываем в счетчике обновления, из которого пришел запрос
+            record_query(sql, time.perf_counter() - started)
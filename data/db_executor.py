@@ -0,0 +1,136 @@
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Type, TypeVar
+
+from peewee import Model, Query
+
+from config import settings
+from config.logger_config import setup_logger, log_debug, log_info
+from data.models import db
+
+logger = setup_logger('db_executor')
+
+T = TypeVar('T')
+
+# Один поток-писатель: запись в SQLite все равно сериализуется блокировкой файла
+_writer: Optional[ThreadPoolExecutor] = None
+# Потоки-читатели со своими соединениями только для чтения (каталог, списки)
+_readers: Optional[ThreadPoolExecutor] = None
+_connections: List[Any] = []
+_connections_lock = threading.Lock()
+
+def _register_thread_connection() -> None:
+    db.connect(reuse_if_open=True)
+    with _connections_lock:
+        _connections.append(db.connection())
+    log_debug(logger, "Открыто соединение для потока", {"thread": threading.current_thread().name})
+
+def _open_writer_connection() -> None:
+    """Открывает соединение-писатель"""
+    _register_thread_connection()
+
+def _open_reader_connection() -> None:
+    """Открывает соединение только для чтения"""
+    db.mark_read_only_thread()
+    _register_thread_connection()
+
+def start_db_executor(read_workers: Optional[int] = None) -> None:
+    """Создает пулы потоков писателя и читателей"""
+    global _writer, _readers
+    if _writer is None:
+        _writer = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix='db-writer',
+            initializer=_open_writer_connection
+        )
+    if _readers is None:
+        workers = read_workers or settings.DB_READ_POOL_SIZE
+        _readers = ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix='db-reader',
+            initializer=_open_reader_connection
+        )
+        log_info(logger, "Пулы потоков базы данных запущены", {"readers": workers})
+
+def _writer_executor() -> ThreadPoolExecutor:
+    start_db_executor()
+    assert _writer is not None
+    return _writer
+
+def _reader_executor() -> ThreadPoolExecutor:
+    start_db_executor()
+    assert _readers is not None
+    return _readers
+
+def install_loop_guard(mode: Optional[str] = None) -> None:
+    """Включает проверку синхронных запросов из текущего потока event loop"""
+    mode = mode or settings.DB_LOOP_GUARD
+    db.set_loop_guard(mode, threading.get_ident())
+    log_info(logger, "Проверка запросов в потоке event loop", {"mode": mode})
+
+def shutdown_db_executor() -> None:
+    """Останавливает пулы и закрывает соединения всех потоков"""
+    global _writer, _readers
+    for executor in (_readers, _writer):
+        if executor is not None:
+            executor.shutdown(wait=True)
+    _writer = None
+    _readers = None
+    with _connections_lock:
+        for connection in _connections:
+            connection.close()
+        _connections.clear()
+    db.set_loop_guard('off')
+    log_info(logger, "Пулы потоков базы данных остановлены")
+
+def _call_in_thread(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    db.connect(reuse_if_open=True)
+    return func(*args, **kwargs)
+
+async def _submit(executor: ThreadPoolExecutor, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    loop = asyncio.get_running_loop()
+    call = functools.partial(_call_in_thread, func, *args, **kwargs)
+    # run_in_executor не передает контекст в поток, а счетчик запросов обновления живет в нем
+    return await loop.run_in_executor(executor, contextvars.copy_context().run, call)
+
+async def run_db(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Выполняет функцию с запросами к базе данных в потоке-писателе"""
+    return await _submit(_writer_executor(), func, *args, **kwargs)
+
+async def run_db_read(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Выполняет функцию только с чтением в пуле соединений для чтения"""
+    return await _submit(_reader_executor(), func, *args, **kwargs)
+
+async def run_db_atomic(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Выполняет функцию в потоке-писателе внутри одной транзакции"""
+    def atomic_call() -> T:
+        with db.atomic():
+            return func(*args, **kwargs)
+    return await run_db(atomic_call)
+
+async def db_get_or_none(model: Type[Model], *query: Any, **filters: Any) -> Any:
+    return await run_db_read(model.get_or_none, *query, **filters)
+
+async def db_get_or_create(model: Type[Model], **kwargs: Any) -> Any:
+    return await run_db(model.get_or_create, **kwargs)
+
+async def db_first(query: Query) -> Any:
+    return await run_db_read(query.first)
+
+async def db_fetch_all(query: Query) -> List[Any]:
+    return await run_db_read(list, query)
+
+async def db_count(query: Query) -> int:
+    return await run_db_read(query.count)
+
+async def db_create(model: Type[Model], **data: Any) -> Any:
+    return await run_db(model.create, **data)
+
+async def db_save(instance: Model) -> Any:
+    return await run_db(instance.save)
+
+async def db_delete(instance: Model) -> Any:
+    return await run_db(instance.delete_instance)
@@ -1,4 +1,10 @@
-from models import db, OrderStatus
+import sys
+import os
+
+# Добавляем корневую директорию проекта в путь Python
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.models import db, OrderStatus
 
 def init_order_statuses():
     """Инициализация статусов заказов"""
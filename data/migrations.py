@@ -0,0 +1,177 @@
+from typing import Callable, List, Tuple
+
+from peewee import OperationalError
+
+from config.logger_config import setup_logger, log_debug, log_info, log_warning
+from data.models import db, Books, Order, Greeting, Admin, GalleryText, OrderPretext, OrderStatus, Dialog, MediaFile, FsmState, SharedVersion, StockReservation
+
+logger = setup_logger('migrations')
+
+# Упорядоченный список шагов: (версия, описание, функция)
+MIGRATIONS: List[Tuple[int, str, Callable[[], None]]] = []
+
+def migration(version: int, description: str) -> Callable[[Callable[[], None]], Callable[[], None]]:
+    """Регистрирует шаг миграции схемы. Каждый шаг должен быть идемпотентным"""
+    def decorator(func: Callable[[], None]) -> Callable[[], None]:
+        MIGRATIONS.append((version, description, func))
+        MIGRATIONS.sort(key=lambda item: item[0])
+        return func
+    return decorator
+
+def _table_columns(table: str) -> List[str]:
+    cursor = db.execute_sql(f'PRAGMA table_info("{table}");')
+    return [column[1] for column in cursor.fetchall()]
+
+@migration(1, "Базовые таблицы")
+def create_base_tables() -> None:
+    db.create_tables([
+        Books,
+        Order,
+        Greeting,
+        Admin,
+        GalleryText,
+        OrderPretext,
+        OrderStatus,
+        Dialog
+    ], safe=True)
+    # Таблица статусов со старым именем, на которую могут ссылаться существующие базы
+    db.execute_sql('CREATE TABLE IF NOT EXISTS order_statuses (id INTEGER PRIMARY KEY, name VARCHAR(255) UNIQUE, description TEXT, client_message TEXT, emoji VARCHAR(255));')
+
+@migration(2, "Колонки role и display_name в таблице admin")
+def add_admin_role_columns() -> None:
+    columns = _table_columns('admin')
+    if 'role' not in columns:
+        db.execute_sql('ALTER TABLE admin ADD COLUMN role VARCHAR(255) DEFAULT "admin";')
+    if 'display_name' not in columns:
+        db.execute_sql('ALTER TABLE admin ADD COLUMN display_name VARCHAR(255);')
+
+@migration(3, "Колонки status_id, created_at и updated_at в таблице order")
+def add_order_status_and_dates() -> None:
+    columns = _table_columns('order')
+    if not {'status_id', 'created_at', 'updated_at'} <= set(columns):
+        # Индексы, созданные по отсутствующим колонкам, SQLite строит по строковому литералу.
+        # Удаляем их, шаг 4 создаст индексы заново
+        Order._schema.drop_indexes(safe=True)
+    if 'status_id' not in columns:
+        db.execute_sql('ALTER TABLE "order" ADD COLUMN status_id INTEGER REFERENCES orderstatus (id);')
+        if 'status' in columns:
+            # В старой схеме статус хранился названием в NOT NULL колонке без значения по умолчанию
+            db.execute_sql('UPDATE "order" SET status_id = (SELECT id FROM orderstatus WHERE orderstatus.name = "order".status);')
+            db.execute_sql('ALTER TABLE "order" DROP COLUMN status;')
+    if 'created_at' not in columns:
+        db.execute_sql('ALTER TABLE "order" ADD COLUMN created_at DATETIME;')
+        db.execute_sql('UPDATE "order" SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL;')
+    if 'updated_at' not in columns:
+        db.execute_sql('ALTER TABLE "order" ADD COLUMN updated_at DATETIME;')
+        db.execute_sql('UPDATE "order" SET updated_at = created_at WHERE updated_at IS NULL;')
+
+@migration(4, "Индексы для поиска заказов и открытых диалогов")
+def create_hot_path_indexes() -> None:
+    Order._schema.create_indexes(safe=True)
+    Dialog._schema.create_indexes(safe=True)
+
+@migration(5, "Индекс для списка заказов с фильтром по статусу")
+def create_order_status_page_index() -> None:
+    Order._schema.create_indexes(safe=True)
+
+def _fts_values(row: str) -> str:
+    # unicode61 снимает диакритику только с латиницы, поэтому ё приводим к е сами
+    return ", ".join(
+        f"replace(replace({row}.{column}, 'ё', 'е'), 'Ё', 'Е')" for column in ('name', 'author', 'description')
+    )
+
+@migration(6, "Полнотекстовый индекс каталога books_fts")
+def create_books_fts() -> None:
+    try:
+        # Внешнее содержимое: текст хранится только в books, индекс синхронизируют триггеры.
+        # unicode61 приводит кириллицу к нижнему регистру. Префиксные запросы "пушк*" идут
+        # по словарю термов без отдельных prefix-индексов, которые замедляли бы запись
+        db.execute_sql(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5("
+            "name, author, description, content='books', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2');"
+        )
+    except OperationalError as e:
+        # SQLite собран без FTS5: поиск будет работать через LIKE
+        log_warning(logger, "FTS5 недоступен, полнотекстовый индекс не создан", {"error": str(e)})
+        return
+    insert_new = f"INSERT INTO books_fts (rowid, name, author, description) VALUES (new.id, {_fts_values('new')}); "
+    delete_old = f"INSERT INTO books_fts (books_fts, rowid, name, author, description) VALUES ('delete', old.id, {_fts_values('old')}); "
+    db.execute_sql(f"CREATE TRIGGER IF NOT EXISTS books_fts_insert AFTER INSERT ON books BEGIN {insert_new}END;")
+    db.execute_sql(f"CREATE TRIGGER IF NOT EXISTS books_fts_delete AFTER DELETE ON books BEGIN {delete_old}END;")
+    db.execute_sql(
+        "CREATE TRIGGER IF NOT EXISTS books_fts_update AFTER UPDATE OF name, author, description ON books "
+        f"BEGIN {delete_old}{insert_new}END;"
+    )
+    # 'rebuild' читает books без замены ё, поэтому заполняем индекс тем же выражением, что и триггеры
+    db.execute_sql("INSERT INTO books_fts (books_fts) VALUES ('delete-all');")
+    db.execute_sql(f"INSERT INTO books_fts (rowid, name, author, description) SELECT id, {_fts_values('books')} FROM books;")
+
+@migration(7, "Таблица mediafile с file_id загруженных фото")
+def create_media_files() -> None:
+    db.create_tables([MediaFile], safe=True)
+
+@migration(8, "Таблица fsmstate для состояний FSM")
+def create_fsm_states() -> None:
+    db.create_tables([FsmState], safe=True)
+
+# Таблица -> счетчик в sharedversion, который увеличивают триггеры при изменении
+SHARED_VERSIONS = {'books': 'catalog', 'admin': 'admins', 'order': 'orders'}
+# Колонки, UPDATE которых увеличивает счетчик. Остаток книги (резерв, возврат, заказ) кэши
+# каталога не сбрасывает, а заказы считаются по статусам
+VERSIONED_COLUMNS = {'books': 'name, author, description, photo, price', 'order': 'status_id'}
+
+def _create_version_triggers(table: str, name: str) -> None:
+    columns = VERSIONED_COLUMNS.get(table)
+    update = f'UPDATE OF {columns}' if columns else 'UPDATE'
+    for event, suffix in (('INSERT', 'ai'), (update, 'au'), ('DELETE', 'ad')):
+        db.execute_sql(
+            f'CREATE TRIGGER IF NOT EXISTS {table}_version_{suffix} AFTER {event} ON "{table}" BEGIN '
+            f"UPDATE sharedversion SET version = version + 1 WHERE name = '{name}'; END;"
+        )
+
+@migration(9, "Таблица sharedversion и триггеры счетчиков изменений")
+def create_shared_versions() -> None:
+    db.create_tables([SharedVersion], safe=True)
+    for table, name in SHARED_VERSIONS.items():
+        db.execute_sql('INSERT OR IGNORE INTO sharedversion (name, version) VALUES (?, 0);', (name,))
+        _create_version_triggers(table, name)
+
+@migration(10, "Таблица stockreservation для резерва книг на время оформления заказа")
+def create_stock_reservations() -> None:
+    db.create_tables([StockReservation], safe=True)
+
+@migration(11, "Триггеры счетчиков изменений только по колонкам из VERSIONED_COLUMNS")
+def narrow_version_triggers() -> None:
+    for table in VERSIONED_COLUMNS:
+        db.execute_sql(f'DROP TRIGGER IF EXISTS {table}_version_au;')
+        _create_version_triggers(table, SHARED_VERSIONS[table])
+
+def latest_version() -> int:
+    return MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+def current_version() -> int:
+    db.execute_sql('CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL);')
+    row = db.execute_sql('SELECT MAX(version) FROM schema_version;').fetchone()
+    return row[0] or 0
+
+def apply_migrations() -> int:
+    """Применяет недостающие шаги миграции и возвращает версию схемы"""
+    version = current_version()
+    target = latest_version()
+    if version >= target:
+        log_debug(logger, "Схема базы данных актуальна", {"version": version})
+        return version
+
+    for step_version, description, func in MIGRATIONS:
+        if step_version <= version:
+            continue
+        log_info(logger, "Миграция", {"version": step_version, "description": description})
+        with db.atomic():
+            func()
+            db.execute_sql('DELETE FROM schema_version;')
+            db.execute_sql('INSERT INTO schema_version (version) VALUES (?);', (step_version,))
+        version = step_version
+
+    log_info(logger, "Схема базы данных обновлена", {"version": version})
+    return version
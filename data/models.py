@@ -1,22 +1,17 @@
 from peewee import Model, SqliteDatabase, CharField, DecimalField, IntegerField, DateTimeField, TextField, SQL, FloatField, ForeignKeyField, BooleanField
 from datetime import datetime
 from typing import Optional, List, Dict, Any, Union, TypeVar, Generic
-import logging
-import traceback
-
-# Настройка логирования
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('debug.log'),
-        logging.StreamHandler()
-    ]
-)
-logger = logging.getLogger(__name__)
+
+from playhouse.sqlite_ext import AutoIncrementField, FTS5Model, RowIDField, SearchField
+
+from config.logger_config import setup_logger
+from data.database import BotDatabase
+
+# Логи моделей пишутся через общую очередь; персональные данные клиентов в них не попадают
+logger = setup_logger('models')
 
 # Создаем прямое соединение с базой данных (без указания имени файла здесь)
-db = SqliteDatabase(None, check_same_thread=False)
+db = BotDatabase(None, check_same_thread=False)
 
 class ValidationError(Exception):
     """Кастомный класс для ошибок валидации"""
@@ -30,19 +25,18 @@ class BaseModel(Model):
 
     def validate(self) -> None:
         """Базовый метод валидации"""
-        logger.debug(f"Вызов базового метода валидации для {self.__class__.__name__}")
+        logger.debug("Вызов базового метода валидации для %s", self.__class__.__name__)
 
     def save(self, *args: Any, **kwargs: Any) -> bool:
         """Переопределяем метод save для добавления логирования"""
         try:
-            logger.debug(f"Начало сохранения {self.__class__.__name__} с параметрами: args={args}, kwargs={kwargs}")
+            logger.debug("Начало сохранения %s", self.__class__.__name__)
             self.validate()
             result = super(BaseModel, self).save(*args, **kwargs)
-            logger.info(f"Успешно сохранена запись {self.__class__.__name__} с id {getattr(self, 'id', 'unknown')}")
+            logger.debug("Успешно сохранена запись %s с id %s", self.__class__.__name__, getattr(self, 'id', 'unknown'))
             return result
         except Exception as e:
-            logger.error(f"Ошибка при сохранении {self.__class__.__name__}: {str(e)}")
-            logger.error(f"Traceback: {traceback.format_exc()}")
+            logger.error("Ошибка при сохранении %s: %s", self.__class__.__name__, e, exc_info=True)
             raise
 
 class Books(BaseModel):
@@ -54,24 +48,28 @@ class Books(BaseModel):
     photo = CharField()
     quantity = IntegerField()
 
-    def validate(self) -> None:
-        logger.debug(f"Валидация книги: name={self.name}, author={self.author}, price={self.price}, quantity={self.quantity}")
+    def validation_error(self) -> Optional[str]:
+        """Первое нарушенное правило или None; те же правила проверяет импорт каталога"""
         if not self.name:
-            logger.error("Ошибка валидации: отсутствует название книги")
-            raise ValidationError("Название книги обязательно")
+            return "Название книги обязательно"
         if not self.author:
-            logger.error("Ошибка валидации: отсутствует автор книги")
-            raise ValidationError("Автор книги обязателен")
+            return "Автор книги обязателен"
         if not self.description:
-            logger.error("Ошибка валидации: отсутствует описание книги")
-            raise ValidationError("Описание книги обязательно")
+            return "Описание книги обязательно"
         if not self.photo:
-            logger.error("Ошибка валидации: отсутствует фото книги")
-            raise ValidationError("Фото книги обязательно")
+            return "Фото книги обязательно"
+        return None
+
+    def validate(self) -> None:
+        logger.debug("Валидация книги: name=%s, price=%s, quantity=%s", self.name, self.price, self.quantity)
+        error = self.validation_error()
+        if error:
+            logger.error("Ошибка валидации книги: %s", error)
+            raise ValidationError(error)
 
     def save(self, *args: Any, **kwargs: Any) -> bool:
         try:
-            logger.debug(f"Сохранение книги: name={self.name}, author={self.author}, price={self.price}, quantity={self.quantity}")
+            logger.debug("Сохранение книги: name=%s, price=%s, quantity=%s", self.name, self.price, self.quantity)
             # Проверка на None значения
             if self.price is None:
                 logger.error("Ошибка валидации: отсутствует цена книги")
@@ -82,8 +80,7 @@ class Books(BaseModel):
             
             return super().save(*args, **kwargs)
         except Exception as e:
-            logger.error(f"Ошибка при сохранении книги: {str(e)}")
-            logger.error(f"Traceback: {traceback.format_exc()}")
+            logger.error("Ошибка при сохранении книги: %s", e, exc_info=True)
             raise
 
 class OrderStatus(BaseModel):
@@ -93,7 +90,7 @@ class OrderStatus(BaseModel):
     emoji = CharField()
 
     def validate(self) -> None:
-        logger.debug(f"Валидация статуса заказа: name={self.name}, emoji={self.emoji}")
+        logger.debug("Валидация статуса заказа: name=%s", self.name)
         if not self.name:
             logger.error("Ошибка валидации: отсутствует название статуса")
             raise ValidationError("Название статуса обязательно")
@@ -157,7 +154,7 @@ class OrderStatus(BaseModel):
 
 class Order(BaseModel):
     id = IntegerField(primary_key=True)
-    telegram_id = IntegerField()
+    telegram_id = IntegerField(index=True)
     fio = CharField()
     addres = CharField()
     phone = CharField()
@@ -167,8 +164,15 @@ class Order(BaseModel):
     created_at = DateTimeField(default=datetime.now)
     updated_at = DateTimeField(default=datetime.now)
 
+    class Meta:
+        # Постраничный просмотр заказов по дате создания, в том числе с фильтром по статусу
+        indexes = (
+            (('created_at', 'id'), False),
+            (('status', 'created_at', 'id'), False),
+        )
+
     def validate(self) -> None:
-        logger.debug(f"Валидация заказа: telegram_id={self.telegram_id}, fio={self.fio}, phone={self.phone}")
+        logger.debug("Валидация заказа: id=%s", self.id)
         if not self.telegram_id:
             logger.error("Ошибка валидации: отсутствует ID пользователя Telegram")
             raise ValidationError("ID пользователя Telegram обязателен")
@@ -192,15 +196,52 @@ class Order(BaseModel):
             raise ValidationError("Статус заказа обязателен")
 
     def save(self, *args: Any, **kwargs: Any) -> bool:
-        logger.debug(f"Сохранение заказа: telegram_id={self.telegram_id}, fio={self.fio}, phone={self.phone}")
+        logger.debug("Сохранение заказа: id=%s", self.id)
         self.updated_at = datetime.now()
         return super(Order, self).save(*args, **kwargs)
 
+class BooksFts(FTS5Model):
+    """Полнотекстовый индекс каталога. Таблицу и триггеры синхронизации создает миграция"""
+    rowid = RowIDField()
+    name = SearchField()
+    author = SearchField()
+    description = SearchField()
+
+    class Meta:
+        database = db
+        table_name = 'books_fts'
+
+class MediaFile(BaseModel):
+    """Файлы, уже загруженные в Telegram: хэш содержимого -> file_id"""
+    sha256 = CharField(unique=True)
+    file_id = CharField()
+    created_at = DateTimeField(default=datetime.now)
+
+class FsmState(BaseModel):
+    """Состояние и данные FSM пользователя: ключ StorageKey -> состояние и JSON с данными"""
+    key = CharField(primary_key=True)
+    state = CharField(null=True)
+    data = TextField(default='{}')
+    updated_at = DateTimeField(default=datetime.now, index=True)
+
+class StockReservation(BaseModel):
+    """Экземпляр книги, отложенный под оформляемый заказ до expires_at"""
+    # AUTOINCREMENT: id удаленного резерва не достанется новому, и поздняя отмена не снимет чужой резерв
+    id = AutoIncrementField()
+    book = ForeignKeyField(Books, index=True)
+    user_id = IntegerField()
+    expires_at = DateTimeField(index=True)
+
+class SharedVersion(BaseModel):
+    """Счетчики изменений общих данных (каталог, администраторы, заказы) для процессов-обработчиков"""
+    name = CharField(primary_key=True)
+    version = IntegerField(default=0)
+
 class Greeting(BaseModel):
     text = TextField()
 
     def validate(self) -> None:
-        logger.debug(f"Валидация приветствия: text={self.text[:50]}...")
+        logger.debug("Валидация приветствия")
         if not self.text:
             logger.error("Ошибка валидации: отсутствует текст приветствия")
             raise ValidationError("Текст приветствия обязателен")
@@ -209,7 +250,7 @@ class GalleryText(BaseModel):
     text = TextField()
 
     def validate(self) -> None:
-        logger.debug(f"Валидация текста галереи: text={self.text[:50]}...")
+        logger.debug("Валидация текста галереи")
         if not self.text:
             logger.error("Ошибка валидации: отсутствует текст галереи")
             raise ValidationError("Текст галереи обязателен")
@@ -218,7 +259,7 @@ class OrderPretext(BaseModel):
     text = TextField()
 
     def validate(self) -> None:
-        logger.debug(f"Валидация текста оформления заказа: text={self.text[:50]}...")
+        logger.debug("Валидация текста оформления заказа")
         if not self.text:
             logger.error("Ошибка валидации: отсутствует текст оформления заказа")
             raise ValidationError("Текст оформления заказа обязателен")
@@ -231,7 +272,7 @@ class Admin(BaseModel):
     display_name = CharField(null=True)
 
     def validate(self) -> None:
-        logger.debug(f"Валидация администратора: user_id={self.user_id}, user_name={self.user_name}, role={self.role}")
+        logger.debug("Валидация администратора: user_id=%s, role=%s", self.user_id, self.role)
         if not self.user_id:
             logger.error("Ошибка валидации: отсутствует ID пользователя")
             raise ValidationError("ID пользователя обязателен")
@@ -255,8 +296,15 @@ class Dialog(BaseModel):
     updated_at = DateTimeField(default=datetime.now)
     is_closed = BooleanField(default=False)
 
+    class Meta:
+        # Поиск открытого диалога пользователя и администратора
+        indexes = (
+            (('user_id', 'is_closed'), False),
+            (('admin_id', 'is_closed'), False),
+        )
+
     def validate(self) -> None:
-        logger.debug(f"Валидация диалога: user_id={self.user_id}, admin_id={self.admin_id}, is_closed={self.is_closed}")
+        logger.debug("Валидация диалога: id=%s, is_closed=%s", self.id, self.is_closed)
         if not self.user_id:
             logger.error("Ошибка валидации: отсутствует ID пользователя")
             raise ValidationError("ID пользователя обязателен")
@@ -271,6 +319,6 @@ class Dialog(BaseModel):
             raise ValidationError("Ответ не может быть пустым")
 
     def save(self, *args: Any, **kwargs: Any) -> bool:
-        logger.debug(f"Сохранение диалога: user_id={self.user_id}, admin_id={self.admin_id}, is_closed={self.is_closed}")
+        logger.debug("Сохранение диалога: id=%s, is_closed=%s", self.id, self.is_closed)
         self.updated_at = datetime.now()
         return super(Dialog, self).save(*args, **kwargs)
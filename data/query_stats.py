@@ -0,0 +1,81 @@
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional, Tuple
+
+from config import settings
+from config.logger_config import setup_logger, log_warning
+
+logger = setup_logger('query_stats')
+
+class QueryStats:
+    """SQL-запросы в рамках одного обновления: число, суммарное время и повторы одинаковых запросов.
+
+    Счетчики вложенных областей (например, проверка в тесте вокруг обработки обновления)
+    передаются и во внешнюю область через parent.
+    """
+    __slots__ = ('queries', 'time', 'statements', 'parent')
+
+    def __init__(self, parent: Optional['QueryStats'] = None) -> None:
+        self.queries = 0
+        self.time = 0.0
+        # Текст запроса с плейсхолдерами -> число выполнений
+        self.statements: Counter = Counter()
+        self.parent = parent
+
+    def record(self, sql: str, seconds: float) -> None:
+        stats: Optional[QueryStats] = self
+        while stats is not None:
+            stats.queries += 1
+            stats.time += seconds
+            stats.statements[sql] += 1
+            stats = stats.parent
+
+    def repeated(self, limit: int) -> List[Tuple[str, int]]:
+        """Одинаковые запросы, выполненные не меньше limit раз: признак N+1"""
+        return [(sql, count) for sql, count in self.statements.most_common() if count >= limit]
+
+    def describe(self, top: int = 5) -> str:
+        lines = [f"{self.queries} запросов за {self.time * 1000:.1f} мс"]
+        for sql, count in self.statements.most_common(top):
+            lines.append(f"  {count} x {sql[:200]}")
+        return "\n".join(lines)
+
+# Устанавливается на время обработки обновления; вне обновления - None
+query_stats: ContextVar[Optional[QueryStats]] = ContextVar('query_stats', default=None)
+
+def record_query(sql: str, seconds: float) -> None:
+    """Учитывает выполненный запрос в счетчике текущего обновления"""
+    stats = query_stats.get()
+    if stats is not None:
+        stats.record(sql, seconds)
+
+def check_query_budget(stats: QueryStats, update_id: int, event_type: str) -> None:
+    """Предупреждает об обновлениях сверх бюджета запросов и о повторах одного запроса"""
+    repeated = stats.repeated(settings.DB_QUERY_REPEAT_LIMIT) if settings.DB_QUERY_REPEAT_LIMIT else []
+    over_budget = bool(settings.DB_QUERY_BUDGET) and stats.queries > settings.DB_QUERY_BUDGET
+    if not over_budget and not repeated:
+        return
+    log_warning(logger, "Обновление превысило бюджет запросов к базе" if over_budget else "Повторяющиеся запросы к базе (N+1)", {
+        "update_id": update_id,
+        "event_type": event_type,
+        "queries": stats.queries,
+        "time_ms": round(stats.time * 1000, 1),
+        "repeated": [{"sql": sql[:200], "count": count} for sql, count in repeated],
+    })
+
+@contextmanager
+def assert_max_queries(limit: int) -> Iterator[QueryStats]:
+    """Проверка для тестов и бенчмарков: код внутри блока выполняет не больше limit запросов.
+
+        with assert_max_queries(3):
+            await dp.feed_update(bot, update)
+    """
+    stats = QueryStats(parent=query_stats.get())
+    token = query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        query_stats.reset(token)
+    if stats.queries > limit:
+        raise AssertionError(f"Ожидалось не больше {limit} запросов к базе, выполнено {stats.describe()}")
@@ -0,0 +1,45 @@
+import asyncio
+import inspect
+from typing import Any, Callable, Dict, List
+
+from config.logger_config import setup_logger, log_debug, log_error
+from data.db_executor import run_db_read
+from data.models import SharedVersion
+
+logger = setup_logger('shared_state')
+
+# Имя счетчика -> что перечитать в этом процессе, когда данные поменял другой процесс
+_watchers: Dict[str, List[Callable[[], Any]]] = {}
+_versions: Dict[str, int] = {}
+
+def watch(name: str, reload: Callable[[], Any]) -> None:
+    """Подписывает функцию (обычную или async) на изменение счетчика name"""
+    _watchers.setdefault(name, []).append(reload)
+
+def load_versions() -> Dict[str, int]:
+    return {row.name: row.version for row in SharedVersion.select()}
+
+async def sync_versions() -> List[str]:
+    """Сверяет счетчики с базой и вызывает подписчиков изменившихся. Возвращает их имена"""
+    versions = await run_db_read(load_versions)
+    changed = [name for name, version in versions.items() if name in _versions and _versions[name] != version]
+    _versions.update(versions)
+    for name in changed:
+        log_debug(logger, "Общие данные изменились", {"name": name, "version": versions[name]})
+        for reload in _watchers.get(name, []):
+            try:
+                result = reload()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                log_error(logger, e, f"Ошибка при обновлении {name}")
+    return changed
+
+async def watch_versions(interval: float) -> None:
+    """Периодически сверяет счетчики; работает, пока задачу не отменят"""
+    while True:
+        try:
+            await sync_versions()
+        except Exception as e:
+            log_error(logger, e, "Ошибка при чтении счетчиков изменений")
+        await asyncio.sleep(interval)
@@ -1,7 +1,6 @@
 import asyncio
 import os
 import sys
-import traceback
 from typing import Any, Dict, List
 
 # Установка кодировки UTF-8 для консоли Windows
@@ -10,16 +9,32 @@ if sys.platform == "win32":
 
 from aiogram import Bot, Dispatcher, F
 from aiogram.enums import ParseMode
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.fsm.storage.memory import MemoryStorage
 from dotenv import load_dotenv
 from aiogram.types import BotCommand, BotCommandScopeAllPrivateChats
 
 from config.handlers import router
+from config.state_order_handlers import router as order_router
+from config.search_handlers import search_router
+from config.inline_handlers import inline_router
 from admin.state_book_handlers import admin_router
 from admin.edit_texts_handlers import admin_texts_router
 from admin.edit_great import admin_great_router
 from admin.rigister_admin import register_admin_router
 from data.models import db, Books, Order, Greeting, Admin, GalleryText, OrderPretext, OrderStatus, Dialog
+from data.migrations import apply_migrations
+from data.db_executor import start_db_executor, shutdown_db_executor, install_loop_guard, run_db, run_db_read
+from admin.admin_registry import load_admins
+from config import settings
+from config.send_limiter import install_outbound_limiter
+from config.webhook import run_webhook
+from config.fsm_storage import SQLiteStorage
+from config.sharding import run_supervisor, run_worker
+from config.throttling import install_throttling
+from config.inventory import install_reservation_sweeper
+from config.metrics import install_metrics, start_metrics_server
 from aiogram.filters import Command
 from config.keyboards import commands
 from config.logger_config import setup_logger, log_error, log_info, log_debug, log_warning
@@ -36,8 +51,20 @@ if TOKEN is None:
     raise ValueError("TOKEN environment variable not set. Please create a .env file with TOKEN=YOUR_BOT_TOKEN")
 
 # Инициализация бота и диспетчера
-bot = Bot(token=TOKEN)
-dp = Dispatcher()
+bot = Bot(
+    token=TOKEN,
+    session=AiohttpSession(api=TelegramAPIServer.from_base(settings.TELEGRAM_API_URL)) if settings.TELEGRAM_API_URL else None
+)
+# Все исходящие запросы проходят через очередь с лимитами Bot API
+outbound_limiter = install_outbound_limiter(bot)
+# Незавершенные заказы и диалоги переживают перезапуск, если FSM хранится в базе
+dp = Dispatcher(storage=SQLiteStorage() if settings.FSM_STORAGE == "sqlite" else MemoryStorage())
+# Метрики обработчиков; подключаются раньше антифлуда, чтобы учитывать и отклоненные обновления
+install_metrics(dp, bot)
+# Антифлуд по пользователю и классу обработчика
+throttling = install_throttling(dp)
+# Просроченные резервы книг возвращаются на склад в фоне
+install_reservation_sweeper(dp)
 
 # Подключение роутеров
 log_debug(logger, "Подключение роутеров")
@@ -45,66 +72,31 @@ dp.include_router(admin_texts_router)
 dp.include_router(admin_great_router)
 dp.include_router(register_admin_router)
 dp.include_router(admin_router)
+dp.include_router(search_router)
+dp.include_router(inline_router)
+# Оформление заказа раньше общего роутера: шаги FSM не должны уйти в общие обработчики
+dp.include_router(order_router)
 dp.include_router(router)
 
-log_debug(logger, f"Содержимое клавиатуры команд при запуске", {"keyboard": commands.keyboard})
+log_debug(logger, "Содержимое клавиатуры команд при запуске", {"keyboard": commands.keyboard})
 
 def initialize_database_and_data():
     """Инициализация базы данных и заполнение начальными данными"""
     try:
         log_info(logger, "Начало инициализации базы данных")
         
-        # Создаем таблицы
-        log_debug(logger, "Создание таблиц")
-        db.create_tables([
-            Books, 
-            Order, 
-            Greeting, 
-            Admin, 
-            GalleryText, 
-            OrderPretext, 
-            OrderStatus, 
-            Dialog
-        ], safe=True)
-
-        # Создаем таблицу статусов заказа с правильным именем (если необходимо)
-        try:
-            log_debug(logger, "Создание таблицы order_statuses")
-            db.execute_sql('CREATE TABLE IF NOT EXISTS order_statuses (id INTEGER PRIMARY KEY, name VARCHAR(255) UNIQUE, description TEXT, client_message TEXT, emoji VARCHAR(255));')
-        except Exception as e:
-            log_warning(logger, f"Таблица order_statuses уже существует: {str(e)}")
-            log_debug(logger, f"Traceback: {traceback.format_exc()}")
-
-        # Проверяем и добавляем колонки в таблицу admin
-        try:
-            log_debug(logger, "Проверка и добавление колонок в таблицу admin")
-            # Проверяем существование колонок
-            cursor = db.execute_sql("PRAGMA table_info(admin);")
-            columns = [column[1] for column in cursor.fetchall()]
-            log_debug(logger, f"Существующие колонки в таблице admin: {columns}")
-            
-            # Добавляем колонку role если её нет
-            if 'role' not in columns:
-                log_info(logger, "Добавляем колонку role в таблицу admin")
-                db.execute_sql('ALTER TABLE admin ADD COLUMN role VARCHAR(255) DEFAULT "admin";')
-            
-            # Добавляем колонку display_name если её нет
-            if 'display_name' not in columns:
-                log_info(logger, "Добавляем колонку display_name в таблицу admin")
-                db.execute_sql('ALTER TABLE admin ADD COLUMN display_name VARCHAR(255);')
-        except Exception as e:
-            log_error(logger, e, "Ошибка при проверке/добавлении колонок")
-            log_debug(logger, f"Traceback: {traceback.format_exc()}")
+        # Создаем и обновляем схему
+        log_debug(logger, "Применение миграций схемы")
+        apply_migrations()
 
         # Инициализируем статусы заказа
         log_debug(logger, "Инициализация статусов заказа")
         for status_data in OrderStatus.get_default_statuses():
             try:
                 OrderStatus.get_or_create(name=status_data['name'], defaults=status_data)
-                log_debug(logger, f"Статус заказа создан/обновлен: {status_data['name']}")
+                log_debug(logger, "Статус заказа создан/обновлен", {"status": status_data['name']})
             except Exception as e:
                 log_error(logger, e, f"Ошибка при создании статуса {status_data['name']}")
-                log_debug(logger, f"Traceback: {traceback.format_exc()}")
 
         # Создаем администратора по умолчанию
         try:
@@ -120,7 +112,6 @@ def initialize_database_and_data():
             )
         except Exception as e:
             log_error(logger, e, "Ошибка при создании администратора по умолчанию")
-            log_debug(logger, f"Traceback: {traceback.format_exc()}")
             # Пробуем создать администратора напрямую
             try:
                 log_debug(logger, "Попытка прямого создания администратора")
@@ -130,7 +121,6 @@ def initialize_database_and_data():
                 ''')
             except Exception as e2:
                 log_error(logger, e2, "Ошибка при прямом создании администратора")
-                log_debug(logger, f"Traceback: {traceback.format_exc()}")
 
         # Инициализируем текстовые поля
         try:
@@ -159,14 +149,13 @@ def initialize_database_and_data():
             log_info(logger, "Текстовые поля успешно инициализированы")
         except Exception as e:
             log_error(logger, e, "Ошибка при инициализации текстовых полей")
-            log_debug(logger, f"Traceback: {traceback.format_exc()}")
 
         # Инициализируем тестовые книги
         try:
             log_debug(logger, "Инициализация тестовых книг")
             # Проверяем, есть ли уже книги в базе
             book_count = Books.select().count()
-            log_debug(logger, f"Текущее количество книг в базе: {book_count}")
+            log_debug(logger, "Текущее количество книг в базе", {"count": book_count})
             
             if book_count == 0:
                 test_books = [
@@ -215,47 +204,68 @@ def initialize_database_and_data():
                 for book_data in test_books:
                     try:
                         Books.create(**book_data)
-                        log_debug(logger, f"Создана тестовая книга: {book_data['name']}")
+                        log_debug(logger, "Создана тестовая книга", {"name": book_data['name']})
                     except Exception as e:
                         log_error(logger, e, f"Ошибка при создании книги {book_data['name']}")
-                        log_debug(logger, f"Traceback: {traceback.format_exc()}")
                 
                 log_info(logger, "Тестовые книги успешно добавлены")
         except Exception as e:
             log_error(logger, e, "Ошибка при инициализации тестовых книг")
-            log_debug(logger, f"Traceback: {traceback.format_exc()}")
         
         log_info(logger, "База данных успешно инициализирована")
     except Exception as e:
         log_error(logger, e, "Ошибка при инициализации базы данных")
-        log_debug(logger, f"Traceback: {traceback.format_exc()}")
         raise
 
+def run_worker_process(index: int, workers: int, updates: Any, ready: Any) -> None:
+    """Точка входа процесса-обработчика при WORKERS > 1: модуль импортируется заново, со своими bot и dp"""
+    asyncio.run(run_worker(dp, bot, index, workers, updates, ready))
+
 async def main():
+    metrics_runner = None
     try:
         log_info(logger, "Инициализация базы данных")
-        db.init('books.db')
-        db.connect()
-        initialize_database_and_data() # Вызываем новую функцию инициализации
+        db.configure(settings.DB_PATH)
+        start_db_executor()
+        await run_db(initialize_database_and_data) # Вызываем новую функцию инициализации
+        await run_db_read(load_admins)
+        install_loop_guard()
+        if settings.WORKERS <= 1:
+            # При нескольких процессах метрики отдает каждый процесс-обработчик на своем порту
+            metrics_runner = await start_metrics_server()
         
         # Установка списка команд для бота
         commands_for_bot = [
             BotCommand(command="start", description="Запустить бота"),
-            BotCommand(command="help", description="Получить помощь")
+            BotCommand(command="help", description="Получить помощь"),
+            BotCommand(command="search", description="Поиск книг")
         ]
         
         log_debug(logger, "Установка команд бота", {"commands": commands_for_bot})
         await bot.set_my_commands(commands=commands_for_bot, scope=BotCommandScopeAllPrivateChats())
         
-        log_info(logger, "Запуск бота")
-        await dp.start_polling(bot)
+        if settings.BOT_MODE != "webhook":
+            # Если бот раньше работал через webhook, getUpdates вернет конфликт, пока webhook не снят
+            await bot.delete_webhook()
+        if settings.WORKERS > 1:
+            log_info(logger, "Запуск бота с процессами-обработчиками", {"workers": settings.WORKERS, "mode": settings.BOT_MODE})
+            await run_supervisor(dp, bot, run_worker_process, settings.WORKERS)
+        elif settings.BOT_MODE == "webhook":
+            log_info(logger, "Запуск бота в режиме webhook")
+            await run_webhook(dp, bot)
+        else:
+            log_info(logger, "Запуск бота")
+            await dp.start_polling(bot)
     except Exception as e:
         log_error(logger, e, "Ошибка при запуске бота")
         raise
     finally:
-        if not db.is_closed():
-            log_debug(logger, "Закрытие соединения с базой данных")
-            db.close()
+        log_info(logger, "Очередь исходящих сообщений", outbound_limiter.stats())
+        log_info(logger, "Антифлуд", throttling.stats())
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
+        log_debug(logger, "Закрытие соединений с базой данных")
+        shutdown_db_executor()
 
 if __name__ == "__main__":
     try:
@@ -0,0 +1,79 @@
+import itertools
+import os
+import tempfile
+from datetime import datetime
+from typing import Iterator
+
+import pytest
+
+# main.py требует токен при импорте; лог тестов не попадает в logs/ и в вывод pytest
+os.environ.setdefault('TOKEN', '123456:test')
+os.environ.setdefault('LOG_FILE', os.path.join(tempfile.gettempdir(), 'bot_tests.log'))
+os.environ.setdefault('LOG_CONSOLE', 'false')
+
+from aiogram.types import CallbackQuery, Chat, Message, PhotoSize, Update, User
+
+from config import settings
+from data.db_executor import shutdown_db_executor, start_db_executor
+from data.migrations import apply_migrations
+from data.models import db, OrderStatus
+
+_update_ids = itertools.count(1)
+
+@pytest.fixture
+def temp_db(tmp_path) -> Iterator[str]:
+    """Пустая база со схемой и статусами заказов и пулы потоков базы"""
+    path = str(tmp_path / 'test.db')
+    db.configure(path)
+    apply_migrations()
+    for status in OrderStatus.get_default_statuses():
+        OrderStatus.get_or_create(name=status['name'], defaults=status)
+    start_db_executor()
+    try:
+        yield path
+    finally:
+        shutdown_db_executor()
+        db.set_loop_guard('off')
+        db.close()
+
+@pytest.fixture
+def bot_app(temp_db, tmp_path, monkeypatch):
+    """main.py на временной базе: сессия бота без сети, книги с фото, администраторы и заказы"""
+    import main as bot_main
+    from admin.admin_registry import load_admins
+    from benchmarks.dispatcher_e2e import RecordingSession, seed
+
+    monkeypatch.setattr(settings, 'MEDIA_DIR', str(tmp_path))
+    monkeypatch.setattr(bot_main.bot, 'session', RecordingSession())
+    bot_main.initialize_database_and_data()
+    seed(str(tmp_path), orders=50, question_admins=1)
+    load_admins()
+    return bot_main
+
+def message_update(user_id: int, text: str) -> Update:
+    update_id = next(_update_ids)
+    return Update(update_id=update_id, message=Message(
+        message_id=update_id,
+        date=datetime.now(),
+        chat=Chat(id=user_id, type='private'),
+        from_user=User(id=user_id, is_bot=False, first_name='Тест'),
+        text=text,
+    ))
+
+def callback_update(user_id: int, data: str, photo: bool = False) -> Update:
+    update_id = next(_update_ids)
+    # Сообщение бота с кнопкой: карточки каталога отправлены с фото
+    message = Message(
+        message_id=update_id,
+        date=datetime.now(),
+        chat=Chat(id=user_id, type='private'),
+        text=None if photo else 'Сообщение бота',
+        photo=[PhotoSize(file_id='photo', file_unique_id='u', width=1, height=1)] if photo else None,
+    )
+    return Update(update_id=update_id, callback_query=CallbackQuery(
+        id=str(update_id),
+        from_user=User(id=user_id, is_bot=False, first_name='Тест'),
+        chat_instance='test',
+        data=data,
+        message=message,
+    ))
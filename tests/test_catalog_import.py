@@ -0,0 +1,69 @@
+import os
+
+import pytest
+
+from admin import catalog_import
+from admin.catalog_import import CatalogImportError, ImportStats, next_batch, parse_row, read_csv, read_json
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+def fixture(name: str) -> str:
+    return os.path.join(FIXTURES, name)
+
+def test_csv_from_russian_excel_is_sniffed():
+    # cp1251, точка с запятой и десятичная запятая - так сохраняет Excel с русской локалью
+    rows = list(read_csv(fixture('catalog_cp1251.csv')))
+    assert [number for number, _ in rows] == [2, 3, 4]
+    first = parse_row(rows[0][1])
+    assert first['name'] == 'Война и мир'
+    assert first['author'] == 'Толстой'
+    assert first['price'] == 1200.5
+    assert first['quantity'] == 3
+    assert first['id'] is None
+
+def test_bad_row_is_reported_with_its_line_number():
+    stats = ImportStats()
+    batch = next_batch(read_csv(fixture('catalog_cp1251.csv')), stats)
+    assert [row['name'] for row in batch] == ['Война и мир', 'Мертвые души']
+    assert stats.rows == 3
+    assert stats.failed == 1
+    assert stats.errors == ["№3: Цена должна быть положительным числом"]
+
+@pytest.mark.parametrize('name', ['catalog.json', 'catalog.jsonl'])
+def test_json_object_split_across_chunks(name, monkeypatch):
+    # Кусок меньше одной записи: каждый объект разрезан границей куска
+    monkeypatch.setattr(catalog_import, 'READ_CHUNK', 32)
+    rows = list(read_json(fixture(name)))
+    assert [number for number, _ in rows] == [1, 2]
+    first, second = (parse_row(raw) for _, raw in rows)
+    assert first['id'] == 7
+    assert first['description'].startswith('Роман в стихах')
+    assert second['price'] == 250.0
+
+def test_truncated_json_stops_import(tmp_path):
+    path = tmp_path / 'broken.json'
+    path.write_text('[{"name": "Книга", "price": 1}, {"name": "Обрыв', encoding='utf-8')
+    rows = read_json(str(path))
+    assert next(rows)[0] == 1
+    with pytest.raises(CatalogImportError):
+        next(rows)
+
+def test_missing_columns_stop_import(tmp_path):
+    path = tmp_path / 'prices.csv'
+    path.write_text('Название,Цена\nКнига,100\n', encoding='utf-8')
+    with pytest.raises(CatalogImportError, match='author'):
+        next_batch(read_csv(str(path)), ImportStats())
+
+@pytest.mark.parametrize('field, value, message', [
+    ('price', '-5', 'Цена'),
+    ('quantity', '1,5', 'Количество'),
+    ('id', 'abc', 'id'),
+    ('name', '', None),
+])
+def test_parse_row_rejects_invalid_values(field, value, message):
+    raw = {'name': 'Книга', 'author': 'Автор', 'price': '100', 'description': 'Описание',
+           'photo': 'book.jpg', 'quantity': '2', field: value}
+    with pytest.raises(ValueError) as error:
+        parse_row(raw)
+    if message:
+        assert message in str(error.value)
@@ -0,0 +1,110 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from aiogram.fsm.storage.base import StorageKey
+
+from config.fsm_storage import SQLiteStorage
+from data.models import FsmState
+
+BOT_ID = 1
+
+def key(user_id: int) -> StorageKey:
+    return StorageKey(bot_id=BOT_ID, chat_id=user_id, user_id=user_id)
+
+def stored_keys() -> int:
+    return FsmState.select().count()
+
+def test_write_behind_flush_and_restart(temp_db):
+    async def first_run() -> None:
+        storage = SQLiteStorage(cache_size=10, flush_interval=3600)
+        await storage.set_state(key(1), 'OrderState:fio')
+        await storage.set_data(key(1), {'book_id': 5, 'fio': 'Иванов'})
+        # Изменения копятся в памяти до записи пачкой
+        assert await asyncio.to_thread(stored_keys) == 0
+        await storage.flush()
+        assert await asyncio.to_thread(stored_keys) == 1
+        assert storage.stats()['flushes'] == 1
+        await storage.close()
+
+    async def after_restart() -> None:
+        storage = SQLiteStorage(cache_size=10, flush_interval=3600)
+        assert await storage.get_state(key(1)) == 'OrderState:fio'
+        assert await storage.get_data(key(1)) == {'book_id': 5, 'fio': 'Иванов'}
+        assert storage.stats()['loads'] == 1
+        await storage.close()
+
+    asyncio.run(first_run())
+    asyncio.run(after_restart())
+
+def test_flush_loop_writes_in_background(temp_db):
+    async def run() -> None:
+        storage = SQLiteStorage(cache_size=10, flush_interval=0.05)
+        await storage.set_state(key(1), 'QuestionState:text')
+        await asyncio.sleep(0.3)
+        assert storage.stats()['dirty'] == 0
+        assert await asyncio.to_thread(stored_keys) == 1
+        await storage.close()
+
+    asyncio.run(run())
+
+def test_close_flushes_pending_changes(temp_db):
+    async def run() -> None:
+        storage = SQLiteStorage(cache_size=10, flush_interval=3600)
+        await storage.set_state(key(1), 'OrderState:phone')
+        await storage.close()
+        assert storage.stats()['dirty'] == 0
+        assert await asyncio.to_thread(stored_keys) == 1
+
+    asyncio.run(run())
+
+def test_lru_eviction_keeps_unsaved_changes(temp_db):
+    async def run() -> None:
+        storage = SQLiteStorage(cache_size=2, flush_interval=3600)
+        for user_id in (1, 2, 3):
+            await storage.set_state(key(user_id), f'State:{user_id}')
+        assert storage.stats()['cached'] == 2
+        # Вытесненное из кэша, но не записанное состояние читается из очереди записи, а не из базы
+        assert await storage.get_state(key(1)) == 'State:1'
+        assert storage.stats()['loads'] == 3
+
+        await storage.flush()
+        for user_id in (2, 3):
+            await storage.get_state(key(user_id))
+        loads = storage.stats()['loads']
+        # После записи вытесненное состояние читается из базы
+        assert await storage.get_state(key(1)) == 'State:1'
+        assert storage.stats()['loads'] == loads + 1
+        await storage.close()
+
+    asyncio.run(run())
+
+def test_cleared_state_is_deleted(temp_db):
+    async def run() -> None:
+        storage = SQLiteStorage(cache_size=10, flush_interval=3600)
+        await storage.set_state(key(1), 'OrderState:fio')
+        await storage.flush()
+        await storage.set_state(key(1), None)
+        await storage.set_data(key(1), {})
+        await storage.close()
+        assert await asyncio.to_thread(stored_keys) == 0
+
+    asyncio.run(run())
+
+def test_abandoned_state_expires(temp_db):
+    async def run() -> None:
+        storage = SQLiteStorage(cache_size=10, flush_interval=3600, ttl=60)
+        await storage.set_state(key(1), 'OrderState:fio')
+        await storage.set_state(key(2), 'OrderState:fio')
+        await storage.close()
+        name = storage.key_builder.build(key(1))
+        await asyncio.to_thread(lambda: FsmState.update(updated_at=datetime.now() - timedelta(seconds=120))
+                                .where(FsmState.key == name).execute())
+
+        restarted = SQLiteStorage(cache_size=10, flush_interval=3600, ttl=60)
+        assert await restarted.get_state(key(1)) is None
+        assert await restarted.get_state(key(2)) == 'OrderState:fio'
+        assert await restarted.sweep() == 1
+        assert await asyncio.to_thread(stored_keys) == 1
+        await restarted.close()
+
+    asyncio.run(run())
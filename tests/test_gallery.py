@@ -0,0 +1,46 @@
+import asyncio
+import os
+from typing import List
+
+from aiogram.methods import DeleteMessage, EditMessageCaption, EditMessageMedia, EditMessageText, SendMessage, SendPhoto
+
+from benchmarks.dispatcher_e2e import _recorded
+from data.models import Books
+from tests.conftest import callback_update
+
+USER_ID = 9200000
+
+def press_next(bot_app, photo: bool) -> List[type]:
+    """Листает карточку с первой книги на вторую и возвращает типы вызовов Bot API"""
+    calls: list = []
+
+    async def run() -> None:
+        token = _recorded.set(calls)
+        try:
+            await bot_app.dp.feed_update(bot_app.bot, callback_update(USER_ID, 'gallery_next_1', photo=photo))
+        finally:
+            _recorded.reset(token)
+            await bot_app.dp.storage.close()
+
+    asyncio.run(run())
+    return [type(call) for call in calls if not type(call).__name__.startswith('AnswerCallback')]
+
+def remove_photo(bot_app, tmp_path, book_id: int) -> None:
+    os.remove(os.path.join(str(tmp_path), Books.get_by_id(book_id).photo))
+
+def test_photo_card_edits_media(bot_app):
+    assert press_next(bot_app, photo=True) == [EditMessageMedia]
+
+def test_photo_card_without_next_photo_is_replaced(bot_app, tmp_path):
+    # Фото прежней книги не должно остаться под подписью новой
+    remove_photo(bot_app, tmp_path, 2)
+    calls = press_next(bot_app, photo=True)
+    assert calls == [SendMessage, DeleteMessage]
+    assert EditMessageCaption not in calls
+
+def test_text_card_switches_to_photo(bot_app):
+    assert press_next(bot_app, photo=False) == [SendPhoto, DeleteMessage]
+
+def test_text_card_stays_text(bot_app, tmp_path):
+    remove_photo(bot_app, tmp_path, 2)
+    assert press_next(bot_app, photo=False) == [EditMessageText]
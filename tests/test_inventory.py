@@ -0,0 +1,101 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import config.state_order_handlers as order_handlers
+from config.inventory import place_order, release_expired, release_reservation, reserve_book
+from data.models import Books, Order, OrderStatus, StockReservation
+from tests.conftest import callback_update, message_update
+
+ORDER_FIELDS = {'fio': 'Иванов Иван Иванович', 'addres': 'Москва', 'phone': '+79000000000', 'book_info': 'Книга'}
+
+def add_book(quantity: int) -> int:
+    return Books.create(name='Книга', author='Автор', price=500.0, description='Описание',
+                        photo='book.jpg', quantity=quantity).id
+
+def order_fields(user_id: int) -> dict:
+    return dict(ORDER_FIELDS, telegram_id=user_id, status=OrderStatus.get(OrderStatus.name == 'new').id)
+
+def quantity(book_id: int) -> int:
+    return Books.get_by_id(book_id).quantity
+
+def test_reserve_refuses_when_sold_out(temp_db):
+    book_id = add_book(2)
+    first = reserve_book(book_id, 1)
+    second = reserve_book(book_id, 2)
+    assert first is not None and second is not None
+    assert reserve_book(book_id, 3) is None
+    assert quantity(book_id) == 0
+
+    assert place_order(first, book_id, **order_fields(1)) is not None
+    assert place_order(second, book_id, **order_fields(2)) is not None
+    # Без резерва книга списывается заново, а ее уже нет
+    assert place_order(None, book_id, **order_fields(3)) is None
+    assert Order.select().where(Order.book_id == book_id).count() == 2
+    assert quantity(book_id) == 0
+    assert StockReservation.select().count() == 0
+
+def test_release_returns_stock_once(temp_db):
+    book_id = add_book(1)
+    reservation_id = reserve_book(book_id, 1)
+    assert release_reservation(reservation_id, book_id)
+    assert not release_reservation(reservation_id, book_id)
+    assert quantity(book_id) == 1
+
+def test_new_reservation_releases_previous_hold(temp_db):
+    first_book, second_book = add_book(1), add_book(1)
+    reserve_book(first_book, 1)
+    assert reserve_book(second_book, 1) is not None
+    assert quantity(first_book) == 1
+    assert quantity(second_book) == 0
+    assert StockReservation.select().count() == 1
+
+def test_expired_hold_returns_stock(temp_db):
+    book_id = add_book(1)
+    reservation_id = reserve_book(book_id, 1, ttl=60)
+    assert release_expired(datetime.now()) == 0
+    assert release_expired(datetime.now() + timedelta(seconds=61)) == 1
+    assert quantity(book_id) == 1
+    # Сборщик уже вернул книгу: отмена не вернет ее второй раз
+    assert not release_reservation(reservation_id, book_id)
+    assert quantity(book_id) == 1
+
+def test_confirm_after_expiry_takes_stock_again(temp_db):
+    book_id = add_book(1)
+    reservation_id = reserve_book(book_id, 1, ttl=60)
+    release_expired(datetime.now() + timedelta(seconds=61))
+    assert place_order(reservation_id, book_id, **order_fields(1)) is not None
+    assert quantity(book_id) == 0
+
+def test_confirm_after_expiry_fails_when_sold_out(temp_db):
+    book_id = add_book(1)
+    late = reserve_book(book_id, 1, ttl=60)
+    release_expired(datetime.now() + timedelta(seconds=61))
+    # Пока покупатель думал, последнюю книгу отложил и купил другой
+    other = reserve_book(book_id, 2)
+    assert place_order(other, book_id, **order_fields(2)) is not None
+    assert place_order(late, book_id, **order_fields(1)) is None
+    assert quantity(book_id) == 0
+    assert Order.select().where(Order.book_id == book_id).count() == 1
+
+def test_failed_checkout_releases_hold(bot_app, monkeypatch):
+    def broken_place_order(*args, **kwargs):
+        raise RuntimeError("база недоступна")
+
+    monkeypatch.setattr(order_handlers, 'place_order', broken_place_order)
+    user_id = 9500000
+    stock = quantity(1)
+
+    async def run() -> None:
+        try:
+            for update in (callback_update(user_id, 'order_book_1'), message_update(user_id, 'Иванов Иван Иванович'),
+                           message_update(user_id, 'Москва'), message_update(user_id, '+79000000000'),
+                           message_update(user_id, 'да')):
+                await bot_app.dp.feed_update(bot_app.bot, update)
+        finally:
+            await bot_app.dp.storage.close()
+
+    asyncio.run(run())
+    # Книга возвращается на склад сразу, а не после истечения резерва
+    assert quantity(1) == stock
+    assert StockReservation.select().count() == 0
+    assert Order.select().where(Order.telegram_id == user_id).count() == 0
@@ -0,0 +1,28 @@
+import asyncio
+import logging
+
+from tests.conftest import callback_update, message_update
+
+USER_ID = 9300000
+FIO = 'Петров Петр Петрович'
+ADDRESS = 'Тверь, ул. Советская 5'
+PHONE = '+79111234567'
+
+def test_order_flow_logs_no_personal_data(bot_app, caplog):
+    caplog.set_level(logging.DEBUG, logger='state_order_handlers')
+
+    async def run() -> None:
+        try:
+            for update in (callback_update(USER_ID, 'order_book_1'), message_update(USER_ID, FIO),
+                           message_update(USER_ID, ADDRESS), message_update(USER_ID, PHONE),
+                           message_update(USER_ID, 'да')):
+                await bot_app.dp.feed_update(bot_app.bot, update)
+        finally:
+            await bot_app.dp.storage.close()
+
+    asyncio.run(run())
+    records = [record for record in caplog.records if record.name == 'state_order_handlers']
+    assert any(record.levelno == logging.DEBUG for record in records)
+    logged = ' '.join(f"{record.getMessage()} {getattr(record, 'data', '')}" for record in records)
+    for value in (FIO, ADDRESS, PHONE):
+        assert value not in logged
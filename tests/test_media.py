@@ -0,0 +1,32 @@
+import os
+
+import pytest
+
+from config import settings
+from config.media import local_photo_path
+
+@pytest.fixture
+def media_dir(tmp_path, monkeypatch) -> str:
+    media = tmp_path / 'media'
+    (media / 'covers').mkdir(parents=True)
+    (media / 'bible.jpg').write_bytes(b'jpg')
+    (media / 'covers' / 'psalter.jpg').write_bytes(b'jpg')
+    (tmp_path / '.env').write_text('TOKEN=secret')
+    monkeypatch.setattr(settings, 'MEDIA_DIR', str(media))
+    return str(media)
+
+def test_photo_inside_media_dir(media_dir):
+    assert local_photo_path('bible.jpg') == os.path.join(os.path.realpath(media_dir), 'bible.jpg')
+    assert local_photo_path('covers/psalter.jpg') == os.path.join(os.path.realpath(media_dir), 'covers', 'psalter.jpg')
+    assert local_photo_path('missing.jpg') is None
+
+@pytest.mark.parametrize('photo', ['../.env', 'covers/../../.env', '/etc/passwd'])
+def test_path_outside_media_dir_is_rejected(media_dir, photo):
+    assert local_photo_path(photo) is None
+
+def test_absolute_path_of_existing_file_is_rejected(media_dir, tmp_path):
+    assert local_photo_path(str(tmp_path / '.env')) is None
+
+def test_symlink_out_of_media_dir_is_rejected(media_dir, tmp_path):
+    os.symlink(str(tmp_path / '.env'), os.path.join(media_dir, 'cover.jpg'))
+    assert local_photo_path('cover.jpg') is None
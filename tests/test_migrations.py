@@ -0,0 +1,42 @@
+from config.inventory import place_order, reserve_book
+from data.migrations import apply_migrations, latest_version
+from data.models import db, Books, Order, OrderStatus, SharedVersion
+
+def versions() -> dict:
+    return {row.name: row.version for row in SharedVersion.select()}
+
+def add_book() -> int:
+    return Books.create(name='Книга', author='Автор', price=500.0, description='Описание',
+                        photo='book.jpg', quantity=5).id
+
+def test_stock_changes_do_not_bump_catalog_version(temp_db):
+    book_id = add_book()
+    before = versions()
+    reservation_id = reserve_book(book_id, 1)
+    order = place_order(reservation_id, book_id, telegram_id=1, fio='Иванов', addres='Москва', phone='+79000000000',
+                        book_info='Книга', status=OrderStatus.get(OrderStatus.name == 'new').id)
+    after = versions()
+    assert after['catalog'] == before['catalog']
+    # Новый заказ меняет счетчики по статусам
+    assert after['orders'] == before['orders'] + 1
+
+    Order.update(updated_at=order.created_at).where(Order.id == order.id).execute()
+    assert versions()['orders'] == after['orders']
+    Order.update(status=OrderStatus.get(OrderStatus.name == 'delivered').id).where(Order.id == order.id).execute()
+    assert versions()['orders'] == after['orders'] + 1
+
+    Books.update(price=600.0).where(Books.id == book_id).execute()
+    assert versions()['catalog'] == after['catalog'] + 1
+
+def test_upgrade_replaces_update_triggers(temp_db):
+    # База, созданная до миграции 11: триггер срабатывал на любой UPDATE books
+    db.execute_sql('DROP TRIGGER books_version_au;')
+    db.execute_sql('CREATE TRIGGER books_version_au AFTER UPDATE ON "books" BEGIN '
+                   "UPDATE sharedversion SET version = version + 1 WHERE name = 'catalog'; END;")
+    db.execute_sql('UPDATE schema_version SET version = 10;')
+    assert apply_migrations() == latest_version()
+
+    book_id = add_book()
+    before = versions()['catalog']
+    Books.update(quantity=Books.quantity - 1).where(Books.id == book_id).execute()
+    assert versions()['catalog'] == before
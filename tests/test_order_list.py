@@ -0,0 +1,56 @@
+import asyncio
+import csv
+
+from aiogram.methods import SendMessage
+
+from admin.order_export import MISSING_STATUS as EXPORT_MISSING_STATUS, ExportFilter, export_orders
+from admin.order_list import MISSING_STATUS, fetch_orders_page, render_order
+from benchmarks.dispatcher_e2e import _recorded
+from data.models import db, Books, Order, OrderStatus
+from tests.conftest import callback_update
+from tests.test_query_budget import ADMIN_ID
+
+ORDER_FIELDS = {'telegram_id': 1, 'fio': 'Иванов Иван', 'addres': 'Москва', 'phone': '+79000000000', 'book_info': 'Книга'}
+
+def add_orders() -> int:
+    book = Books.create(name='Книга', author='Автор', price=500.0, description='Описание', photo='book.jpg', quantity=5)
+    Order.create(status=OrderStatus.get(OrderStatus.name == 'new').id, book_id=book.id, **ORDER_FIELDS)
+    # Заказ из старой базы: его статус удален из orderstatus
+    orphan = Order.create(status=OrderStatus.get(OrderStatus.name == 'new').id, book_id=book.id, **ORDER_FIELDS)
+    db.execute_sql('UPDATE "order" SET status_id = 999 WHERE id = ?;', (orphan.id,))
+    return orphan.id
+
+def test_order_with_missing_status_is_listed(temp_db):
+    orphan_id = add_orders()
+    page = fetch_orders_page()
+    assert [order.id for order in page.orders] == [orphan_id, orphan_id - 1]
+    assert MISSING_STATUS in render_order(page.orders[0])
+    assert MISSING_STATUS not in render_order(page.orders[1])
+
+def test_order_with_missing_status_is_exported(temp_db, tmp_path):
+    add_orders()
+    path = str(tmp_path / 'orders.csv')
+    assert export_orders(path, 'csv', ExportFilter()) == 2
+    with open(path, encoding='utf-8-sig', newline='') as file:
+        rows = list(csv.reader(file, delimiter=';'))
+    assert [row[3] for row in rows[1:]] == ['Новый заказ', EXPORT_MISSING_STATUS]
+
+def test_status_of_order_with_missing_status_can_be_changed(bot_app):
+    orphan_id = add_orders()
+    delivered = OrderStatus.get(OrderStatus.name == 'delivered').id
+    calls: list = []
+
+    async def run() -> None:
+        token = _recorded.set(calls)
+        try:
+            await bot_app.dp.feed_update(bot_app.bot, callback_update(ADMIN_ID, f'change_status_{orphan_id}'))
+            await bot_app.dp.feed_update(bot_app.bot, callback_update(ADMIN_ID, f'set_status_{delivered}_{orphan_id}'))
+        finally:
+            _recorded.reset(token)
+            await bot_app.dp.storage.close()
+
+    asyncio.run(run())
+    texts = [call.text for call in calls if isinstance(call, SendMessage)]
+    assert MISSING_STATUS in texts[0]
+    assert MISSING_STATUS in texts[1]
+    assert Order.get_by_id(orphan_id).status_id == delivered
@@ -0,0 +1,74 @@
+import asyncio
+from typing import Callable, Dict, List, Tuple
+
+from aiogram.types import Update
+
+from data.db_executor import install_loop_guard
+from data.models import db, Order
+from data.query_stats import assert_max_queries
+from tests.conftest import callback_update, message_update
+
+# Администратор по умолчанию из initialize_database_and_data
+ADMIN_ID = 5069224643
+USER_BASE = 9100000
+
+# Бюджеты SQL-запросов на обновление после прогрева кэшей каталога, статусов и file_id фото.
+# N+1 на странице из 5 заказов или в альбоме из нескольких книг выходит за бюджет сразу
+ORDERS_BUDGET = {'list': 3, 'next': 4, 'filter': 3}
+GALLERY_BUDGET = {'open': 3, 'next': 2, 'prev': 2, 'album': 2}
+ORDER_FLOW_BUDGET = {'card': 4, 'order': 4, 'field': 1, 'confirm': 5}
+
+Step = Tuple[str, Callable[[int], Update]]
+
+def run_flow(bot_app, steps: List[Step], budget: Dict[str, int], warm_up_user: int, user: int) -> None:
+    """Прогоняет шаги один раз для прогрева, второй раз - с проверкой бюджета на каждое обновление"""
+
+    async def feed(update: Update) -> None:
+        await bot_app.dp.feed_update(bot_app.bot, update)
+
+    async def run() -> None:
+        install_loop_guard('raise')
+        try:
+            for _, make_update in steps:
+                await feed(make_update(warm_up_user))
+            for name, make_update in steps:
+                calls = bot_app.bot.session.calls
+                with assert_max_queries(budget[name]):
+                    await feed(make_update(user))
+                # Обновление, отброшенное фильтром, уложилось бы в бюджет, ничего не сделав
+                assert bot_app.bot.session.calls > calls, f"{name}: бот не ответил"
+        finally:
+            await bot_app.dp.storage.close()
+            # Проверки теста читают базу синхронно в этом же потоке
+            db.set_loop_guard('off')
+
+    asyncio.run(run())
+
+def test_orders_list_query_budget(bot_app):
+    steps: List[Step] = [
+        ('list', lambda user: message_update(user, '📋 Все заказы')),
+        ('next', lambda user: callback_update(user, 'ord_next_0_0_45')),
+        ('filter', lambda user: callback_update(user, 'ord_f_2_7')),
+    ]
+    run_flow(bot_app, steps, ORDERS_BUDGET, ADMIN_ID, ADMIN_ID)
+
+def test_gallery_paging_query_budget(bot_app):
+    steps: List[Step] = [
+        ('open', lambda user: callback_update(user, 'books_gallery')),
+        ('next', lambda user: callback_update(user, 'gallery_next_1', photo=True)),
+        ('prev', lambda user: callback_update(user, 'gallery_prev_2', photo=True)),
+        ('album', lambda user: callback_update(user, 'gallery_album')),
+    ]
+    run_flow(bot_app, steps, GALLERY_BUDGET, USER_BASE + 1, USER_BASE + 2)
+
+def test_order_flow_query_budget(bot_app):
+    steps: List[Step] = [
+        ('card', lambda user: callback_update(user, 'gallery_card_1', photo=True)),
+        ('order', lambda user: callback_update(user, 'order_book_1')),
+        ('field', lambda user: message_update(user, 'Иванов Иван Иванович')),
+        ('field', lambda user: message_update(user, 'Москва, ул. Ленина 1')),
+        ('field', lambda user: message_update(user, '+79000000000')),
+        ('confirm', lambda user: message_update(user, 'да')),
+    ]
+    run_flow(bot_app, steps, ORDER_FLOW_BUDGET, USER_BASE + 3, USER_BASE + 4)
+    assert Order.select().where(Order.telegram_id == USER_BASE + 4).count() == 1
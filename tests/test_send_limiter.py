@@ -0,0 +1,69 @@
+import asyncio
+import time
+from typing import Any, List
+
+from aiogram.methods import SendMessage
+
+from config.send_limiter import OutboundLimiter, SlidingWindow
+
+CHATS = 60
+MESSAGES_PER_CHAT = 2
+GLOBAL_RATE = 30
+# Время отправки снимается чуть позже, чем занимается место в окне
+CLOCK_SLACK = 0.002
+
+def max_per_window(times: List[float], period: float = 1.0) -> int:
+    """Наибольшее число отправок в скользящем окне [t, t + period)"""
+    times = sorted(times)
+    best, start = 0, 0
+    for end, moment in enumerate(times):
+        while moment - times[start] >= period - CLOCK_SLACK:
+            start += 1
+        best = max(best, end - start + 1)
+    return best
+
+def send_all(limiter: OutboundLimiter, chats: int, per_chat: int) -> List[Any]:
+    sent: List[Any] = []
+
+    async def make_request(bot: Any, method: SendMessage) -> bool:
+        sent.append((time.monotonic(), method.chat_id))
+        return True
+
+    async def run() -> None:
+        await asyncio.gather(*(
+            limiter(make_request, None, SendMessage(chat_id=chat, text='x'))
+            for _ in range(per_chat) for chat in range(1, chats + 1)
+        ))
+
+    asyncio.run(run())
+    return sent
+
+def test_global_rate_holds_in_every_second():
+    # Второе сообщение каждого чата ждет секунду корзины чата: раньше место в общем лимите
+    # занималось на это время заранее, и после ожидания отправки шли пачкой по 60 в секунду
+    limiter = OutboundLimiter(global_rate=GLOBAL_RATE, chat_rate=1, chat_burst=1, max_retries=0)
+    sent = send_all(limiter, CHATS, MESSAGES_PER_CHAT)
+    assert len(sent) == CHATS * MESSAGES_PER_CHAT
+    assert max_per_window([moment for moment, _ in sent]) <= GLOBAL_RATE
+
+def test_chat_rate_spaces_messages_to_one_chat():
+    limiter = OutboundLimiter(global_rate=GLOBAL_RATE, chat_rate=1, chat_burst=1, max_retries=0)
+    sent = send_all(limiter, 3, 3)
+    for chat in (1, 2, 3):
+        times = [moment for moment, chat_id in sent if chat_id == chat]
+        assert all(later - earlier >= 1.0 - CLOCK_SLACK for earlier, later in zip(times, times[1:]))
+
+def test_idle_limiter_does_not_queue():
+    limiter = OutboundLimiter(global_rate=GLOBAL_RATE, chat_rate=1, chat_burst=3, max_retries=0)
+    started = time.monotonic()
+    send_all(limiter, 20, 1)
+    assert time.monotonic() - started < 0.5
+    assert limiter.stats()['max_depth'] == 0
+
+def test_sliding_window_delay():
+    window = SlidingWindow(2, period=1.0)
+    assert window.try_acquire(10.0)
+    assert window.try_acquire(10.5)
+    assert not window.try_acquire(10.9)
+    assert abs(window.delay(10.9) - 0.1) < 1e-9
+    assert window.try_acquire(11.0)
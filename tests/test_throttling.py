@@ -0,0 +1,47 @@
+import asyncio
+from typing import List
+
+from aiogram import Bot
+from aiogram.methods import AnswerCallbackQuery, SendMessage
+from aiogram.types import Update
+
+from benchmarks.dispatcher_e2e import RecordingSession, _recorded
+from config.throttling import THROTTLED_TEXT, ThrottlingMiddleware
+from tests.conftest import callback_update, message_update
+
+USER_ID = 9400000
+
+def feed_throttled(updates) -> List:
+    """Прогоняет обновления через антифлуд с корзиной на одно событие и возвращает вызовы Bot API"""
+    middleware = ThrottlingMiddleware(rates={'default': (0.001, 1), 'gallery': (0.001, 1)})
+    bot = Bot('123456:test', session=RecordingSession())
+    handled = []
+    calls: list = []
+
+    async def handler(event, data):
+        handled.append(event)
+
+    async def run() -> None:
+        token = _recorded.set(calls)
+        try:
+            for update in updates:
+                # Как при feed_update: вложенные объекты привязаны к боту и могут вызывать его методы
+                update = Update.model_validate(update.model_dump(), context={'bot': bot})
+                user = (update.callback_query or update.message).from_user
+                await middleware(handler, update, {'event_from_user': user})
+        finally:
+            _recorded.reset(token)
+
+    asyncio.run(run())
+    assert len(handled) == 1
+    return calls
+
+def test_every_throttled_callback_is_answered():
+    calls = feed_throttled([callback_update(USER_ID, 'gallery_next_1') for _ in range(4)])
+    assert [type(call) for call in calls] == [AnswerCallbackQuery] * 3
+    # Предупреждение один раз, дальше кнопка просто перестает крутиться
+    assert [call.text for call in calls] == [THROTTLED_TEXT, None, None]
+
+def test_throttled_messages_warn_once():
+    calls = feed_throttled([message_update(USER_ID, 'привет') for _ in range(3)])
+    assert [type(call) for call in calls] == [SendMessage]
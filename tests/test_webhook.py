@@ -0,0 +1,31 @@
+import asyncio
+
+import pytest
+from aiogram import Bot, Dispatcher
+from aiohttp.test_utils import TestClient, TestServer
+
+from config import settings
+from config.webhook import build_webhook_app
+
+SECRET = 'test-secret'
+UPDATE = {'update_id': 1, 'message': {'message_id': 1, 'date': 0, 'chat': {'id': 1, 'type': 'private'}, 'text': '/start'}}
+
+def post_update(headers: dict) -> int:
+    async def run() -> int:
+        app = build_webhook_app(Dispatcher(), Bot('123456:test'), register=False)
+        async with TestClient(TestServer(app)) as client:
+            response = await client.post(settings.WEBHOOK_PATH, json=UPDATE, headers=headers)
+            return response.status
+
+    return asyncio.run(run())
+
+def test_webhook_requires_secret(monkeypatch):
+    monkeypatch.setattr(settings, 'WEBHOOK_SECRET', '')
+    with pytest.raises(ValueError):
+        build_webhook_app(Dispatcher(), Bot('123456:test'), register=False)
+
+def test_update_without_secret_is_rejected(monkeypatch):
+    monkeypatch.setattr(settings, 'WEBHOOK_SECRET', SECRET)
+    assert post_update({}) == 401
+    assert post_update({'X-Telegram-Bot-Api-Secret-Token': 'forged'}) == 401
+    assert post_update({'X-Telegram-Bot-Api-Secret-Token': SECRET}) == 200